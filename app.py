@@ -1,15 +1,17 @@
 # app.py
 import random
 from datetime import datetime, timedelta
-import traceback
 
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
 
-from db import Base, engine, get_db
+from db import Base, engine, get_db, get_async_db, db_pool_stats, replica_engine
+from db_routing import METODOS_LECTURA, marcar_escritura
 from models import User, Consent, PasswordResetCode
+from patient_search import indexar_paciente
 from schemas import (
     RegisterIn,
     LoginIn,
@@ -18,8 +20,18 @@ from schemas import (
     ResetPasswordIn,
     MessageOut,
 )
-from auth import hash_password, verify_password, create_access_token, sha256_hex
-from email_service import send_password_reset_email
+from auth import (
+    hash_password_async,
+    verify_and_update_password_async,
+    create_access_token,
+    sha256_hex,
+    token_cache_stats,
+    usuario_desde_request,
+)
+import password_hashing
+import email_queue
+import email_templates
+import reminders
 from routes_profile import router as profile_router
 from routes_evaluations import router as evaluations_router
 from routes_plan_trabajo import router as plan_router
@@ -33,12 +45,25 @@ app = FastAPI(title="ETIAAM API", version="1.0.0")
 
 @app.on_event("startup")
 def startup():
+    # create_all solo crea tablas nuevas; columnas e índices de tablas
+    # existentes se aplican con las migraciones: alembic upgrade head
     try:
         Base.metadata.create_all(bind=engine)
         print("Base de datos conectada correctamente")
     except OperationalError as e:
         print("Error conectando a la base de datos:", e)
 
+    email_templates.cargar_plantillas()
+    email_queue.iniciar()
+    reminders.iniciar()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    reminders.detener()
+    email_queue.detener()
+    password_hashing.shutdown()
+
 
 # CORS abierto para desarrollo
 app.add_middleware(
@@ -50,6 +75,22 @@ app.add_middleware(
 )
 
 
+# Réplica de lectura: el middleware identifica al usuario para que get_db
+# decida réplica/primario, y registra sus escrituras (read-your-writes).
+if replica_engine is not None:
+    @app.middleware("http")
+    async def enrutar_lecturas(request: Request, call_next):
+        usuario = usuario_desde_request(request)
+        request.state.user_id = usuario["id"] if usuario else None
+
+        response = await call_next(request)
+
+        if request.method not in METODOS_LECTURA and response.status_code < 400:
+            marcar_escritura(request.state.user_id)
+
+        return response
+
+
 # Cargar routers
 app.include_router(profile_router)
 app.include_router(evaluations_router)
@@ -70,6 +111,14 @@ def health():
     return {"ok": True}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "token_cache": token_cache_stats(),
+        "db_pool": db_pool_stats(),
+    }
+
+
 @app.get("/consent/latest")
 def latest_consent():
     text = (
@@ -100,8 +149,44 @@ def latest_consent():
 # ============================================================
 # REGISTRO
 # ============================================================
+# Registro, login y restablecimiento son async: mientras Argon2 corre en
+# el pool de password_hashing no ocupan un hilo del threadpool. Las
+# consultas van por AsyncSession.run_sync.
+def _usuario_por(db: Session, condicion):
+    return db.query(User).filter(condicion).first()
+
+
+def _crear_usuario(db: Session, payload: RegisterIn, email, password_hash: str, req: Request):
+    user = User(
+        email=email,
+        password_hash=password_hash,
+        full_name=payload.full_name,
+        user_type=payload.user_type,
+
+        # Campos para login con celular
+        country_code=payload.country_code,
+        phone_national=payload.phone_national,
+        phone_number=payload.phone_number,
+    )
+
+    db.add(user)
+    db.flush()
+
+    consent = Consent(
+        user_id=user.id,
+        version=payload.consent_version,
+        text_hash=sha256_hex(payload.consent_text),
+        ip_address=req.client.host if req.client else None,
+        user_agent=req.headers.get("user-agent"),
+    )
+
+    db.add(consent)
+    indexar_paciente(db, user, None)
+    return user
+
+
 @app.post("/register", response_model=TokenOut)
-def register(payload: RegisterIn, req: Request, db: Session = Depends(get_db)):
+async def register(payload: RegisterIn, req: Request, db: AsyncSession = Depends(get_async_db)):
     if payload.user_type not in ("paciente", "profesional"):
         raise HTTPException(
             status_code=400,
@@ -112,7 +197,7 @@ def register(payload: RegisterIn, req: Request, db: Session = Depends(get_db)):
     email = payload.email.lower().strip() if payload.email else None
 
     if email:
-        existing_email = db.query(User).filter(User.email == email).first()
+        existing_email = await db.run_sync(_usuario_por, User.email == email)
         if existing_email:
             raise HTTPException(
                 status_code=409,
@@ -120,11 +205,7 @@ def register(payload: RegisterIn, req: Request, db: Session = Depends(get_db)):
             )
 
     # Validar teléfono duplicado
-    existing_phone = (
-        db.query(User)
-        .filter(User.phone_number == payload.phone_number)
-        .first()
-    )
+    existing_phone = await db.run_sync(_usuario_por, User.phone_number == payload.phone_number)
 
     if existing_phone:
         raise HTTPException(
@@ -142,32 +223,15 @@ def register(payload: RegisterIn, req: Request, db: Session = Depends(get_db)):
             detail="El número celular completo no coincide con la lada y el número nacional",
         )
 
-    user = User(
-        email=email,
-        password_hash=hash_password(payload.password),
-        full_name=payload.full_name,
-        user_type=payload.user_type,
-
-        # Campos para login con celular
-        country_code=payload.country_code,
-        phone_national=payload.phone_national,
-        phone_number=payload.phone_number,
-    )
-
-    db.add(user)
-    db.flush()
+    password_hash = await hash_password_async(payload.password)
 
-    consent = Consent(
-        user_id=user.id,
-        version=payload.consent_version,
-        text_hash=sha256_hex(payload.consent_text),
-        ip_address=req.client.host if req.client else None,
-        user_agent=req.headers.get("user-agent"),
-    )
+    user = await db.run_sync(_crear_usuario, payload, email, password_hash, req)
+    await db.commit()
+    await db.refresh(user)
 
-    db.add(consent)
-    db.commit()
-    db.refresh(user)
+    # La petición de registro no trae token; el usuario nuevo lee del
+    # primario mientras la réplica lo recibe.
+    marcar_escritura(user.id)
 
     token = create_access_token(
         {
@@ -198,14 +262,14 @@ def register(payload: RegisterIn, req: Request, db: Session = Depends(get_db)):
 # - Perú (+51): 9 dígitos
 # ============================================================
 @app.post("/login", response_model=TokenOut)
-def login(payload: LoginIn, db: Session = Depends(get_db)):
+async def login(payload: LoginIn, db: AsyncSession = Depends(get_async_db)):
     identifier = payload.identifier.strip()
 
     user = None
 
     # Login con correo
     if "@" in identifier:
-        user = db.query(User).filter(User.email == identifier).first()
+        user = await db.run_sync(_usuario_por, User.email == identifier)
 
     # Login con celular nacional
     elif identifier.isdigit() and len(identifier) in [9, 10]:
@@ -236,11 +300,7 @@ def login(payload: LoginIn, db: Session = Depends(get_db)):
 
         full_phone_number = f"{payload.country_code}{identifier}"
 
-        user = (
-            db.query(User)
-            .filter(User.phone_number == full_phone_number)
-            .first()
-        )
+        user = await db.run_sync(_usuario_por, User.phone_number == full_phone_number)
 
     else:
         raise HTTPException(
@@ -248,12 +308,23 @@ def login(payload: LoginIn, db: Session = Depends(get_db)):
             detail="Ingresa un correo válido o un celular nacional válido",
         )
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    valido, nuevo_hash = (
+        await verify_and_update_password_async(payload.password, user.password_hash)
+        if user
+        else (False, None)
+    )
+
+    if not valido:
         raise HTTPException(
             status_code=401,
             detail="Credenciales inválidas",
         )
 
+    # Rehash transparente si el hash guardado usa un perfil de Argon2 anterior.
+    if nuevo_hash:
+        user.password_hash = nuevo_hash
+        await db.commit()
+
     token = create_access_token(
         {
             "sub": str(user.id),
@@ -282,6 +353,9 @@ def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
 
     Por seguridad, aunque el correo no exista, regresamos el mismo mensaje.
     Así evitamos revelar qué correos están registrados.
+
+    El correo no se envía aquí: queda en la cola de email_queue.py, que lo
+    entrega en segundo plano con reintentos.
     """
 
     generic_message = "Si el correo está registrado, enviaremos un código de recuperación."
@@ -303,6 +377,7 @@ def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
 
     for item in previous_codes:
         item.used = 1
+        item.pending_code = None
 
     # Código de 6 dígitos
     code = f"{random.randint(0, 999999):06d}"
@@ -312,21 +387,16 @@ def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
         code_hash=sha256_hex(code),
         expires_at=datetime.utcnow() + timedelta(minutes=10),
         used=0,
+        email_status="pendiente",
+        email_attempts=0,
+        email_next_attempt_at=datetime.utcnow(),
+        pending_code=code,
     )
 
     db.add(reset_code)
     db.commit()
 
-    try:
-        send_password_reset_email(user.email, code)
-    except Exception as e:
-        print("Error enviando correo de recuperación:")
-        traceback.print_exc()
-
-        raise HTTPException(
-            status_code=500,
-            detail="No se pudo enviar el correo de recuperación. Intenta más tarde.",
-        )
+    email_queue.despertar()
 
     return MessageOut(message=generic_message)
 
@@ -334,9 +404,9 @@ def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
 # ============================================================
 # RECUPERACIÓN DE CONTRASEÑA - RESTABLECER CONTRASEÑA
 # ============================================================
-@app.post("/password/reset", response_model=MessageOut)
-def reset_password(payload: ResetPasswordIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+def _codigo_vigente(db: Session, payload: ResetPasswordIn):
+    """(user, reset_code) o 400 si el código no existe, ya se usó o expiró."""
+    user = _usuario_por(db, User.email == payload.email)
 
     if not user:
         raise HTTPException(
@@ -372,13 +442,21 @@ def reset_password(payload: ResetPasswordIn, db: Session = Depends(get_db)):
             detail="Código inválido o expirado",
         )
 
+    return user, reset_code
+
+
+@app.post("/password/reset", response_model=MessageOut)
+async def reset_password(payload: ResetPasswordIn, db: AsyncSession = Depends(get_async_db)):
+    user, reset_code = await db.run_sync(_codigo_vigente, payload)
+
     # Actualizar contraseña
-    user.password_hash = hash_password(payload.new_password)
+    user.password_hash = await hash_password_async(payload.new_password)
 
     # Marcar código como usado
     reset_code.used = 1
+    reset_code.pending_code = None
 
-    db.commit()
+    await db.commit()
 
     return MessageOut(
         message="Contraseña actualizada correctamente."
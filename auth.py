@@ -1,28 +1,30 @@
 # auth.py
 import os
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import get_db, get_async_db
+from models import User, Profile
+
+import password_hashing
+from password_hashing import HashingBusyError
 
 
 # ================================================================
 # CONFIGURACIÓN DE CONTRASEÑAS
 # ================================================================
-# Usa Argon2 en lugar de bcrypt
-pwd_ctx = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto",
-    # Opcional: endurecer parámetros
-    # scheme_specific_settings={
-    #     "argon2__memory_cost": 102400,
-    #     "argon2__time_cost": 2,
-    #     "argon2__parallelism": 8
-    # }
-)
+# Argon2; los parámetros se configuran por variables de entorno
+# en password_hashing.py.
+pwd_ctx = password_hashing.pwd_ctx
 
 
 # ================================================================
@@ -36,12 +38,56 @@ JWT_EXP_MIN = int(os.getenv("JWT_EXP_MIN", "120"))
 # ================================================================
 # FUNCIONES DE CONTRASEÑA
 # ================================================================
+# Argon2 corre en un pool de procesos acotado (ver password_hashing.py).
+# Si está saturado se responde 503 de inmediato en lugar de encolar más.
+# Los handlers usan las variantes *_async para no ocupar un hilo del
+# threadpool mientras esperan el resultado.
+def _hashing_ocupado():
+    return HTTPException(
+        status_code=503,
+        detail="Servidor ocupado. Intenta de nuevo en unos segundos.",
+        headers={"Retry-After": "1"},
+    )
+
+
 def hash_password(p: str) -> str:
-    return pwd_ctx.hash(p)
+    try:
+        return password_hashing.hash_password(p)
+    except HashingBusyError:
+        raise _hashing_ocupado()
 
 
 def verify_password(p: str, h: str) -> bool:
-    return pwd_ctx.verify(p, h)
+    try:
+        return password_hashing.verify_password(p, h)
+    except HashingBusyError:
+        raise _hashing_ocupado()
+
+
+def verify_and_update_password(p: str, h: str):
+    """
+    Verifica la contraseña y, si el hash usa parámetros de Argon2
+    desactualizados, regresa también el hash nuevo: (valido, nuevo_hash).
+    """
+    try:
+        return password_hashing.verify_and_update(p, h)
+    except HashingBusyError:
+        raise _hashing_ocupado()
+
+
+async def hash_password_async(p: str) -> str:
+    try:
+        return await password_hashing.hash_password_async(p)
+    except HashingBusyError:
+        raise _hashing_ocupado()
+
+
+async def verify_and_update_password_async(p: str, h: str):
+    """Igual que verify_and_update_password, para handlers async."""
+    try:
+        return await password_hashing.verify_and_update_async(p, h)
+    except HashingBusyError:
+        raise _hashing_ocupado()
 
 
 # ================================================================
@@ -71,10 +117,109 @@ def sha256_hex(text: str) -> str:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
+# ================================================================
+# CACHÉ DE TOKENS VERIFICADOS
+# ================================================================
+# Evita decodificar y verificar el HMAC del mismo JWT en cada request.
+# La llave es el sha256 del token y cada entrada vive hasta el "exp"
+# del token. LRU acotado y seguro para los hilos del threadpool.
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+
+
+class _TokenCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entrada = self._items.get(key)
+
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            exp, usuario = entrada
+
+            if exp <= time.time():
+                del self._items[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return dict(usuario)
+
+    def put(self, key: str, exp: float, usuario: dict):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._items[key] = (exp, dict(usuario))
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_token_cache = _TokenCache(TOKEN_CACHE_MAX)
+
+
+def token_cache_stats() -> dict:
+    return _token_cache.stats()
+
+
 # ================================================================
 # USUARIO ACTUAL DESDE TOKEN
 # ================================================================
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # async a propósito: no hace E/S (caché + decode HS256), así que
+    # corre en el event loop y no ocupa un hilo del threadpool.
+    return _usuario_desde_token(token)
+
+
+def usuario_desde_request(request: Request):
+    """
+    Usuario del header Authorization sin lanzar errores (None si no hay
+    token o es inválido). Lo usa el middleware de réplica de app.py.
+    """
+    encabezado = request.headers.get("authorization", "")
+    esquema, _, token = encabezado.partition(" ")
+
+    if esquema.lower() != "bearer" or not token:
+        return None
+
+    try:
+        return _usuario_desde_token(token)
+    except HTTPException:
+        return None
+
+
+def _usuario_desde_token(token: str):
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    usuario = _token_cache.get(cache_key)
+    if usuario is not None:
+        return usuario
+
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
 
@@ -87,7 +232,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
                 detail="Token inválido: usuario no encontrado",
             )
 
-        return {
+        usuario = {
             "id": int(user_id),
             "user_type": user_type,
         }
@@ -97,8 +242,56 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             status_code=401,
             detail="Token inválido o expirado",
         )
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        return {"id": int(payload.get("sub")), "user_type": payload.get("user_type")}
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token inválido o expirado")
\ No newline at end of file
+
+    if payload.get("exp") is not None:
+        _token_cache.put(cache_key, float(payload["exp"]), usuario)
+
+    return usuario
+
+
+# ================================================================
+# CUENTA ACTUAL (USER + PROFILE) POR REQUEST
+# ================================================================
+def cargar_cuenta(db: Session, user_id: int):
+    """(User, Profile | None) de un usuario con un solo JOIN; 404 si no existe."""
+    fila = (
+        db.query(User, Profile)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+
+    if not fila:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    return (fila[0], fila[1])
+
+
+def get_current_account(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Carga (User, Profile | None) del usuario autenticado con un solo JOIN
+    y lo guarda en request.state, para que los validadores de los routers
+    no vuelvan a consultar User/Profile en el mismo request.
+    """
+    cuenta = getattr(request.state, "cuenta_actual", None)
+    if cuenta is None:
+        cuenta = cargar_cuenta(db, current_user["id"])
+        request.state.cuenta_actual = cuenta
+    return cuenta
+
+
+async def get_current_account_async(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Igual que get_current_account, para rutas async (AsyncSession)."""
+    cuenta = getattr(request.state, "cuenta_actual", None)
+    if cuenta is None:
+        cuenta = await db.run_sync(cargar_cuenta, current_user["id"])
+        request.state.cuenta_actual = cuenta
+    return cuenta
@@ -0,0 +1,217 @@
+# benchmarks/bench_busqueda.py
+"""
+Latencia de búsqueda de pacientes (typeahead) con N pacientes sintéticos:
+- descarga completa de /api/pacientes/detalle y filtro en el cliente
+  (lo que hace hoy la app; aquí solo se mide la consulta y el filtro)
+- LIKE '%texto%' sobre profiles/users (búsqueda sin índice)
+- patient_search.buscar_pacientes sobre patient_search_terms (actual)
+
+Uso (contra una base de pruebas, nunca la de producción):
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.bench_busqueda \\
+        [--pacientes 100000] [--repeticiones 50] [--conservar]
+
+También corre sobre SQLite (DATABASE_URL=sqlite:////tmp/bench.db). Ahí
+LIKE no distingue mayúsculas por defecto y no puede usar el índice
+(termino, user_id); el benchmark activa PRAGMA case_sensitive_like, que no
+cambia los resultados porque los términos ya están en minúsculas, para
+que el prefijo se resuelva sobre el índice como en MySQL.
+
+Los pacientes sintéticos usan correos @bench.invalid y se borran al
+terminar, salvo con --conservar (para repetir la medición sin volver a
+generarlos).
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import event, func, insert, or_, select
+
+from db import Base, SessionLocal, engine
+from models import PatientSearchTerm, Profile, User
+from patient_search import buscar_pacientes, normalizar, terminos_paciente
+
+
+DOMINIO = "@bench.invalid"
+
+NOMBRES = [
+    "María", "José", "Juan", "Guadalupe", "Francisco", "Ana", "Luis", "Sofía",
+    "Jesús", "Verónica", "Ángel", "Mónica", "Raúl", "Inés", "Óscar", "Lucía",
+    "Miguel", "Rocío", "Héctor", "Elena", "Martín", "Begoña", "Iván", "Noemí",
+]
+APELLIDOS = [
+    "Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez",
+    "Sánchez", "Ramírez", "Cruz", "Flores", "Gómez", "Núñez", "Peña", "Muñoz",
+    "Jiménez", "Domínguez", "Vázquez", "Ibáñez", "Ordóñez", "Álvarez", "Ríos",
+]
+UNIDADES = [f"UMF {n}" for n in range(1, 41)]
+
+BUSQUEDAS = ["mar", "maria", "hernan", "perez", "pena", "nunez", "jose garc",
+             "lucia ord", "833", "5512", "1234"]
+
+
+def _generar(db, total: int, lote: int = 5000):
+    rnd = random.Random(42)
+    inicio = (db.query(func.max(User.id)).scalar() or 0) + 1
+
+    for desde in range(0, total, lote):
+        usuarios, perfiles, terminos = [], [], []
+
+        for i in range(desde, min(desde + lote, total)):
+            user_id = inicio + i
+            nombre = rnd.choice(NOMBRES)
+            apellido = f"{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+            lada = rnd.choice(["55", "33", "81", "833"])
+            telefono = f"{lada}{user_id:0{10 - len(lada)}d}"
+
+            user = User(
+                id=user_id,
+                email=f"bench{user_id}{DOMINIO}",
+                password_hash="x",
+                full_name=f"{nombre} {apellido}",
+                user_type="paciente",
+                country_code="+52",
+                phone_national=telefono,
+                phone_number=f"+52{telefono}",
+            )
+            profile = Profile(
+                user_id=user_id,
+                nombre=nombre,
+                apellido=apellido,
+                nss=f"{rnd.randrange(10**10, 10**11)}",
+                unidad_medica=rnd.choice(UNIDADES),
+            )
+
+            usuarios.append({c: getattr(user, c) for c in (
+                "id", "email", "password_hash", "full_name", "user_type",
+                "country_code", "phone_national", "phone_number",
+            )})
+            perfiles.append({c: getattr(profile, c) for c in (
+                "user_id", "nombre", "apellido", "nss", "unidad_medica",
+            )})
+            terminos += [
+                {"user_id": user_id, "termino": termino}
+                for termino in terminos_paciente(user, profile)
+            ]
+
+        db.execute(insert(User), usuarios)
+        db.execute(insert(Profile), perfiles)
+        db.execute(insert(PatientSearchTerm), terminos)
+        db.commit()
+
+
+def _borrar(db):
+    ids = select(User.id).where(User.email.like("%" + DOMINIO)).scalar_subquery()
+    db.query(PatientSearchTerm).filter(PatientSearchTerm.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(Profile).filter(Profile.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.email.like("%" + DOMINIO)).delete(synchronize_session=False)
+    db.commit()
+
+
+def _descarga_completa(db, q: str):
+    palabras = normalizar(q)
+    resultado = []
+
+    for user, profile in (
+        db.query(User, Profile)
+        .join(Profile, Profile.user_id == User.id)
+        .filter(User.user_type == "paciente")
+        .all()
+    ):
+        texto = " ".join(normalizar(
+            f"{profile.nombre} {profile.apellido} {profile.nss} {user.phone_number}"
+        ))
+        if all(p in texto for p in palabras):
+            resultado.append(user.id)
+
+    return resultado[:20]
+
+
+def _like_contiene(db, q: str):
+    query = (
+        db.query(User.id)
+        .join(Profile, Profile.user_id == User.id)
+        .filter(User.user_type == "paciente")
+    )
+
+    for palabra in q.split():
+        patron = f"%{palabra}%"
+        query = query.filter(or_(
+            Profile.nombre.like(patron),
+            Profile.apellido.like(patron),
+            Profile.nss.like(patron),
+            User.phone_number.like(patron),
+        ))
+
+    return query.limit(20).all()
+
+
+def _preparar_sqlite():
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _case_sensitive_like(conexion, _):
+        conexion.execute("PRAGMA case_sensitive_like=ON")
+
+    engine.dispose()
+
+
+def _medir(db, funcion, repeticiones: int) -> dict:
+    latencias = []
+
+    for _ in range(repeticiones):
+        for q in BUSQUEDAS:
+            inicio = time.perf_counter()
+            funcion(db, q)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    latencias.sort()
+    return {
+        "p50_ms": round(statistics.median(latencias), 2),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1], 2),
+        "max_ms": round(latencias[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pacientes", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--conservar", action="store_true")
+    args = parser.parse_args()
+
+    _preparar_sqlite()
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+
+    try:
+        existentes = db.query(func.count(User.id)).filter(User.email.like("%" + DOMINIO)).scalar()
+        if existentes < args.pacientes:
+            inicio = time.perf_counter()
+            _generar(db, args.pacientes - existentes)
+            print(f"Generados {args.pacientes - existentes} pacientes en {time.perf_counter() - inicio:.1f}s")
+
+        print(f"Pacientes sintéticos: {args.pacientes}  búsquedas: {BUSQUEDAS}")
+        print(f"{'estrategia':<22}  {'p50 ms':>8}  {'p95 ms':>8}  {'max ms':>8}")
+
+        estrategias = [
+            # Descargar todo es lento; con pocas repeticiones basta.
+            ("descarga + filtro", _descarga_completa, max(1, args.repeticiones // 25)),
+            ("LIKE '%texto%'", _like_contiene, args.repeticiones),
+            ("patient_search", lambda db, q: buscar_pacientes(db, q, 20), args.repeticiones),
+        ]
+
+        for nombre, funcion, repeticiones in estrategias:
+            r = _medir(db, funcion, repeticiones)
+            print(f"{nombre:<22}  {r['p50_ms']:>8}  {r['p95_ms']:>8}  {r['max_ms']:>8}")
+            db.expunge_all()
+    finally:
+        db.rollback()
+        if not args.conservar:
+            _borrar(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
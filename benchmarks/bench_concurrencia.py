@@ -0,0 +1,102 @@
+# benchmarks/bench_concurrencia.py
+"""
+Prueba de carga: cuántas peticiones simultáneas atiende un worker de
+uvicorn antes de que la latencia se dispare.
+
+Con rutas síncronas cada petición ocupa un hilo del threadpool de
+Starlette (40 por defecto), así que arriba de ese número las peticiones
+hacen fila y el p95 crece aunque la base de datos esté libre. Las rutas
+async (AsyncSession + aiomysql) no tienen ese tope.
+
+Uso (con el servidor corriendo con un solo worker contra la base real):
+    uvicorn app:app --workers 1
+    python -m benchmarks.bench_concurrencia --url http://127.0.0.1:8000 \\
+        --token <JWT> --ruta /api/calendar --concurrencias 10 40 80 160
+
+Para comparar antes/después, correr lo mismo con el servidor en el commit
+anterior (rutas síncronas) y en el actual.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _medir(url: str, headers: dict, concurrencia: int, duracion: float) -> dict:
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=concurrencia))
+    session.mount("https://", HTTPAdapter(pool_maxsize=concurrencia))
+
+    latencias = []
+    errores = 0
+    en_vuelo = 0
+    max_en_vuelo = 0
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def cliente(_):
+        nonlocal errores, en_vuelo, max_en_vuelo
+        while time.perf_counter() < fin:
+            with lock:
+                en_vuelo += 1
+                max_en_vuelo = max(max_en_vuelo, en_vuelo)
+            inicio = time.perf_counter()
+            try:
+                ok = session.get(url, headers=headers, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            transcurrido = (time.perf_counter() - inicio) * 1000
+            with lock:
+                en_vuelo -= 1
+                if ok:
+                    latencias.append(transcurrido)
+                else:
+                    errores += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        list(hilos.map(cliente, range(concurrencia)))
+    total = time.perf_counter() - inicio
+
+    session.close()
+    latencias.sort()
+
+    return {
+        "concurrencia": concurrencia,
+        "en_vuelo_max": max_en_vuelo,
+        "req_s": round(len(latencias) / total, 1),
+        "p50_ms": round(statistics.median(latencias), 1) if latencias else None,
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1], 1) if latencias else None,
+        "errores": errores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--ruta", default="/api/calendar")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[10, 40, 80, 160])
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos por nivel")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") + args.ruta
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    print(f"Ruta: {url}  duración por nivel: {args.duracion}s")
+    print(f"{'conc':>5}  {'en vuelo':>8}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'errores':>7}")
+
+    for concurrencia in args.concurrencias:
+        r = _medir(url, headers, concurrencia, args.duracion)
+        print(
+            f"{r['concurrencia']:>5}  {r['en_vuelo_max']:>8}  {r['req_s']:>8}  "
+            f"{r['p50_ms']!s:>8}  {r['p95_ms']!s:>8}  {r['errores']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
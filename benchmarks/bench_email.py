@@ -0,0 +1,92 @@
+# benchmarks/bench_email.py
+"""
+Latencia por correo al enviar un lote a Resend: requests.post (conexión
+nueva por envío, como antes) contra la sesión compartida de email_service.
+
+Uso:
+    python -m benchmarks.bench_email [--correos 200] [--url URL]
+
+Sin --url levanta un servidor HTTP local que responde 200 (no mide TLS,
+así que la diferencia real contra api.resend.com es mayor). Con --url se
+puede apuntar a otro stub, por ejemplo uno HTTPS.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubResend(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cuerpo = b'{"id": "stub"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _levantar_stub() -> str:
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _StubResend)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}/emails"
+
+
+def _medir(enviar, correos: int) -> dict:
+    tiempos = []
+    for i in range(correos):
+        inicio = time.perf_counter()
+        enviar(f"paciente{i}@example.com", f"{i:06d}")
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        "media_ms": round(statistics.mean(tiempos), 2),
+        "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 2),
+        "total_s": round(sum(tiempos) / 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--correos", type=int, default=200)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    os.environ["RESEND_API_URL"] = args.url or _levantar_stub()
+    os.environ.setdefault("RESEND_API_KEY", "bench")
+
+    import requests
+    import email_service
+
+    def sin_pool(to_email, code):
+        requests.post(
+            email_service.RESEND_API_URL,
+            json={"from": email_service.RESEND_FROM, "to": [to_email], "text": code},
+            headers={"Authorization": f"Bearer {email_service.RESEND_API_KEY}"},
+            timeout=10,
+        ).raise_for_status()
+
+    resultados = {
+        "requests.post": _medir(sin_pool, args.correos),
+        "sesión compartida": _medir(email_service.send_password_reset_email, args.correos),
+    }
+    email_service.close_session()
+
+    print(f"Correos: {args.correos}  destino: {email_service.RESEND_API_URL}")
+    print(f"{'cliente':<18}  {'media ms':>9}  {'p95 ms':>8}  {'total s':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<18}  {r['media_ms']:>9}  {r['p95_ms']:>8}  {r['total_s']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_hashing.py
+"""
+Throughput de verificación Argon2 (equivalente a /login) según el tamaño
+del pool de procesos de password_hashing.
+
+Uso:
+    python -m benchmarks.bench_hashing [--logins 64] [--concurrencia 32]
+
+Cada tamaño de pool se mide en un subproceso nuevo, porque HASH_POOL_SIZE
+se lee al importar password_hashing.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _medir(logins: int, concurrencia: int) -> dict:
+    import password_hashing
+
+    password_hash = password_hashing.pwd_ctx.hash("Clave#123")
+
+    # Calienta el pool para no medir el arranque de los procesos.
+    password_hashing.verify_password("Clave#123", password_hash)
+
+    rechazados = 0
+
+    def login(_):
+        nonlocal rechazados
+        try:
+            password_hashing.verify_password("Clave#123", password_hash)
+        except password_hashing.HashingBusyError:
+            rechazados += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        list(hilos.map(login, range(logins)))
+    duracion = time.perf_counter() - inicio
+
+    password_hashing.shutdown()
+
+    return {
+        "pool": password_hashing.HASH_POOL_SIZE,
+        "segundos": round(duracion, 3),
+        "logins_por_segundo": round((logins - rechazados) / duracion, 2),
+        "rechazados_503": rechazados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--interno", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(_medir(args.logins, args.concurrencia)))
+        return
+
+    nucleos = os.cpu_count() or 1
+    tamanos = sorted({1, 2, 4, nucleos} & set(range(1, nucleos + 1)))
+
+    print(f"Núcleos: {nucleos}  logins: {args.logins}  concurrencia: {args.concurrencia}")
+    print(f"{'pool':>4}  {'segundos':>9}  {'logins/s':>9}  {'503':>4}")
+
+    for tamano in tamanos:
+        env = dict(os.environ, HASH_POOL_SIZE=str(tamano), HASH_QUEUE_MAX=str(args.logins))
+        salida = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.bench_hashing",
+                "--interno",
+                "--logins", str(args.logins),
+                "--concurrencia", str(args.concurrencia),
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        r = json.loads(salida.stdout.strip().splitlines()[-1])
+        print(f"{r['pool']:>4}  {r['segundos']:>9}  {r['logins_por_segundo']:>9}  {r['rechazados_503']:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_templates.py
+"""
+Costo de armar el correo de recuperación:
+- f-string dentro de la función (implementación anterior)
+- plantilla leída y compilada en cada envío (sin caché)
+- plantilla cacheada de email_templates (implementación actual)
+
+Uso:
+    python -m benchmarks.bench_templates [--repeticiones 20000]
+"""
+import argparse
+import timeit
+
+import email_templates
+
+
+def _fstring(code: str) -> dict:
+    html_body = f"""
+    <html>
+      <body style="font-family: Arial, sans-serif; color: #222;">
+        <div style="max-width: 560px; margin: 0 auto; padding: 24px; border: 1px solid #ddd; border-radius: 12px;">
+          <h2 style="color: #1A237E;">Recuperación de contraseña ETIAAM</h2>
+          <p>Tu código de recuperación es:</p>
+          <div style="font-size: 28px; font-weight: bold; letter-spacing: 4px; color: #00796B; margin: 24px 0;">
+            {code}
+          </div>
+          <p>Este código expirará en <strong>10 minutos</strong>.</p>
+        </div>
+      </body>
+    </html>
+    """
+    text_body = f"""
+Tu código de recuperación es:
+
+{code}
+
+Este código expirará en 10 minutos.
+"""
+    return {"subject": "Código de recuperación ETIAAM", "html": html_body, "text": text_body}
+
+
+def _sin_cache(code: str) -> dict:
+    partes = email_templates._compilar("password_reset", email_templates.EMAIL_LOCALE)
+    variables = {"code": code, "minutos": "10"}
+    return {parte: email_templates._sustituir(segmentos, variables) for parte, segmentos in partes.items()}
+
+
+def _cacheada(code: str) -> dict:
+    return email_templates.render("password_reset", code=code, minutos=10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=20000)
+    args = parser.parse_args()
+
+    email_templates.cargar_plantillas()
+
+    casos = {
+        "f-string": _fstring,
+        "plantilla sin caché": _sin_cache,
+        "plantilla cacheada": _cacheada,
+    }
+
+    print(f"Repeticiones: {args.repeticiones}")
+    print(f"{'variante':<20}  {'µs/correo':>10}")
+    for nombre, funcion in casos.items():
+        segundos = timeit.timeit(lambda: funcion("123456"), number=args.repeticiones)
+        print(f"{nombre:<20}  {segundos / args.repeticiones * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,152 @@
 # db.py
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import ssl
+
+from db_pool import clase_pool, estadisticas, instrumentar, opciones_pool
+from db_routing import RoutingSession, usar_replica
 
 # Lee la URL desde la variable de entorno (Render -> Environment)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"ssl": {}},   # Aiven SSL
-    pool_pre_ping=True,
-    pool_recycle=300
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Réplica de solo lectura opcional (ver db_routing.py).
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+
+def _es_mysql(url) -> bool:
+    return make_url(url).get_backend_name() == "mysql"
+
+
+# Tamaño del pool, recycle y pre-ping se configuran por variables de
+# entorno (ver db_pool.py). El SSL de Aiven solo aplica a MySQL; con
+# SQLite (pruebas y benchmarks locales) no se pasan connect_args.
+def _crear_engine(url):
+    nuevo = create_engine(
+        url,
+        connect_args={"ssl": {}} if _es_mysql(url) else {},   # Aiven SSL
+        poolclass=clase_pool(),
+        **opciones_pool(),
+    )
+    instrumentar(nuevo)
+    return nuevo
+
+
+engine = _crear_engine(DATABASE_URL)
+replica_engine = _crear_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+
+class _Session(RoutingSession):
+    primario = engine
+    replica = replica_engine
+
+
+SessionLocal = sessionmaker(class_=_Session, autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["replica"] = usar_replica(request)
     try:
         yield db
     finally:
         db.close()
+
+
+# ================================================================
+# MOTOR ASÍNCRONO (aiomysql) PARA RUTAS DE SOLO LECTURA
+# ================================================================
+def _async_database_url(explicita, url):
+    """
+    La URL explícita si está definida; si no, la misma URL síncrona
+    con el driver aiomysql (mysql+pymysql://... -> mysql+aiomysql://...);
+    con SQLite, aiosqlite.
+    """
+    if explicita:
+        return explicita
+
+    url = make_url(url)
+    if url.get_backend_name() == "mysql":
+        url = url.set(drivername="mysql+aiomysql")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+def _async_ssl_context():
+    """
+    aiomysql necesita un SSLContext en lugar del dict de PyMySQL.
+    Con DB_SSL_CA (CA de Aiven) se verifica el certificado; sin ella la
+    conexión va cifrada pero sin verificar, como la conexión síncrona.
+    """
+    ca = os.getenv("DB_SSL_CA")
+    if ca:
+        return ssl.create_default_context(cafile=ca)
+
+    contexto = ssl.create_default_context()
+    contexto.check_hostname = False
+    contexto.verify_mode = ssl.CERT_NONE
+    return contexto
+
+
+def _crear_async_engine(url):
+    nuevo = create_async_engine(
+        url,
+        connect_args={"ssl": _async_ssl_context()} if _es_mysql(url) else {},   # Aiven SSL
+        poolclass=clase_pool(asincrono=True),
+        **opciones_pool(),
+    )
+    instrumentar(nuevo.sync_engine)
+    return nuevo
+
+
+ASYNC_DATABASE_URL = _async_database_url(os.getenv("ASYNC_DATABASE_URL"), DATABASE_URL)
+
+async_engine = _crear_async_engine(ASYNC_DATABASE_URL)
+async_replica_engine = (
+    _crear_async_engine(
+        _async_database_url(os.getenv("ASYNC_DATABASE_REPLICA_URL"), DATABASE_REPLICA_URL)
+    )
+    if DATABASE_REPLICA_URL
+    else None
+)
+
+
+class _AsyncRoutingSession(RoutingSession):
+    primario = async_engine.sync_engine
+    replica = async_replica_engine.sync_engine if async_replica_engine else None
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=_AsyncRoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db(request: Request):
+    """
+    Sesión asíncrona para rutas async. Las consultas ORM existentes se
+    reutilizan con `await db.run_sync(funcion, ...)`: la función recibe una
+    Session normal, pero la E/S va por aiomysql sin ocupar un hilo del
+    threadpool de Starlette. Las rutas que escriben (registro, login,
+    restablecer contraseña) confirman con `await db.commit()`.
+    """
+    async with AsyncSessionLocal() as db:
+        db.info["replica"] = usar_replica(request)
+        yield db
+
+
+def db_pool_stats() -> dict:
+    engines = {"sync": engine, "async": async_engine.sync_engine}
+    if replica_engine is not None:
+        engines["replica_sync"] = replica_engine
+        engines["replica_async"] = async_replica_engine.sync_engine
+    return estadisticas(engines)
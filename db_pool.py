@@ -0,0 +1,219 @@
+# db_pool.py
+"""
+Configuración y métricas de los pools de conexiones de db.py.
+
+Variables de entorno:
+- DB_POOL_SIZE: conexiones que el pool mantiene abiertas
+- DB_MAX_OVERFLOW: conexiones extra temporales cuando el pool se agota
+- DB_POOL_TIMEOUT: segundos máximos esperando una conexión libre
+- DB_POOL_RECYCLE: segundos antes de reemplazar una conexión
+- DB_PRE_PING: verificación de la conexión al tomarla del pool
+    always  SELECT 1 en cada checkout (pool_pre_ping de SQLAlchemy)
+    idle    SELECT 1 solo si la conexión estuvo libre más de DB_PING_IDLE
+    off     sin verificación (se confía en DB_POOL_RECYCLE)
+- DB_PING_IDLE: segundos de inactividad que disparan el ping en modo idle
+
+Cada pool registra checkouts, espera por conexión, conexiones en uso y
+overflow en histogramas; db.db_pool_stats() los expone en /metrics.
+Con eso se puede dimensionar DB_POOL_SIZE según los workers y el
+threadpool en lugar de adivinar.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+DB_PRE_PING = os.getenv("DB_PRE_PING", "always")
+DB_PING_IDLE = float(os.getenv("DB_PING_IDLE", "30"))
+
+if DB_PRE_PING not in ("always", "idle", "off"):
+    raise RuntimeError(f"DB_PRE_PING inválido: {DB_PRE_PING} (always / idle / off)")
+
+
+def opciones_pool() -> dict:
+    """kwargs de create_engine / create_async_engine para el pool."""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_PRE_PING == "always",
+    }
+
+
+# ================================================================
+# MÉTRICAS
+# ================================================================
+class Histograma:
+    def __init__(self, limites):
+        self.limites = list(limites)
+        self.cuentas = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, valor: float):
+        i = 0
+        while i < len(self.limites) and valor > self.limites[i]:
+            i += 1
+        self.cuentas[i] += 1
+        self.total += 1
+        self.suma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def stats(self) -> dict:
+        etiquetas = [f"<={limite}" for limite in self.limites] + [f">{self.limites[-1]}"]
+        return {
+            "buckets": dict(zip(etiquetas, self.cuentas)),
+            "count": self.total,
+            "avg": round(self.suma / self.total, 3) if self.total else 0,
+            "max": round(self.maximo, 3),
+        }
+
+
+class MetricasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidaciones = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.pings_fallidos = 0
+        self.espera_ms = Histograma([0.1, 1, 5, 10, 50, 100, 500, 1000, 5000])
+        self.en_uso = Histograma([1, 2, 5, 10, 20, 50])
+        self.overflow = Histograma([0, 1, 2, 5, 10, 20])
+
+    def registrar_espera(self, ms: float):
+        with self._lock:
+            self.espera_ms.registrar(ms)
+
+    def registrar_checkout(self, en_uso: int, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self.en_uso.registrar(en_uso)
+            self.overflow.registrar(max(overflow, 0))
+
+    def incrementar(self, contador: str):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def stats(self, pool) -> dict:
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": DB_MAX_OVERFLOW,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidaciones,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "failed_pings": self.pings_fallidos,
+                "wait_ms": self.espera_ms.stats(),
+                "checked_out_hist": self.en_uso.stats(),
+                "overflow_hist": self.overflow.stats(),
+            }
+
+
+class _PoolMedido:
+    """
+    Mide cuánto tarda _do_get (tomar conexión del pool, incluida la espera
+    cuando está agotado). Los eventos de pool solo avisan después del
+    checkout, así que la espera se mide aquí.
+    """
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.incrementar("timeouts")
+            raise
+        finally:
+            self.metricas.registrar_espera((time.perf_counter() - inicio) * 1000)
+
+
+def clase_pool(asincrono: bool = False):
+    """
+    Clase de pool medida con sus propias métricas; una por engine
+    (primario, réplica, síncrono, async) para no mezclar contadores.
+    """
+    base = AsyncAdaptedQueuePool if asincrono else QueuePool
+    return type(
+        "AsyncPoolMedido" if asincrono else "PoolMedido",
+        (_PoolMedido, base),
+        {"metricas": MetricasPool()},
+    )
+
+
+# ================================================================
+# EVENTOS: MÉTRICAS Y PING POR INACTIVIDAD
+# ================================================================
+def _ping(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def instrumentar(engine):
+    """Registra los listeners de métricas y de ping en un Engine (síncrono)."""
+    metricas = getattr(engine.pool, "metricas", None)
+
+    @event.listens_for(engine, "connect")
+    def _al_conectar(dbapi_connection, connection_record):
+        connection_record.info["libre_desde"] = time.monotonic()
+        if metricas:
+            metricas.incrementar("connects")
+
+    @event.listens_for(engine, "checkin")
+    def _al_devolver(dbapi_connection, connection_record):
+        connection_record.info["libre_desde"] = time.monotonic()
+
+    @event.listens_for(engine, "invalidate")
+    def _al_invalidar(dbapi_connection, connection_record, exception):
+        if metricas:
+            metricas.incrementar("invalidaciones")
+
+    @event.listens_for(engine, "checkout")
+    def _al_tomar(dbapi_connection, connection_record, connection_proxy):
+        if metricas:
+            metricas.registrar_checkout(engine.pool.checkedout(), engine.pool.overflow())
+
+        if DB_PRE_PING != "idle":
+            return
+
+        libre_desde = connection_record.info.get("libre_desde")
+        if libre_desde is None or time.monotonic() - libre_desde < DB_PING_IDLE:
+            return
+
+        if metricas:
+            metricas.incrementar("pings")
+        try:
+            _ping(dbapi_connection)
+        except Exception:
+            if metricas:
+                metricas.incrementar("pings_fallidos")
+            # El pool descarta esta conexión y reintenta con una nueva.
+            raise exc.DisconnectionError()
+
+
+def estadisticas(engines: dict) -> dict:
+    """{nombre: stats} de los engines creados con clase_pool()."""
+    return {
+        nombre: engine.pool.metricas.stats(engine.pool)
+        for nombre, engine in engines.items()
+        if hasattr(engine.pool, "metricas")
+    }
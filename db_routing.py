@@ -0,0 +1,89 @@
+# db_routing.py
+"""
+Enrutamiento de lecturas a una réplica (DATABASE_REPLICA_URL, opcional).
+
+- RoutingSession manda a la réplica los SELECT de las sesiones marcadas
+  con info["replica"] = True; flush, INSERT/UPDATE/DELETE y todo lo demás
+  va al primario. Después de escribir, la sesión lee solo del primario:
+  la réplica no tiene sus cambios (ni sin commit ni recién confirmados).
+- get_db / get_async_db marcan la sesión solo en peticiones GET/HEAD.
+- Read-your-writes: después de una petición de escritura exitosa, las
+  lecturas de ese usuario van al primario durante REPLICA_RYW_SECONDS,
+  para que no vea datos viejos mientras la réplica se pone al día.
+
+El registro de escrituras recientes vive en memoria del proceso. Con
+varios workers de uvicorn, una lectura que caiga en otro worker justo
+después de escribir puede ir a la réplica; REPLICA_RYW_SECONDS debe ser
+mayor que el retraso típico de replicación.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import Delete, Insert, Update
+from sqlalchemy.orm import Session
+
+
+REPLICA_RYW_SECONDS = float(os.getenv("REPLICA_RYW_SECONDS", "5"))
+REPLICA_RYW_MAX = int(os.getenv("REPLICA_RYW_MAX", "50000"))
+
+METODOS_LECTURA = ("GET", "HEAD")
+
+# user_id -> instante (monotonic) hasta el que se lee del primario
+_escrituras_recientes: dict[int, float] = {}
+_lock = threading.Lock()
+
+
+def marcar_escritura(user_id: int | None) -> None:
+    if user_id is None:
+        return
+
+    ahora = time.monotonic()
+
+    with _lock:
+        _escrituras_recientes[user_id] = ahora + REPLICA_RYW_SECONDS
+
+        if len(_escrituras_recientes) > REPLICA_RYW_MAX:
+            for uid, hasta in list(_escrituras_recientes.items()):
+                if hasta <= ahora:
+                    del _escrituras_recientes[uid]
+
+
+def escribio_recientemente(user_id: int | None) -> bool:
+    if user_id is None:
+        return False
+
+    with _lock:
+        hasta = _escrituras_recientes.get(user_id)
+
+    return hasta is not None and hasta > time.monotonic()
+
+
+def usar_replica(request) -> bool:
+    """
+    True si la petición puede leerse de la réplica. El usuario lo deja en
+    request.state.user_id el middleware de app.py.
+    """
+    if request is None or request.method not in METODOS_LECTURA:
+        return False
+
+    return not escribio_recientemente(getattr(request.state, "user_id", None))
+
+
+class RoutingSession(Session):
+    """
+    Session que elige engine por operación. Las subclases definen
+    `primario` y `replica` (None = sin réplica configurada).
+    """
+    primario = None
+    replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["replica"] = False
+            return self.primario
+
+        if self.replica is not None and self.info.get("replica"):
+            return self.replica
+
+        return self.primario
@@ -0,0 +1,239 @@
+# email_queue.py
+"""
+Cola de entrega de correos de recuperación de contraseña.
+
+forgot_password solo guarda el PasswordResetCode con email_status="pendiente"
+y responde; un hilo en segundo plano envía el correo por Resend con
+reintentos y backoff exponencial, y registra el estado en la misma fila.
+
+La cola es la tabla password_reset_codes, así que sobrevive reinicios.
+Cada fila se "reserva" (email_status="enviando" + lease en
+email_next_attempt_at) antes de enviarla, para que varios procesos de
+uvicorn puedan correr el worker sin enviar dos veces el mismo correo.
+Si un proceso muere a medio envío, la fila vuelve a estar disponible
+al vencer el lease.
+
+El lease se renueva justo antes de enviar cada fila del lote (los envíos
+son secuenciales y cada uno puede tardar los timeouts de Resend), y tanto
+la renovación como el resultado son UPDATE condicionados a que la fila
+siga "enviando" con el lease que este worker escribió. Si venció y otro
+worker la tomó, o el código se usó o reemplazó, no se envía ni se pisa.
+
+Estados: pendiente -> enviando -> enviado | pendiente (reintento) | fallido.
+Los códigos usados o expirados antes de enviarse quedan como "descartado".
+"""
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from models import User, PasswordResetCode
+from email_service import send_password_reset_email, close_session
+
+
+EMAIL_WORKER_ENABLED = os.getenv("EMAIL_WORKER_ENABLED", "1") == "1"
+EMAIL_QUEUE_INTERVALO = float(os.getenv("EMAIL_QUEUE_INTERVALO", "5"))
+EMAIL_QUEUE_LOTE = int(os.getenv("EMAIL_QUEUE_LOTE", "20"))
+EMAIL_MAX_INTENTOS = int(os.getenv("EMAIL_MAX_INTENTOS", "5"))
+EMAIL_BACKOFF_BASE = float(os.getenv("EMAIL_BACKOFF_BASE", "5"))
+EMAIL_BACKOFF_MAX = float(os.getenv("EMAIL_BACKOFF_MAX", "300"))
+
+# Tiempo que una fila queda reservada mientras se envía; debe rebasar
+# RESEND_CONNECT_TIMEOUT + RESEND_READ_TIMEOUT (un envío).
+EMAIL_LEASE_SEGUNDOS = int(os.getenv("EMAIL_LEASE_SEGUNDOS", "60"))
+
+ESTADOS_EN_COLA = ("pendiente", "enviando")
+
+_despertar = threading.Event()
+_detener = threading.Event()
+_hilo: threading.Thread | None = None
+
+
+def _backoff(intentos: int) -> timedelta:
+    segundos = min(EMAIL_BACKOFF_BASE * (2 ** (intentos - 1)), EMAIL_BACKOFF_MAX)
+    return timedelta(seconds=segundos)
+
+
+def _lease() -> datetime:
+    # Sin microsegundos: DATETIME de MySQL los redondea al guardar y el
+    # lease se compara por igualdad.
+    return (datetime.utcnow() + timedelta(seconds=EMAIL_LEASE_SEGUNDOS)).replace(microsecond=0)
+
+
+def _reservar(db: Session, lote: int):
+    """
+    Toma hasta `lote` filas vencidas y las marca como "enviando".
+    SKIP LOCKED evita que dos workers reserven la misma fila.
+    """
+    ahora = datetime.utcnow()
+
+    filas = (
+        db.query(PasswordResetCode, User.email)
+        .join(User, User.id == PasswordResetCode.user_id)
+        .filter(
+            PasswordResetCode.email_status.in_(ESTADOS_EN_COLA),
+            PasswordResetCode.email_next_attempt_at <= ahora,
+        )
+        .order_by(PasswordResetCode.email_next_attempt_at.asc())
+        .limit(lote)
+        .with_for_update(skip_locked=True, of=PasswordResetCode)
+        .all()
+    )
+
+    reservadas = []
+    lease = _lease()
+
+    for reset_code, email in filas:
+        if reset_code.used or reset_code.expires_at < ahora or not reset_code.pending_code:
+            reset_code.email_status = "descartado"
+            reset_code.pending_code = None
+            continue
+
+        reset_code.email_status = "enviando"
+        reset_code.email_next_attempt_at = lease
+        reservadas.append((reset_code.id, email, reset_code.pending_code, lease))
+
+    db.commit()
+    return reservadas
+
+
+def _con_lease(db: Session, reset_code_id: int, lease: datetime):
+    return db.query(PasswordResetCode).filter(
+        PasswordResetCode.id == reset_code_id,
+        PasswordResetCode.email_status == "enviando",
+        PasswordResetCode.email_next_attempt_at == lease,
+    )
+
+
+def _renovar_lease(db: Session, reset_code_id: int, lease: datetime) -> datetime | None:
+    """
+    Extiende el lease antes de enviar. Regresa el nuevo, o None si la fila
+    ya no es de este worker o el código se usó o reemplazó mientras tanto.
+    """
+    nuevo = _lease()
+
+    actualizadas = (
+        _con_lease(db, reset_code_id, lease)
+        .filter(PasswordResetCode.used == 0)
+        .update({"email_next_attempt_at": nuevo}, synchronize_session=False)
+    )
+    db.commit()
+
+    return nuevo if actualizadas == 1 else None
+
+
+def _registrar_resultado(db: Session, reset_code_id: int, lease: datetime, error: str | None) -> bool:
+    """
+    Guarda el resultado solo si la fila sigue con el lease de este worker.
+    Regresa si se actualizó.
+    """
+    intentos = (
+        db.query(PasswordResetCode.email_attempts)
+        .filter(PasswordResetCode.id == reset_code_id)
+        .scalar()
+        or 0
+    ) + 1
+
+    ahora = datetime.utcnow()
+
+    if error is None:
+        valores = {
+            "email_status": "enviado",
+            "email_sent_at": ahora,
+            "email_last_error": None,
+            "pending_code": None,
+        }
+    elif intentos >= EMAIL_MAX_INTENTOS:
+        valores = {
+            "email_status": "fallido",
+            "email_last_error": error,
+            "pending_code": None,
+        }
+    else:
+        valores = {
+            "email_status": "pendiente",
+            "email_last_error": error,
+            "email_next_attempt_at": ahora + _backoff(intentos),
+        }
+
+    actualizadas = (
+        _con_lease(db, reset_code_id, lease)
+        .update({**valores, "email_attempts": intentos}, synchronize_session=False)
+    )
+    db.commit()
+
+    return actualizadas == 1
+
+
+def procesar_pendientes(db: Session, lote: int = EMAIL_QUEUE_LOTE) -> int:
+    """
+    Envía un lote de correos pendientes. Regresa cuántos se intentaron.
+    """
+    reservadas = _reservar(db, lote)
+
+    for reset_code_id, email, code, lease in reservadas:
+        lease = _renovar_lease(db, reset_code_id, lease)
+        if lease is None:
+            continue
+
+        try:
+            send_password_reset_email(email, code)
+            error = None
+        except Exception as e:
+            print("Error enviando correo de recuperación:", e)
+            error = str(e)[:1000]
+
+        _registrar_resultado(db, reset_code_id, lease, error)
+
+    return len(reservadas)
+
+
+def despertar():
+    """Avisa al worker que hay un correo nuevo, sin esperar el intervalo."""
+    _despertar.set()
+
+
+def _ciclo():
+    while not _detener.is_set():
+        procesados = 0
+        db = SessionLocal()
+        try:
+            procesados = procesar_pendientes(db)
+        except Exception:
+            print("Error en la cola de correos:")
+            traceback.print_exc()
+            db.rollback()
+        finally:
+            db.close()
+
+        # Si el lote vino lleno probablemente hay más; si no, esperar.
+        if procesados < EMAIL_QUEUE_LOTE:
+            _despertar.wait(EMAIL_QUEUE_INTERVALO)
+            _despertar.clear()
+
+
+def iniciar():
+    global _hilo
+
+    if not EMAIL_WORKER_ENABLED or (_hilo and _hilo.is_alive()):
+        return
+
+    _detener.clear()
+    _hilo = threading.Thread(target=_ciclo, name="email-queue", daemon=True)
+    _hilo.start()
+
+
+def detener(timeout: float = 5.0):
+    global _hilo
+
+    _detener.set()
+    _despertar.set()
+
+    if _hilo:
+        _hilo.join(timeout)
+        _hilo = None
+
+    close_session()
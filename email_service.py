@@ -1,94 +1,144 @@
 # email_service.py
+import asyncio
 import os
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from email_templates import render
 
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 RESEND_FROM = os.getenv("RESEND_FROM", "ETIAAM <onboarding@resend.dev>")
-RESEND_API_URL = "https://api.resend.com/emails"
+# Se puede apuntar a un servidor HTTP local para pruebas de entrega.
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com/emails")
 
+# Conexiones keep-alive a Resend que se mantienen abiertas para reutilizar.
+RESEND_POOL_SIZE = int(os.getenv("RESEND_POOL_SIZE", "10"))
+RESEND_CONNECT_TIMEOUT = float(os.getenv("RESEND_CONNECT_TIMEOUT", "3"))
+RESEND_READ_TIMEOUT = float(os.getenv("RESEND_READ_TIMEOUT", os.getenv("RESEND_TIMEOUT", "10")))
 
-def send_password_reset_email(to_email: str, code: str) -> None:
-    """
-    Envía un código de recuperación de contraseña por correo electrónico
-    usando Resend API por HTTPS.
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
 
-    Ya no se usa SMTP, porque Render puede bloquear puertos SMTP como 587.
-    """
 
+def _get_session() -> requests.Session:
+    """
+    Sesión HTTP compartida por el proceso. Reutiliza la conexión TLS con
+    Resend entre envíos en lugar de abrir una nueva por correo.
+    requests.Session es segura para usarse desde varios hilos con el
+    pool de urllib3.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=RESEND_POOL_SIZE,
+                    pool_block=True,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Authorization": f"Bearer {RESEND_API_KEY}",
+                    "Content-Type": "application/json",
+                })
+                _session = session
+
+    return _session
+
+
+def close_session() -> None:
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def send_email(payload: dict) -> None:
+    """
+    Envía un correo con la API de Resend usando la sesión compartida.
+    """
     if not RESEND_API_KEY:
         raise RuntimeError(
             "Falta la variable de entorno RESEND_API_KEY."
         )
 
-    subject = "Código de recuperación ETIAAM"
-
-    html_body = f"""
-    <html>
-      <body style="font-family: Arial, sans-serif; color: #222;">
-        <div style="max-width: 560px; margin: 0 auto; padding: 24px; border: 1px solid #ddd; border-radius: 12px;">
-          <h2 style="color: #1A237E;">Recuperación de contraseña ETIAAM</h2>
-
-          <p>Hola,</p>
-
-          <p>Recibimos una solicitud para restablecer tu contraseña en ETIAAM.</p>
-
-          <p>Tu código de recuperación es:</p>
+    response = _get_session().post(
+        RESEND_API_URL,
+        json=payload,
+        timeout=(RESEND_CONNECT_TIMEOUT, RESEND_READ_TIMEOUT),
+    )
 
-          <div style="font-size: 28px; font-weight: bold; letter-spacing: 4px; color: #00796B; margin: 24px 0;">
-            {code}
-          </div>
+    if response.status_code not in (200, 201, 202):
+        raise RuntimeError(
+            f"Error Resend {response.status_code}: {response.text}"
+        )
 
-          <p>Este código expirará en <strong>10 minutos</strong>.</p>
 
-          <p>Si no solicitaste este cambio, puedes ignorar este mensaje.</p>
+def send_password_reset_email(
+    to_email: str,
+    code: str,
+    minutos: int = 10,
+    idioma: str | None = None,
+) -> None:
+    """
+    Envía un código de recuperación de contraseña por correo electrónico
+    usando Resend API por HTTPS.
 
-          <br>
+    Ya no se usa SMTP, porque Render puede bloquear puertos SMTP como 587.
+    El contenido sale de la plantilla "password_reset" (email_templates.py).
 
-          <p style="color: #555;">Atentamente,<br>Equipo ETIAAM</p>
-        </div>
-      </body>
-    </html>
+    Es bloqueante: los endpoints no la llaman directamente, sino a través
+    de la cola de email_queue.py.
     """
 
-    text_body = f"""
-Hola,
+    if not RESEND_API_KEY:
+        raise RuntimeError(
+            "Falta la variable de entorno RESEND_API_KEY."
+        )
 
-Recibimos una solicitud para restablecer tu contraseña en ETIAAM.
+    correo = render("password_reset", idioma, code=code, minutos=minutos)
 
-Tu código de recuperación es:
+    send_email({
+        "from": RESEND_FROM,
+        "to": [to_email],
+        **correo,
+    })
 
-{code}
 
-Este código expirará en 10 minutos.
+async def send_password_reset_email_async(to_email: str, code: str) -> None:
+    """
+    Variante para código async: corre el envío en un hilo para no
+    bloquear el event loop, compartiendo el mismo pool de conexiones.
+    """
+    await asyncio.to_thread(send_password_reset_email, to_email, code)
 
-Si no solicitaste este cambio, puedes ignorar este mensaje.
 
-Atentamente,
-Equipo ETIAAM
-"""
+def send_appointment_reminder_email(
+    to_email: str,
+    variables: dict,
+    idioma: str | None = None,
+) -> None:
+    """
+    Envía un recordatorio de cita (plantilla "recordatorio_cita").
+    Lo usa el notificador "email" de reminders.py.
+    """
+    if not RESEND_API_KEY:
+        raise RuntimeError(
+            "Falta la variable de entorno RESEND_API_KEY."
+        )
+
+    correo = render("recordatorio_cita", idioma, **variables)
 
-    payload = {
+    send_email({
         "from": RESEND_FROM,
         "to": [to_email],
-        "subject": subject,
-        "html": html_body,
-        "text": text_body,
-    }
-
-    headers = {
-        "Authorization": f"Bearer {RESEND_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    response = requests.post(
-        RESEND_API_URL,
-        json=payload,
-        headers=headers,
-        timeout=20,
-    )
-
-    if response.status_code not in (200, 201, 202):
-        raise RuntimeError(
-            f"Error Resend {response.status_code}: {response.text}"
-        )
\ No newline at end of file
+        **correo,
+    })
@@ -0,0 +1,135 @@
+# email_templates.py
+"""
+Plantillas de correo compiladas una sola vez y cacheadas por (nombre, idioma).
+
+Estructura en disco:
+    templates/email/<idioma>/<nombre>.subject.txt
+    templates/email/<idioma>/<nombre>.html
+    templates/email/<idioma>/<nombre>.txt
+
+Las variables usan la sintaxis de string.Template ($code, ${minutos}).
+Al cargar, cada parte se parte una sola vez en segmentos
+[literal, variable, literal, ...], así cada envío es solo un join.
+En la parte HTML los valores se escapan; en asunto y texto van tal cual.
+Si una plantilla no existe en el idioma pedido se usa EMAIL_LOCALE.
+"""
+import html
+import os
+import threading
+from pathlib import Path
+from string import Template
+
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates" / "email"
+EMAIL_LOCALE = os.getenv("EMAIL_LOCALE", "es")
+
+PARTES = {
+    "subject": ".subject.txt",
+    "html": ".html",
+    "text": ".txt",
+}
+
+# Parte compilada: tupla (literal, variable, literal, variable, ..., literal).
+Compilada = tuple[str, ...]
+
+# (nombre, idioma) -> {"subject": Compilada, "html": Compilada, "text": Compilada}
+_cache: dict[tuple[str, str], dict[str, Compilada]] = {}
+_lock = threading.Lock()
+
+
+def _segmentar(texto: str) -> Compilada:
+    """
+    Separa una plantilla $variable en literales y nombres de variable.
+    Las posiciones pares son texto fijo y las impares nombres.
+    """
+    segmentos = []
+    literal = []
+    inicio = 0
+
+    for m in Template.pattern.finditer(texto):
+        literal.append(texto[inicio:m.start()])
+        inicio = m.end()
+
+        if m.group("escaped") is not None:
+            literal.append("$")
+        elif m.group("named") or m.group("braced"):
+            segmentos.append("".join(literal))
+            segmentos.append(m.group("named") or m.group("braced"))
+            literal = []
+        else:
+            raise ValueError(f"Marcador inválido en plantilla de correo: {m.group(0)!r}")
+
+    literal.append(texto[inicio:])
+    segmentos.append("".join(literal))
+    return tuple(segmentos)
+
+
+def _sustituir(segmentos: Compilada, variables: dict) -> str:
+    partes = list(segmentos)
+    for i in range(1, len(partes), 2):
+        partes[i] = variables[partes[i]]
+    return "".join(partes)
+
+
+def _compilar(nombre: str, idioma: str) -> dict[str, Compilada] | None:
+    carpeta = TEMPLATES_DIR / idioma
+    partes = {}
+
+    for parte, extension in PARTES.items():
+        archivo = carpeta / f"{nombre}{extension}"
+        if not archivo.exists():
+            return None
+        contenido = archivo.read_text(encoding="utf-8")
+        partes[parte] = _segmentar(contenido.strip() if parte == "subject" else contenido)
+
+    return partes
+
+
+def cargar_plantillas() -> int:
+    """
+    Compila todas las plantillas del directorio. Se llama al arrancar la app;
+    regresa cuántas quedaron en caché.
+    """
+    with _lock:
+        for carpeta in sorted(TEMPLATES_DIR.iterdir()) if TEMPLATES_DIR.exists() else []:
+            if not carpeta.is_dir():
+                continue
+            for archivo in carpeta.glob("*.subject.txt"):
+                nombre = archivo.name[: -len(PARTES["subject"])]
+                partes = _compilar(nombre, carpeta.name)
+                if partes:
+                    _cache[(nombre, carpeta.name)] = partes
+
+        return len(_cache)
+
+
+def obtener_plantilla(nombre: str, idioma: str | None = None) -> dict[str, Compilada]:
+    idioma = idioma or EMAIL_LOCALE
+
+    for clave in ((nombre, idioma), (nombre, EMAIL_LOCALE)):
+        partes = _cache.get(clave)
+        if partes is None:
+            partes = _compilar(*clave)
+            if partes is not None:
+                with _lock:
+                    _cache[clave] = partes
+        if partes is not None:
+            return partes
+
+    raise KeyError(f"No existe la plantilla de correo '{nombre}' ({idioma})")
+
+
+def render(nombre: str, idioma: str | None = None, /, **variables) -> dict[str, str]:
+    """
+    Regresa {"subject", "html", "text"} listos para enviar.
+    Lanza KeyError si falta una variable usada por la plantilla.
+    """
+    partes = obtener_plantilla(nombre, idioma)
+    texto = {clave: str(valor) for clave, valor in variables.items()}
+    escapadas = {clave: html.escape(valor) for clave, valor in texto.items()}
+
+    return {
+        "subject": _sustituir(partes["subject"], texto),
+        "html": _sustituir(partes["html"], escapadas),
+        "text": _sustituir(partes["text"], texto),
+    }
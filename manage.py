@@ -0,0 +1,166 @@
+# manage.py
+"""
+Comandos de mantenimiento del backend ETIAAM.
+
+Uso (después de `alembic upgrade head`):
+    python manage.py reconstruir-resumen [--user-id ID]
+    python manage.py calcular-scores
+    python manage.py calibrar-argon2 [--objetivo-ms 250]
+    python manage.py enviar-correos
+    python manage.py programar-recordatorios
+    python manage.py enviar-recordatorios
+    python manage.py indexar-pacientes
+"""
+import argparse
+
+
+def reconstruir_resumen(args):
+    from db import SessionLocal
+    from routes_evaluations import reconstruir_resumenes
+
+    db = SessionLocal()
+    try:
+        total = reconstruir_resumenes(db, user_id=args.user_id)
+    finally:
+        db.close()
+
+    print(f"evaluation_summary reconstruida: {total} filas")
+
+
+def calcular_scores(args):
+    from db import SessionLocal
+    from routes_evaluations import calcular_scores_pendientes
+
+    db = SessionLocal()
+    try:
+        total = calcular_scores_pendientes(db)
+    finally:
+        db.close()
+
+    print(f"Evaluaciones calificadas: {total}")
+
+
+def calibrar_argon2(args):
+    from password_hashing import ARGON2_PROFILE, ARGON2_PROFILES, calibrar
+
+    resultado = calibrar(args.objetivo_ms, repeticiones=args.repeticiones)
+
+    print(f"Perfil actual: {ARGON2_PROFILE}")
+    print(f"Objetivo: {args.objetivo_ms} ms por hash")
+    for nombre, ms in resultado["mediciones_ms"].items():
+        print(f"  {nombre:<9} {ms:>8} ms  {ARGON2_PROFILES[nombre]}")
+
+    print(f"Perfil sugerido: ARGON2_PROFILE={resultado['perfil_sugerido']}")
+    print(
+        f"Ajuste fino: ARGON2_TIME_COST={resultado['time_cost_ajustado']} "
+        f"(~{resultado['ms_estimado_ajustado']} ms)"
+    )
+
+
+def enviar_correos(args):
+    from db import SessionLocal
+    from email_queue import procesar_pendientes
+
+    db = SessionLocal()
+    try:
+        total = procesar_pendientes(db)
+    finally:
+        db.close()
+
+    print(f"Correos de recuperación procesados: {total}")
+
+
+def programar_recordatorios(args):
+    from db import SessionLocal
+    from reminders import programar_todas
+
+    db = SessionLocal()
+    try:
+        total = programar_todas(db)
+    finally:
+        db.close()
+
+    print(f"Citas programadas en reminder_queue: {total}")
+
+
+def enviar_recordatorios(args):
+    from db import SessionLocal
+    from reminders import procesar_recordatorios
+
+    db = SessionLocal()
+    try:
+        total = procesar_recordatorios(db)
+    finally:
+        db.close()
+
+    print(f"Recordatorios procesados: {total}")
+
+
+def indexar_pacientes(args):
+    from db import SessionLocal
+    from patient_search import indexar_todos
+
+    db = SessionLocal()
+    try:
+        total = indexar_todos(db)
+    finally:
+        db.close()
+
+    print(f"Pacientes indexados para búsqueda: {total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento ETIAAM")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    resumen = subparsers.add_parser(
+        "reconstruir-resumen",
+        help="Reconstruye evaluation_summary desde la tabla evaluations",
+    )
+    resumen.add_argument("--user-id", type=int, default=None)
+    resumen.set_defaults(func=reconstruir_resumen)
+
+    scores = subparsers.add_parser(
+        "calcular-scores",
+        help="Precalcula score, nivel y semáforo de evaluaciones antiguas",
+    )
+    scores.set_defaults(func=calcular_scores)
+
+    calibracion = subparsers.add_parser(
+        "calibrar-argon2",
+        help="Mide el costo de Argon2 en este equipo y sugiere un perfil",
+    )
+    calibracion.add_argument("--objetivo-ms", type=float, default=250.0)
+    calibracion.add_argument("--repeticiones", type=int, default=3)
+    calibracion.set_defaults(func=calibrar_argon2)
+
+    correos = subparsers.add_parser(
+        "enviar-correos",
+        help="Procesa una vez la cola de correos de recuperación pendientes",
+    )
+    correos.set_defaults(func=enviar_correos)
+
+    programar = subparsers.add_parser(
+        "programar-recordatorios",
+        help="Llena reminder_queue con las citas programadas existentes",
+    )
+    programar.set_defaults(func=programar_recordatorios)
+
+    recordatorios = subparsers.add_parser(
+        "enviar-recordatorios",
+        help="Procesa una vez los recordatorios de citas vencidos",
+    )
+    recordatorios.set_defaults(func=enviar_recordatorios)
+
+    busqueda = subparsers.add_parser(
+        "indexar-pacientes",
+        help="Reconstruye patient_search_terms para la búsqueda de pacientes",
+    )
+    busqueda.set_defaults(func=indexar_pacientes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
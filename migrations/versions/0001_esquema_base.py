@@ -0,0 +1,201 @@
+"""Esquema base (tablas creadas antes con Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tablas_existentes():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    # Las bases existentes ya tienen estas tablas (create_all en startup);
+    # solo se crean las que falten.
+    existentes = _tablas_existentes()
+
+    if "users" not in existentes:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(120), nullable=False, unique=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("full_name", sa.String(120)),
+            sa.Column("user_type", sa.String(50)),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("country_code", sa.String(5), nullable=True),
+            sa.Column("phone_national", sa.String(10), nullable=True),
+            sa.Column("phone_number", sa.String(20), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_phone_number", "users", ["phone_number"], unique=True)
+
+    if "consents" not in existentes:
+        op.create_table(
+            "consents",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("version", sa.String(50)),
+            sa.Column("text_hash", sa.String(255)),
+            sa.Column("ip_address", sa.String(64)),
+            sa.Column("user_agent", sa.Text()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_consents_id", "consents", ["id"])
+
+    if "password_reset_codes" not in existentes:
+        op.create_table(
+            "password_reset_codes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("code_hash", sa.String(255), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("used", sa.Integer()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_password_reset_codes_id", "password_reset_codes", ["id"])
+
+    if "profiles" not in existentes:
+        op.create_table(
+            "profiles",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+            sa.Column("nombre", sa.String(100), nullable=True),
+            sa.Column("apellido", sa.String(100), nullable=True),
+            sa.Column("edad", sa.Integer(), nullable=True),
+            sa.Column("genero", sa.String(20), nullable=True),
+            sa.Column("telefono", sa.String(20), nullable=True),
+            sa.Column("direccion", sa.String(255), nullable=True),
+            sa.Column("especialidad", sa.String(100), nullable=True),
+            sa.Column("cedula_profesional", sa.String(50), nullable=True),
+            sa.Column("unidad_medica", sa.String(150), nullable=True),
+            sa.Column("fecha_nacimiento", sa.String(50), nullable=True),
+            sa.Column("nss", sa.String(50), nullable=True),
+        )
+        op.create_index("ix_profiles_id", "profiles", ["id"])
+
+    if "evaluations" not in existentes:
+        op.create_table(
+            "evaluations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("evaluador_id", sa.Integer(), nullable=True),
+            sa.Column("test_type", sa.String(100)),
+            sa.Column("score", sa.Integer()),
+            sa.Column("respuestas_json", sa.Text(), nullable=True),
+            sa.Column("observaciones", sa.Text(), nullable=True),
+            sa.Column("fecha_aplicacion", sa.DateTime()),
+        )
+        op.create_index("ix_evaluations_id", "evaluations", ["id"])
+
+    if "competencias_profesionales" not in existentes:
+        op.create_table(
+            "competencias_profesionales",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("respuestas", sa.Text()),
+            sa.Column("f1_promedio", sa.Float()),
+            sa.Column("f2_promedio", sa.Float()),
+            sa.Column("f3_promedio", sa.Float()),
+            sa.Column("f4_promedio", sa.Float()),
+            sa.Column("puntaje_total", sa.Float()),
+            sa.Column("fecha_aplicacion", sa.DateTime()),
+        )
+        op.create_index("ix_competencias_profesionales_id", "competencias_profesionales", ["id"])
+
+    if "patient_medications" not in existentes:
+        op.create_table(
+            "patient_medications",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("nombre", sa.String(150), nullable=False),
+            sa.Column("presentacion", sa.String(50), nullable=False),
+            sa.Column("cantidad", sa.String(20), nullable=False),
+            sa.Column("unidad", sa.String(50), nullable=False),
+            sa.Column("frecuencia_texto", sa.String(80), nullable=False),
+            sa.Column("frecuencia_horas", sa.Integer(), nullable=True),
+            sa.Column("hora_inicio", sa.String(10), nullable=False),
+            sa.Column("fecha_inicio", sa.String(20), nullable=True),
+            sa.Column("fecha_fin", sa.String(20), nullable=True),
+            sa.Column("duracion_texto", sa.String(120), nullable=True),
+            sa.Column("indicaciones", sa.Text(), nullable=True),
+            sa.Column("activo", sa.Integer()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_patient_medications_id", "patient_medications", ["id"])
+        op.create_index("ix_patient_medications_user_id", "patient_medications", ["user_id"])
+
+    if "patient_appointments" not in existentes:
+        op.create_table(
+            "patient_appointments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("paciente_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("profesional_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("unidad_medica", sa.String(150), nullable=True),
+            sa.Column("fecha_cita", sa.String(20), nullable=False),
+            sa.Column("hora_cita", sa.String(10), nullable=False),
+            sa.Column("motivo", sa.String(150), nullable=False),
+            sa.Column("notas", sa.Text(), nullable=True),
+            sa.Column("recordatorios_json", sa.Text(), nullable=True),
+            sa.Column("estado", sa.String(30)),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_patient_appointments_id", "patient_appointments", ["id"])
+        op.create_index("ix_patient_appointments_paciente_id", "patient_appointments", ["paciente_id"])
+        op.create_index("ix_patient_appointments_profesional_id", "patient_appointments", ["profesional_id"])
+
+    if "plan_trabajo" not in existentes:
+        op.create_table(
+            "plan_trabajo",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("paciente_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("profesional_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("fecha_creacion", sa.DateTime()),
+            sa.Column("objetivo_principal", sa.Text()),
+            sa.Column("plan_ejecucion", sa.Text()),
+            sa.Column("recursos_necesarios", sa.Text()),
+            sa.Column("emociones_asociadas", sa.Text()),
+            sa.Column("estado", sa.String(20)),
+        )
+        op.create_index("ix_plan_trabajo_id", "plan_trabajo", ["id"])
+
+    if "objetivos_plan" not in existentes:
+        op.create_table(
+            "objetivos_plan",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plan_id", sa.Integer(), sa.ForeignKey("plan_trabajo.id")),
+            sa.Column("descripcion", sa.String(255)),
+            sa.Column("actividad", sa.String(255)),
+            sa.Column("recursos", sa.String(255)),
+            sa.Column("seguimiento", sa.Text()),
+            sa.Column("fecha_revision", sa.String(20), nullable=True),
+            sa.Column("cumplimiento", sa.Integer()),
+        )
+        op.create_index("ix_objetivos_plan_id", "objetivos_plan", ["id"])
+
+
+def downgrade():
+    for tabla in (
+        "objetivos_plan",
+        "plan_trabajo",
+        "patient_appointments",
+        "patient_medications",
+        "competencias_profesionales",
+        "evaluations",
+        "profiles",
+        "password_reset_codes",
+        "consents",
+        "users",
+    ):
+        op.drop_table(tabla)
@@ -0,0 +1,63 @@
+"""Calificación precalculada de evaluaciones y tabla evaluation_summary
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Después de aplicarla, llenar los datos históricos con:
+    python manage.py calcular-scores
+    python manage.py reconstruir-resumen
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+COLUMNAS_EVALUACION = [
+    sa.Column("score_calculado", sa.Integer(), nullable=True),
+    sa.Column("score_resumen", sa.Integer(), nullable=True),
+    sa.Column("nivel", sa.String(50), nullable=True),
+    sa.Column("semaforo", sa.String(20), nullable=True),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existentes = {c["name"] for c in inspector.get_columns("evaluations")}
+
+    for columna in COLUMNAS_EVALUACION:
+        if columna.name not in existentes:
+            op.add_column("evaluations", columna)
+
+    if "evaluation_summary" not in inspector.get_table_names():
+        op.create_table(
+            "evaluation_summary",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("test_type", sa.String(100), nullable=False),
+            sa.Column("evaluation_id", sa.Integer(), sa.ForeignKey("evaluations.id"), nullable=False),
+            sa.Column("evaluador_id", sa.Integer(), nullable=True),
+            sa.Column("score", sa.Integer(), nullable=True),
+            sa.Column("score_resumen", sa.Integer(), nullable=True),
+            sa.Column("nivel", sa.String(50), nullable=True),
+            sa.Column("semaforo", sa.String(20), nullable=True),
+            sa.Column("observaciones", sa.Text(), nullable=True),
+            sa.Column("respuestas_json", sa.Text(), nullable=True),
+            sa.Column("fecha_aplicacion", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.UniqueConstraint("user_id", "test_type", name="uq_evaluation_summary_user_test"),
+        )
+        op.create_index("ix_evaluation_summary_id", "evaluation_summary", ["id"])
+        op.create_index("ix_evaluation_summary_user_id", "evaluation_summary", ["user_id"])
+
+
+def downgrade():
+    op.drop_table("evaluation_summary")
+
+    for columna in COLUMNAS_EVALUACION:
+        op.drop_column("evaluations", columna.name)
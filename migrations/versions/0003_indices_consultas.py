@@ -0,0 +1,52 @@
+"""Índices compuestos para los filtros y ordenamientos de los routers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+INDICES = [
+    ("ix_evaluations_user_test_fecha", "evaluations", ["user_id", "test_type", "fecha_aplicacion"]),
+    ("ix_evaluations_user_fecha", "evaluations", ["user_id", "fecha_aplicacion"]),
+    ("ix_password_reset_codes_user_used", "password_reset_codes", ["user_id", "used"]),
+    ("ix_plan_trabajo_paciente_estado", "plan_trabajo", ["paciente_id", "estado"]),
+    ("ix_plan_trabajo_paciente_fecha", "plan_trabajo", ["paciente_id", "fecha_creacion"]),
+    ("ix_objetivos_plan_plan_id", "objetivos_plan", ["plan_id"]),
+    ("ix_profiles_unidad_medica", "profiles", ["unidad_medica"]),
+    ("ix_users_user_type", "users", ["user_type"]),
+    ("ix_competencias_user_fecha", "competencias_profesionales", ["user_id", "fecha_aplicacion"]),
+    ("ix_patient_medications_user_activo", "patient_medications", ["user_id", "activo"]),
+    (
+        "ix_patient_appointments_paciente_fecha_estado",
+        "patient_appointments",
+        ["paciente_id", "fecha_cita", "estado"],
+    ),
+    (
+        "ix_patient_appointments_prof_fecha_estado",
+        "patient_appointments",
+        ["profesional_id", "fecha_cita", "estado"],
+    ),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for nombre, tabla, columnas in INDICES:
+        existentes = {i["name"] for i in inspector.get_indexes(tabla)}
+        if nombre not in existentes:
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
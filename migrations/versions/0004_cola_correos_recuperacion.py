@@ -0,0 +1,52 @@
+"""Estado de entrega del correo en password_reset_codes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Los códigos existentes quedan con email_status NULL y no entran a la cola.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+COLUMNAS_ENVIO = [
+    sa.Column("email_status", sa.String(20), nullable=True),
+    sa.Column("email_attempts", sa.Integer(), nullable=True),
+    sa.Column("email_last_error", sa.Text(), nullable=True),
+    sa.Column("email_next_attempt_at", sa.DateTime(), nullable=True),
+    sa.Column("email_sent_at", sa.DateTime(), nullable=True),
+    sa.Column("pending_code", sa.String(16), nullable=True),
+]
+
+INDICE_ENVIO = "ix_password_reset_codes_envio"
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existentes = {c["name"] for c in inspector.get_columns("password_reset_codes")}
+
+    for columna in COLUMNAS_ENVIO:
+        if columna.name not in existentes:
+            op.add_column("password_reset_codes", columna)
+
+    indices = {i["name"] for i in inspector.get_indexes("password_reset_codes")}
+    if INDICE_ENVIO not in indices:
+        op.create_index(
+            INDICE_ENVIO,
+            "password_reset_codes",
+            ["email_status", "email_next_attempt_at"],
+        )
+
+
+def downgrade():
+    op.drop_index(INDICE_ENVIO, table_name="password_reset_codes")
+
+    for columna in COLUMNAS_ENVIO:
+        op.drop_column("password_reset_codes", columna.name)
@@ -0,0 +1,47 @@
+"""Tabla reminder_queue para recordatorios de citas
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+Después de aplicarla, programar las citas existentes con:
+    python manage.py programar-recordatorios
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if "reminder_queue" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "reminder_queue",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("appointment_id", sa.Integer(), sa.ForeignKey("patient_appointments.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("tipo", sa.String(20), nullable=False),
+        sa.Column("cita_at", sa.DateTime(), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("appointment_id", "tipo", name="uq_reminder_queue_cita_tipo"),
+    )
+    op.create_index("ix_reminder_queue_id", "reminder_queue", ["id"])
+    op.create_index("ix_reminder_queue_user_id", "reminder_queue", ["user_id"])
+    op.create_index("ix_reminder_queue_status_due", "reminder_queue", ["status", "due_at"])
+
+
+def downgrade():
+    op.drop_table("reminder_queue")
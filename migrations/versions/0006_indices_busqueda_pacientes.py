@@ -0,0 +1,35 @@
+"""Índice para el listado paginado de pacientes por unidad médica
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+# La búsqueda `q` del listado usa patient_search_terms (0007), no índices
+# sobre las columnas de users/profiles.
+INDICES = [
+    ("ix_profiles_unidad_user", "profiles", ["unidad_medica", "user_id"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for nombre, tabla, columnas in INDICES:
+        existentes = {i["name"] for i in inspector.get_indexes(tabla)}
+        if nombre not in existentes:
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
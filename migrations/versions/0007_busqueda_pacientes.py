@@ -0,0 +1,37 @@
+"""Tabla patient_search_terms para la búsqueda de pacientes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Después de aplicarla, indexar los pacientes existentes con:
+    python manage.py indexar-pacientes
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if "patient_search_terms" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "patient_search_terms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("termino", sa.String(64), nullable=False),
+        sa.UniqueConstraint("user_id", "termino", name="uq_patient_search_user_termino"),
+    )
+    op.create_index("ix_patient_search_termino_user", "patient_search_terms", ["termino", "user_id"])
+
+
+def downgrade():
+    op.drop_table("patient_search_terms")
@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, inspect
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, UniqueConstraint, inspect
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -20,7 +20,7 @@ class User(Base):
 
     # Datos generales
     full_name = Column(String(120))
-    user_type = Column(String(50))
+    user_type = Column(String(50), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # ============================================================
@@ -72,6 +72,10 @@ class Consent(Base):
 # ================================================================
 class PasswordResetCode(Base):
     __tablename__ = "password_reset_codes"
+    __table_args__ = (
+        Index("ix_password_reset_codes_user_used", "user_id", "used"),
+        Index("ix_password_reset_codes_envio", "email_status", "email_next_attempt_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -87,11 +91,27 @@ class PasswordResetCode(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Entrega del correo (email_queue.py):
+    # pendiente -> enviado | fallido. Se reintenta con backoff exponencial.
+    email_status = Column(String(20), default="pendiente")
+    email_attempts = Column(Integer, default=0)
+    email_last_error = Column(Text, nullable=True)
+    email_next_attempt_at = Column(DateTime, nullable=True)
+    email_sent_at = Column(DateTime, nullable=True)
+
+    # Código en claro solo mientras el correo está pendiente;
+    # se borra al enviarlo, al fallar definitivamente o al expirar.
+    pending_code = Column(String(16), nullable=True)
+
 # ================================================================
 # PERFILES (Pacientes y profesionales)
 # ================================================================
 class Profile(Base):
     __tablename__ = "profiles"
+    __table_args__ = (
+        # Listado de pacientes por unidad médica paginado por user_id.
+        Index("ix_profiles_unidad_user", "unidad_medica", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -107,7 +127,7 @@ class Profile(Base):
     # Profesionales
     especialidad = Column(String(100), nullable=True)
     cedula_profesional = Column(String(50), nullable=True)
-    unidad_medica = Column(String(150), nullable=True)
+    unidad_medica = Column(String(150), nullable=True, index=True)
 
     # Pacientes
     fecha_nacimiento = Column(String(50), nullable=True)
@@ -121,6 +141,14 @@ class Profile(Base):
 # ================================================================
 class Evaluation(Base):
     __tablename__ = "evaluations"
+    __table_args__ = (
+        # Historial por instrumento y última evaluación por instrumento.
+        # InnoDB agrega el id al final del índice, así que también cubre
+        # la paginación por (fecha_aplicacion, id).
+        Index("ix_evaluations_user_test_fecha", "user_id", "test_type", "fecha_aplicacion"),
+        # Historial general del paciente.
+        Index("ix_evaluations_user_fecha", "user_id", "fecha_aplicacion"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -131,14 +159,58 @@ class Evaluation(Base):
     observaciones = Column(Text, nullable=True)
     fecha_aplicacion = Column(DateTime, default=datetime.utcnow)
 
+    # Calificación precalculada al guardar (python manage.py calcular-scores
+    # la llena para evaluaciones antiguas). Si semaforo es NULL, la fila aún
+    # no se ha calculado y se califica desde respuestas_json.
+    score_calculado = Column(Integer, nullable=True)
+    score_resumen = Column(Integer, nullable=True)
+    nivel = Column(String(50), nullable=True)
+    semaforo = Column(String(20), nullable=True)
+
     user = relationship("User", back_populates="evaluations")
 
 
+# ================================================================
+# RESUMEN DE EVALUACIONES POR PACIENTE
+# ================================================================
+# Una fila por (user_id, test_type) con la última evaluación ya calificada.
+# Se actualiza en la misma transacción que guarda la evaluación, para que
+# /api/evaluations/resumen-general no tenga que recalcular nada al leer.
+class EvaluationSummary(Base):
+    __tablename__ = "evaluation_summary"
+    __table_args__ = (
+        UniqueConstraint("user_id", "test_type", name="uq_evaluation_summary_user_test"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    test_type = Column(String(100), nullable=False)
+
+    evaluation_id = Column(Integer, ForeignKey("evaluations.id"), nullable=False)
+    evaluador_id = Column(Integer, nullable=True)
+
+    # score: score calculado de la evaluación (score_original en el resumen)
+    # score_resumen: score usado para el semáforo (p. ej. score_comunicacion)
+    score = Column(Integer, nullable=True)
+    score_resumen = Column(Integer, nullable=True)
+    nivel = Column(String(50), nullable=True)
+    semaforo = Column(String(20), nullable=True)
+
+    observaciones = Column(Text, nullable=True)
+    respuestas_json = Column(Text, nullable=True)
+    fecha_aplicacion = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # ================================================================
 # COMPETENCIAS PROFESIONALES
 # ================================================================
 class CompetenciasProfesionales(Base):
     __tablename__ = "competencias_profesionales"
+    __table_args__ = (
+        Index("ix_competencias_user_fecha", "user_id", "fecha_aplicacion"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -164,6 +236,9 @@ class CompetenciasProfesionales(Base):
 # ================================================================
 class PatientMedication(Base):
     __tablename__ = "patient_medications"
+    __table_args__ = (
+        Index("ix_patient_medications_user_activo", "user_id", "activo"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -196,6 +271,11 @@ class PatientMedication(Base):
 # ================================================================
 class PatientAppointment(Base):
     __tablename__ = "patient_appointments"
+    __table_args__ = (
+        # Calendario del paciente y del profesional: citas programadas de un día.
+        Index("ix_patient_appointments_paciente_fecha_estado", "paciente_id", "fecha_cita", "estado"),
+        Index("ix_patient_appointments_prof_fecha_estado", "profesional_id", "fecha_cita", "estado"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -220,11 +300,51 @@ class PatientAppointment(Base):
     profesional = relationship("User", foreign_keys=[profesional_id])
 
 
+# ================================================================
+# COLA DE RECORDATORIOS DE CITAS
+# ================================================================
+class ReminderQueue(Base):
+    """
+    Recordatorios de citas ya calculados (uno por bandera activa de
+    recordatorios_json). Los genera reminders.programar_recordatorios al
+    crear/editar una cita y los envía el worker de reminders.py.
+    Fechas en UTC.
+    """
+    __tablename__ = "reminder_queue"
+    __table_args__ = (
+        UniqueConstraint("appointment_id", "tipo", name="uq_reminder_queue_cita_tipo"),
+        # Sondeo del worker: status + due_at <= ahora.
+        Index("ix_reminder_queue_status_due", "status", "due_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    appointment_id = Column(Integer, ForeignKey("patient_appointments.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    tipo = Column(String(20), nullable=False)  # 3_dias / 1_dia / 4_horas / 1_hora
+    cita_at = Column(DateTime, nullable=False)
+    due_at = Column(DateTime, nullable=False)
+
+    # pendiente -> enviando -> enviado | pendiente (reintento) | fallido
+    # cancelado: la cita se canceló o se reprogramó
+    status = Column(String(20), default="pendiente")
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    appointment = relationship("PatientAppointment")
+
+
 # ================================================================
 # PLAN DE TRABAJO
 # ================================================================
 class PlanTrabajo(Base):
     __tablename__ = "plan_trabajo"
+    __table_args__ = (
+        Index("ix_plan_trabajo_paciente_estado", "paciente_id", "estado"),
+        Index("ix_plan_trabajo_paciente_fecha", "paciente_id", "fecha_creacion"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -254,7 +374,7 @@ class ObjetivoPlan(Base):
     __tablename__ = "objetivos_plan"
 
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("plan_trabajo.id"))
+    plan_id = Column(Integer, ForeignKey("plan_trabajo.id"), index=True)
 
     descripcion = Column(String(255))
     actividad = Column(String(255))
@@ -265,16 +385,27 @@ class ObjetivoPlan(Base):
     cumplimiento = Column(Integer, default=0)
 
     plan = relationship("PlanTrabajo", back_populates="objetivos")
-    __tablename__ = "objetivos_plan"
 
-    id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("plan_trabajo.id"))
 
-    descripcion = Column(String(255))
-    actividad = Column(String(255))
-    recursos = Column(String(255))
-    seguimiento = Column(Text)
+# ================================================================
+# ÍNDICE DE BÚSQUEDA DE PACIENTES
+# ================================================================
+class PatientSearchTerm(Base):
+    """
+    Términos normalizados (minúsculas, sin acentos) de nombre, apellido,
+    full_name, NSS y teléfono de cada paciente; una fila por término.
+    Los mantiene patient_search.indexar_paciente en la misma transacción
+    que registra al paciente o actualiza su perfil.
+    """
+    __tablename__ = "patient_search_terms"
+    __table_args__ = (
+        UniqueConstraint("user_id", "termino", name="uq_patient_search_user_termino"),
+        # Búsqueda por prefijo: termino LIKE 'abc%' recorre un rango del índice.
+        Index("ix_patient_search_termino_user", "termino", "user_id"),
+    )
 
-    cumplimiento = Column(Integer, default=0)
+    id = Column(Integer, primary_key=True)
+    # Sin índice propio: uq_patient_search_user_termino ya empieza con user_id.
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
-    plan = relationship("PlanTrabajo", back_populates="objetivos")
\ No newline at end of file
+    termino = Column(String(64), nullable=False)
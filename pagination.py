@@ -0,0 +1,107 @@
+# pagination.py
+"""
+Paginación por cursor (keyset) para listados que crecen sin límite.
+
+El cursor es opaco para Flutter: codifica los valores de ordenamiento del
+último elemento de la página, p. ej. (fecha_aplicacion, id). La siguiente
+página se pide con WHERE (fecha, id) > / < cursor, así que su costo no
+depende de cuántas páginas haya antes.
+"""
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(*values) -> str:
+    data = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decodifica un cursor con `size` valores. Responde 400 si es inválido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    return values
+
+
+def decode_fecha_id_cursor(cursor: str):
+    """
+    Cursor de (fecha, id), el orden usado por historiales. La fecha puede
+    ser None si la última fila de la página no tenía fecha.
+    """
+    fecha, item_id = decode_cursor(cursor, 2)
+
+    try:
+        return (datetime.fromisoformat(fecha) if fecha is not None else None), int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """
+    Cursor de un solo id, para listados ordenados por id.
+    """
+    (item_id,) = decode_cursor(cursor, 1)
+
+    try:
+        return int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def keyset_filter(fecha_col, id_col, cursor: str, descending: bool):
+    """
+    Condición WHERE para continuar después del cursor en orden (fecha, id).
+
+    Las fechas NULL ordenan como el valor más chico, igual que en MySQL y
+    SQLite: primero en orden ascendente, al final en descendente. Así el
+    ORDER BY sigue siendo el de las columnas y puede usar el índice.
+    """
+    fecha, item_id = decode_fecha_id_cursor(cursor)
+
+    if descending:
+        if fecha is None:
+            return and_(fecha_col.is_(None), id_col < item_id)
+
+        return or_(
+            fecha_col < fecha,
+            and_(fecha_col == fecha, id_col < item_id),
+            fecha_col.is_(None),
+        )
+
+    if fecha is None:
+        return or_(
+            and_(fecha_col.is_(None), id_col > item_id),
+            fecha_col.is_not(None),
+        )
+
+    return or_(fecha_col > fecha, and_(fecha_col == fecha, id_col > item_id))
+
+
+def split_page(rows: list, limit: int, cursor_values):
+    """
+    Recibe limit + 1 filas; regresa (filas de la página, next_cursor).
+    cursor_values(fila) -> tupla con los valores de ordenamiento.
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    return page, encode_cursor(*cursor_values(page[-1]))
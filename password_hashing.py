@@ -0,0 +1,228 @@
+# password_hashing.py
+"""
+Hash y verificación de contraseñas con Argon2 fuera del threadpool de la API.
+
+Argon2 consume CPU y memoria a propósito. Si se ejecuta dentro de los
+handlers síncronos, una ráfaga de logins ocupa todos los hilos de Starlette
+y bloquea al resto de las rutas. Aquí el trabajo se envía a un pool de
+procesos acotado (no depende del GIL) y, si la cola está llena, se rechaza
+de inmediato con HashingBusyError para responder 503.
+
+Los handlers de la API usan las variantes *_async: esperan el resultado
+en el event loop, así que las solicitudes en cola no ocupan hilos del
+threadpool aunque HASH_POOL_SIZE + HASH_QUEUE_MAX rebase su tamaño. Las
+variantes síncronas bloquean el hilo que llama (scripts y benchmarks).
+
+Variables de entorno:
+- ARGON2_PROFILE: perfil de costo (bajo / estandar / alto), ver ARGON2_PROFILES
+- ARGON2_MEMORY_COST (KiB), ARGON2_TIME_COST, ARGON2_PARALLELISM:
+  sobrescriben valores individuales del perfil
+- HASH_POOL_SIZE: procesos del pool (0 = ejecutar en el mismo proceso)
+- HASH_QUEUE_MAX: solicitudes en espera además de las que están en proceso
+- HASH_TIMEOUT: segundos máximos de espera por resultado; al vencerse
+  también se responde 503 (HashingBusyError)
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from passlib.context import CryptContext
+
+
+# Perfiles de costo de Argon2 (memory_cost en KiB).
+# - bajo: mínimo recomendado por OWASP para argon2id
+# - estandar: valores por defecto de passlib (los hashes existentes)
+# - alto: parámetros endurecidos
+ARGON2_PROFILES = {
+    "bajo": {"memory_cost": 19456, "time_cost": 2, "parallelism": 1},
+    "estandar": {"memory_cost": 65536, "time_cost": 3, "parallelism": 4},
+    "alto": {"memory_cost": 102400, "time_cost": 2, "parallelism": 8},
+}
+
+ARGON2_PROFILE = os.getenv("ARGON2_PROFILE", "estandar")
+
+if ARGON2_PROFILE not in ARGON2_PROFILES:
+    raise RuntimeError(
+        f"ARGON2_PROFILE inválido: {ARGON2_PROFILE}. Opciones: {', '.join(ARGON2_PROFILES)}"
+    )
+
+_perfil = ARGON2_PROFILES[ARGON2_PROFILE]
+
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", str(_perfil["memory_cost"])))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", str(_perfil["time_cost"])))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", str(_perfil["parallelism"])))
+
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 1)))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", str(max(HASH_POOL_SIZE, 1) * 4)))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+
+
+def _crear_contexto(memory_cost: int, time_cost: int, parallelism: int) -> CryptContext:
+    # Usa Argon2 en lugar de bcrypt. Los hashes con otros parámetros
+    # se marcan como desactualizados (needs_update / verify_and_update).
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__memory_cost=memory_cost,
+        argon2__rounds=time_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+pwd_ctx = _crear_contexto(ARGON2_MEMORY_COST, ARGON2_TIME_COST, ARGON2_PARALLELISM)
+
+
+class HashingBusyError(Exception):
+    """El pool de hashing está saturado."""
+
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(HASH_POOL_SIZE, 1) + HASH_QUEUE_MAX)
+
+
+def _hash_en_proceso(password: str) -> str:
+    return pwd_ctx.hash(password)
+
+
+def _verify_en_proceso(password: str, password_hash: str) -> bool:
+    return pwd_ctx.verify(password, password_hash)
+
+
+def _verify_and_update_en_proceso(password: str, password_hash: str):
+    return pwd_ctx.verify_and_update(password, password_hash)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: no se hace fork de un proceso con hilos activos.
+                _executor = ProcessPoolExecutor(
+                    max_workers=HASH_POOL_SIZE,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    return _executor
+
+
+def _enviar(fn, *args):
+    """Reserva un cupo y envía la tarea al pool; HashingBusyError si no hay."""
+    if not _slots.acquire(blocking=False):
+        raise HashingBusyError()
+
+    try:
+        futuro = _get_executor().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+
+    # El cupo se libera cuando la tarea termina o se cancela, no cuando
+    # quien espera se rinde: así HASH_QUEUE_MAX acota lo que de verdad hay
+    # en el pool aunque haya timeouts.
+    futuro.add_done_callback(lambda _: _slots.release())
+    return futuro
+
+
+def _ejecutar(fn, *args):
+    if HASH_POOL_SIZE <= 0:
+        return fn(*args)
+
+    futuro = _enviar(fn, *args)
+
+    try:
+        return futuro.result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        # Si seguía en cola ya no se ejecuta; si ya corre, libera al terminar.
+        futuro.cancel()
+        raise HashingBusyError()
+
+
+async def _ejecutar_async(fn, *args):
+    if HASH_POOL_SIZE <= 0:
+        return await asyncio.to_thread(fn, *args)
+
+    futuro = _enviar(fn, *args)
+
+    try:
+        # Al vencer, wait_for cancela el future de asyncio y wrap_future
+        # propaga la cancelación al del pool, igual que en _ejecutar.
+        return await asyncio.wait_for(asyncio.wrap_future(futuro), HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HashingBusyError()
+
+
+def hash_password(password: str) -> str:
+    return _ejecutar(_hash_en_proceso, password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _ejecutar(_verify_en_proceso, password, password_hash)
+
+
+def verify_and_update(password: str, password_hash: str):
+    """
+    Regresa (valido, nuevo_hash). nuevo_hash no es None cuando la contraseña
+    es correcta pero el hash guardado usa parámetros distintos al perfil actual.
+    """
+    return _ejecutar(_verify_and_update_en_proceso, password, password_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _ejecutar_async(_hash_en_proceso, password)
+
+
+async def verify_and_update_async(password: str, password_hash: str):
+    """Igual que verify_and_update, sin ocupar un hilo mientras espera."""
+    return await _ejecutar_async(_verify_and_update_en_proceso, password, password_hash)
+
+
+def calibrar(objetivo_ms: float, repeticiones: int = 3) -> dict:
+    """
+    Mide en este equipo cuánto tarda un hash con cada perfil y sugiere
+    el perfil más fuerte que no rebasa objetivo_ms, además de un time_cost
+    ajustado para la memoria de ese perfil.
+    """
+    mediciones = {}
+
+    for nombre, parametros in ARGON2_PROFILES.items():
+        ctx = _crear_contexto(**parametros)
+        ctx.hash("calibracion")  # primera llamada fuera de la medición
+
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            ctx.hash("calibracion")
+        mediciones[nombre] = (time.perf_counter() - inicio) * 1000 / repeticiones
+
+    # ARGON2_PROFILES está ordenado de menor a mayor costo.
+    sugerido = "bajo"
+    for nombre, ms in mediciones.items():
+        if ms <= objetivo_ms:
+            sugerido = nombre
+
+    parametros = ARGON2_PROFILES[sugerido]
+    ms_por_iteracion = mediciones[sugerido] / parametros["time_cost"]
+    time_cost = max(1, int(objetivo_ms // ms_por_iteracion))
+
+    return {
+        "objetivo_ms": objetivo_ms,
+        "mediciones_ms": {nombre: round(ms, 1) for nombre, ms in mediciones.items()},
+        "perfil_sugerido": sugerido,
+        "time_cost_ajustado": time_cost,
+        "ms_estimado_ajustado": round(ms_por_iteracion * time_cost, 1),
+    }
+
+
+def shutdown() -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
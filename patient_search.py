@@ -0,0 +1,208 @@
+# patient_search.py
+"""
+Búsqueda de pacientes por nombre, apellido, NSS o teléfono para el
+typeahead de la app (GET /api/pacientes/buscar).
+
+Cada paciente tiene en patient_search_terms sus términos normalizados:
+minúsculas, sin acentos ni signos ("Peña Núñez" -> "pena", "nunez"),
+más el NSS y los dígitos del teléfono. Cada palabra de la búsqueda se
+resuelve con `termino LIKE 'abc%'` sobre el índice (termino, user_id), así
+que el costo depende de cuántos términos empiezan con ese prefijo y no del
+total de pacientes. Un paciente aparece solo si todas las palabras
+coinciden con alguno de sus términos.
+
+Orden: el índice está ordenado por término, así que para cada prefijo
+la coincidencia exacta sale primero ("maria" antes que "mariana") y
+luego el resto en orden alfabético; la consulta lee ese rango en orden
+y se detiene al completar la página en lugar de juntar y ordenar todos
+los candidatos.
+
+indexar_paciente se llama al registrar un paciente y al guardar su
+perfil. Para llenar el índice con los pacientes existentes:
+    python manage.py indexar-pacientes
+"""
+import re
+import unicodedata
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from models import PatientSearchTerm, Profile, User
+
+
+MAX_PALABRAS = 5
+LARGO_TERMINO = 64
+
+
+def normalizar(texto: str | None) -> list[str]:
+    """Palabras en minúsculas y sin acentos: "María-José" -> ["maria", "jose"]."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^0-9a-z]+", " ", texto.lower()).split()
+
+
+def _digitos(texto: str | None) -> str:
+    return re.sub(r"\D", "", texto or "")
+
+
+def terminos_paciente(user: User, profile: Profile | None) -> set[str]:
+    """Palabras del nombre, NSS y teléfonos (nacional y con lada) de un paciente."""
+    textos = [user.full_name]
+    if profile:
+        textos += [profile.nombre, profile.apellido]
+
+    terminos = {palabra for texto in textos for palabra in normalizar(texto)}
+
+    if profile and profile.nss:
+        terminos.add("".join(normalizar(profile.nss)))
+
+    telefonos = [user.phone_national, user.phone_number]
+    if profile:
+        telefonos.append(profile.telefono)
+
+    terminos.update(_digitos(telefono) for telefono in telefonos)
+
+    return {termino[:LARGO_TERMINO] for termino in terminos if termino}
+
+
+def indexar_paciente(db: Session, user: User, profile: Profile | None) -> None:
+    """
+    Reemplaza los términos del usuario. No hace commit: se guarda con la
+    transacción de quien llama. Los usuarios que no son pacientes no se indexan.
+    """
+    db.query(PatientSearchTerm).filter(
+        PatientSearchTerm.user_id == user.id
+    ).delete(synchronize_session=False)
+
+    if user.user_type != "paciente":
+        return
+
+    db.add_all(
+        PatientSearchTerm(user_id=user.id, termino=termino)
+        for termino in terminos_paciente(user, profile)
+    )
+
+
+def indexar_todos(db: Session, lote: int = 1000) -> int:
+    """
+    Reconstruye patient_search_terms para todos los pacientes.
+    Se usa una vez después de la migración (manage.py indexar-pacientes).
+    """
+    total = 0
+    ultimo_id = 0
+
+    while True:
+        filas = (
+            db.query(User, Profile)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .filter(User.id > ultimo_id, User.user_type == "paciente")
+            .order_by(User.id.asc())
+            .limit(lote)
+            .all()
+        )
+
+        if not filas:
+            break
+
+        for user, profile in filas:
+            indexar_paciente(db, user, profile)
+
+        db.commit()
+        total += len(filas)
+        ultimo_id = filas[-1][0].id
+
+    return total
+
+
+def _palabras(q: str) -> list[str]:
+    return list(dict.fromkeys(normalizar(q)))[:MAX_PALABRAS]
+
+
+def filtro_terminos(user_id, q: str) -> list:
+    """
+    Condiciones para filtrar un listado de pacientes por q, una por palabra:
+    `user_id IN (SELECT user_id ... WHERE termino LIKE 'abc%')`, un rango
+    del índice (termino, user_id). Sin palabras no se filtra.
+    """
+    return [
+        user_id.in_(
+            select(PatientSearchTerm.user_id)
+            .where(PatientSearchTerm.termino.like(palabra + "%"))
+        )
+        for palabra in _palabras(q)
+    ]
+
+
+def buscar_pacientes(
+    db: Session,
+    q: str,
+    limit: int,
+    unidad_medica: str | None = None,
+):
+    """
+    [(User, Profile | None)] que coinciden con todas las palabras de q,
+    en orden de relevancia.
+    """
+    palabras = _palabras(q)
+
+    if not palabras:
+        return []
+
+    # La palabra más larga (la más selectiva) recorre el índice en orden
+    # (termino, user_id) y la consulta se detiene al juntar la página. Las
+    # demás se comprueban con EXISTS sobre (user_id, termino). No se filtra
+    # por user_type: la tabla solo tiene pacientes (ver indexar_paciente), y
+    # el filtro invita al planificador a empezar por users.
+    principal = max(palabras, key=len)
+    t = aliased(PatientSearchTerm)
+
+    query = (
+        db.query(User, Profile, t.termino)
+        .select_from(t)
+        .join(User, User.id == t.user_id)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .filter(t.termino.like(principal + "%"))
+    )
+
+    # Las palabras ya solo tienen [0-9a-z], no hace falta escapar % ni _.
+    for palabra in palabras:
+        if palabra == principal:
+            continue
+
+        otro = aliased(PatientSearchTerm)
+        query = query.filter(
+            db.query(otro)
+            .filter(otro.user_id == t.user_id, otro.termino.like(palabra + "%"))
+            .exists()
+        )
+
+    if unidad_medica:
+        query = query.filter(Profile.unidad_medica == unidad_medica)
+
+    # Un paciente aparece una vez por término que coincide ("mar" ->
+    # "maria", "martinez"). Se deja su primera aparición y, si los repetidos
+    # dejaron la página incompleta, se sigue leyendo el rango después de la
+    # última fila (termino, user_id) hasta llenarla o agotar el prefijo.
+    resultado = {}
+    ultimo = None
+
+    while len(resultado) < limit:
+        pagina = query
+        if ultimo:
+            termino, user_id = ultimo
+            pagina = pagina.filter(or_(
+                t.termino > termino,
+                and_(t.termino == termino, t.user_id > user_id),
+            ))
+
+        filas = pagina.order_by(t.termino.asc(), t.user_id.asc()).limit(limit).all()
+
+        for user, profile, _ in filas:
+            resultado.setdefault(user.id, (user, profile))
+
+        if len(filas) < limit:
+            break
+
+        ultimo = (filas[-1][2], filas[-1][0].id)
+
+    return list(resultado.values())[:limit]
@@ -0,0 +1,453 @@
+# reminders.py
+"""
+Recordatorios de citas a partir de PatientAppointment.recordatorios_json.
+
+Al crear, editar o cancelar una cita, programar_recordatorios calcula una
+sola vez la hora de cada recordatorio activo y la guarda en reminder_queue
+(UTC). El worker solo consulta `status IN (...) AND due_at <= ahora` sobre
+el índice (status, due_at); no vuelve a recorrer citas ni a parsear JSON.
+
+Las citas guardan fecha y hora locales (YYYY-MM-DD / HH:MM); se interpretan
+en la zona CITAS_TZ.
+
+Igual que email_queue.py, cada fila se reserva con SKIP LOCKED y un lease
+antes de notificar, así varios procesos pueden correr el worker. El lease
+se renueva justo antes de notificar cada fila del lote, porque los envíos
+son secuenciales.
+
+El envío pasa por un notificador intercambiable: REMINDER_NOTIFIER elige
+uno de NOTIFICADORES ("log" por defecto, "email") y registrar_notificador
+permite agregar otros (por ejemplo push).
+"""
+import json
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session, joinedload
+
+from db import SessionLocal
+from email_service import send_appointment_reminder_email
+from models import PatientAppointment, ReminderQueue
+from user_names import resolver_nombres
+
+
+CITAS_TZ = ZoneInfo(os.getenv("CITAS_TZ", "America/Mexico_City"))
+
+REMINDER_WORKER_ENABLED = os.getenv("REMINDER_WORKER_ENABLED", "1") == "1"
+REMINDER_NOTIFIER = os.getenv("REMINDER_NOTIFIER", "log")
+REMINDER_INTERVALO = float(os.getenv("REMINDER_INTERVALO", "30"))
+REMINDER_LOTE = int(os.getenv("REMINDER_LOTE", "100"))
+REMINDER_MAX_INTENTOS = int(os.getenv("REMINDER_MAX_INTENTOS", "5"))
+REMINDER_BACKOFF_BASE = float(os.getenv("REMINDER_BACKOFF_BASE", "30"))
+REMINDER_LEASE_SEGUNDOS = int(os.getenv("REMINDER_LEASE_SEGUNDOS", "120"))
+
+DEFAULT_RECORDATORIOS = {
+    "3_dias": True,
+    "1_dia": True,
+    "4_horas": True,
+    "1_hora": True,
+}
+
+ANTICIPACION = {
+    "3_dias": timedelta(days=3),
+    "1_dia": timedelta(days=1),
+    "4_horas": timedelta(hours=4),
+    "1_hora": timedelta(hours=1),
+}
+
+ANTICIPACION_TEXTO = {
+    "3_dias": "en 3 días",
+    "1_dia": "mañana",
+    "4_horas": "en 4 horas",
+    "1_hora": "en 1 hora",
+}
+
+ESTADOS_EN_COLA = ("pendiente", "enviando")
+
+_despertar = threading.Event()
+_detener = threading.Event()
+_hilo: threading.Thread | None = None
+
+
+# ================================================================
+# PROGRAMACIÓN
+# ================================================================
+def leer_recordatorios(recordatorios_json: str | None) -> dict:
+    if not recordatorios_json:
+        return DEFAULT_RECORDATORIOS
+    try:
+        return json.loads(recordatorios_json)
+    except Exception:
+        return DEFAULT_RECORDATORIOS
+
+
+def _cita_utc(cita: PatientAppointment) -> datetime | None:
+    """Fecha y hora de la cita en UTC (naive, como el resto de la base)."""
+    try:
+        local = datetime.strptime(f"{cita.fecha_cita} {cita.hora_cita[:5]}", "%Y-%m-%d %H:%M")
+    except Exception:
+        return None
+
+    return local.replace(tzinfo=CITAS_TZ).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _recordatorios_deseados(cita: PatientAppointment, ahora: datetime) -> dict:
+    """tipo -> (cita_at, due_at) de los recordatorios activos que aún no vencen."""
+    if cita.estado != "programada":
+        return {}
+
+    cita_at = _cita_utc(cita)
+    if cita_at is None:
+        return {}
+
+    deseados = {}
+    for tipo, activo in leer_recordatorios(cita.recordatorios_json).items():
+        if not activo or tipo not in ANTICIPACION:
+            continue
+        due_at = cita_at - ANTICIPACION[tipo]
+        if due_at > ahora:
+            deseados[tipo] = (cita_at, due_at)
+
+    return deseados
+
+
+def programar_recordatorios(db: Session, cita: PatientAppointment) -> None:
+    """
+    Sincroniza reminder_queue con el estado actual de la cita.
+    No hace commit: se guarda junto con el cambio de la cita.
+
+    - Recordatorios sin cambios (mismo tipo y misma hora de cita) se conservan,
+      incluso si ya se enviaron.
+    - Si la cita cambió de fecha/hora, se reprograman.
+    - Si la cita se canceló o se desactivó la bandera, los pendientes
+      quedan como "cancelado".
+    """
+    ahora = datetime.utcnow()
+    deseados = _recordatorios_deseados(cita, ahora)
+
+    existentes = (
+        db.query(ReminderQueue)
+        .filter(ReminderQueue.appointment_id == cita.id)
+        .all()
+    )
+
+    for fila in existentes:
+        nuevo = deseados.pop(fila.tipo, None)
+
+        if nuevo is None:
+            if fila.status in ESTADOS_EN_COLA:
+                fila.status = "cancelado"
+            continue
+
+        cita_at, due_at = nuevo
+        if fila.cita_at == cita_at and fila.status != "cancelado":
+            continue
+
+        fila.cita_at = cita_at
+        fila.due_at = due_at
+        fila.status = "pendiente"
+        fila.attempts = 0
+        fila.last_error = None
+        fila.sent_at = None
+
+    if deseados:
+        db.bulk_insert_mappings(
+            ReminderQueue,
+            [
+                {
+                    "appointment_id": cita.id,
+                    "user_id": cita.paciente_id,
+                    "tipo": tipo,
+                    "cita_at": cita_at,
+                    "due_at": due_at,
+                    "status": "pendiente",
+                    "attempts": 0,
+                    "created_at": ahora,
+                }
+                for tipo, (cita_at, due_at) in deseados.items()
+            ],
+        )
+
+
+def programar_todas(db: Session, lote: int = 1000) -> int:
+    """
+    Llena reminder_queue para las citas programadas existentes.
+    Se usa una vez después de la migración (manage.py programar-recordatorios).
+    """
+    hoy = datetime.now(CITAS_TZ).date().isoformat()
+    total = 0
+    ultimo_id = 0
+
+    while True:
+        citas = (
+            db.query(PatientAppointment)
+            .filter(
+                PatientAppointment.id > ultimo_id,
+                PatientAppointment.estado == "programada",
+                PatientAppointment.fecha_cita >= hoy,
+            )
+            .order_by(PatientAppointment.id.asc())
+            .limit(lote)
+            .all()
+        )
+
+        if not citas:
+            break
+
+        for cita in citas:
+            programar_recordatorios(db, cita)
+
+        db.commit()
+        total += len(citas)
+        ultimo_id = citas[-1].id
+
+    return total
+
+
+# ================================================================
+# NOTIFICADORES
+# ================================================================
+def notificador_log(recordatorio: dict) -> None:
+    print(
+        f"Recordatorio {recordatorio['tipo']} para {recordatorio['email']}: "
+        f"cita {recordatorio['fecha']} {recordatorio['hora']}"
+    )
+
+
+def notificador_email(recordatorio: dict) -> None:
+    send_appointment_reminder_email(
+        recordatorio["email"],
+        {
+            "nombre": recordatorio["nombre"],
+            "anticipacion": ANTICIPACION_TEXTO.get(recordatorio["tipo"], ""),
+            "fecha": recordatorio["fecha"],
+            "hora": recordatorio["hora"],
+            "profesional": recordatorio["profesional"],
+            "unidad_medica": recordatorio["unidad_medica"],
+            "motivo": recordatorio["motivo"],
+        },
+    )
+
+
+NOTIFICADORES = {
+    "log": notificador_log,
+    "email": notificador_email,
+}
+
+
+def registrar_notificador(nombre: str, notificador) -> None:
+    """Agrega un canal de envío; se activa con REMINDER_NOTIFIER=<nombre>."""
+    NOTIFICADORES[nombre] = notificador
+
+
+def obtener_notificador():
+    try:
+        return NOTIFICADORES[REMINDER_NOTIFIER]
+    except KeyError:
+        raise RuntimeError(f"REMINDER_NOTIFIER desconocido: {REMINDER_NOTIFIER}")
+
+
+# ================================================================
+# WORKER
+# ================================================================
+def _reservar(db: Session, lote: int) -> list[int]:
+    ahora = datetime.utcnow()
+
+    filas = (
+        db.query(ReminderQueue)
+        .filter(
+            ReminderQueue.status.in_(ESTADOS_EN_COLA),
+            ReminderQueue.due_at <= ahora,
+        )
+        .order_by(ReminderQueue.due_at.asc())
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    reservadas = []
+
+    for fila in filas:
+        # Si el worker estuvo detenido, no avisar de citas que ya pasaron.
+        if fila.cita_at <= ahora:
+            fila.status = "descartado"
+            continue
+
+        fila.status = "enviando"
+        fila.due_at = ahora + timedelta(seconds=REMINDER_LEASE_SEGUNDOS)
+        reservadas.append(fila.id)
+
+    db.commit()
+    return reservadas
+
+
+def _datos_recordatorios(db: Session, ids: list[int]) -> list[tuple[ReminderQueue, dict]]:
+    filas = (
+        db.query(ReminderQueue)
+        .options(
+            joinedload(ReminderQueue.appointment)
+            .joinedload(PatientAppointment.paciente)
+        )
+        .filter(
+            ReminderQueue.id.in_(ids),
+            # Pudo cancelarse entre la reserva y esta lectura.
+            ReminderQueue.status == "enviando",
+        )
+        .all()
+    )
+
+    nombres = resolver_nombres(
+        db,
+        [fila.appointment.profesional_id for fila in filas] + [fila.user_id for fila in filas],
+    )
+
+    datos = []
+    for fila in filas:
+        cita = fila.appointment
+        paciente = cita.paciente
+        datos.append((fila, {
+            "id": fila.id,
+            "tipo": fila.tipo,
+            "appointment_id": cita.id,
+            "user_id": paciente.id,
+            "email": paciente.email,
+            "nombre": nombres.get(paciente.id) or "",
+            "fecha": cita.fecha_cita,
+            "hora": cita.hora_cita,
+            "motivo": cita.motivo,
+            "unidad_medica": cita.unidad_medica or "",
+            "profesional": nombres.get(cita.profesional_id) or "Profesional de salud",
+        }))
+
+    return datos
+
+
+def _con_lease(db: Session, reminder_id: int, lease: datetime):
+    return db.query(ReminderQueue).filter(
+        ReminderQueue.id == reminder_id,
+        ReminderQueue.status == "enviando",
+        ReminderQueue.due_at == lease,
+    )
+
+
+def _renovar_lease(db: Session, reminder_id: int, lease: datetime) -> datetime | None:
+    """
+    Extiende el lease antes de notificar. Regresa el nuevo, o None si la
+    fila ya no es de este worker (se canceló, se reprogramó u otro worker
+    la tomó).
+    """
+    # Sin microsegundos: DATETIME de MySQL los redondea al guardar y el
+    # lease se compara por igualdad.
+    nuevo = (datetime.utcnow() + timedelta(seconds=REMINDER_LEASE_SEGUNDOS)).replace(microsecond=0)
+
+    actualizadas = _con_lease(db, reminder_id, lease).update(
+        {"due_at": nuevo}, synchronize_session=False
+    )
+    db.commit()
+
+    return nuevo if actualizadas == 1 else None
+
+
+def _registrar_resultado(db: Session, fila: ReminderQueue, lease: datetime, error: str | None) -> bool:
+    """
+    Guarda el resultado del envío solo si la fila sigue reservada por este
+    worker: status "enviando" y el lease que escribió. Si la cita se canceló
+    o reprogramó mientras se notificaba, o el lease venció y otro worker la
+    tomó, no se pisa ese cambio. Regresa si se actualizó.
+    """
+    ahora = datetime.utcnow()
+    intentos = (fila.attempts or 0) + 1
+
+    if error is None:
+        valores = {"status": "enviado", "sent_at": ahora, "last_error": None}
+    elif intentos >= REMINDER_MAX_INTENTOS:
+        valores = {"status": "fallido", "last_error": error}
+    else:
+        valores = {
+            "status": "pendiente",
+            "last_error": error,
+            "due_at": ahora + timedelta(seconds=REMINDER_BACKOFF_BASE * (2 ** (intentos - 1))),
+        }
+
+    actualizadas = (
+        _con_lease(db, fila.id, lease)
+        .update({**valores, "attempts": intentos}, synchronize_session=False)
+    )
+    return actualizadas == 1
+
+
+def procesar_recordatorios(db: Session, lote: int = REMINDER_LOTE) -> int:
+    """
+    Envía un lote de recordatorios vencidos. Regresa cuántos se intentaron.
+    """
+    ids = _reservar(db, lote)
+    if not ids:
+        return 0
+
+    notificar = obtener_notificador()
+
+    datos = _datos_recordatorios(db, ids)
+
+    # Los leases se toman antes del primer commit, que expira las filas: al
+    # volver a leerlas ya podrían traer el lease de otro worker.
+    leases = {fila.id: fila.due_at for fila, _ in datos}
+
+    for fila, recordatorio in datos:
+        lease = _renovar_lease(db, fila.id, leases[fila.id])
+        if lease is None:
+            continue
+
+        try:
+            notificar(recordatorio)
+            error = None
+        except Exception as e:
+            print("Error enviando recordatorio de cita:", e)
+            error = str(e)[:1000]
+
+        _registrar_resultado(db, fila, lease, error)
+        db.commit()
+
+    return len(ids)
+
+
+def _ciclo():
+    while not _detener.is_set():
+        procesados = 0
+        db = SessionLocal()
+        try:
+            procesados = procesar_recordatorios(db)
+        except Exception:
+            print("Error en la cola de recordatorios:")
+            traceback.print_exc()
+            db.rollback()
+        finally:
+            db.close()
+
+        if procesados < REMINDER_LOTE:
+            _despertar.wait(REMINDER_INTERVALO)
+            _despertar.clear()
+
+
+def iniciar():
+    global _hilo
+
+    if not REMINDER_WORKER_ENABLED or (_hilo and _hilo.is_alive()):
+        return
+
+    _detener.clear()
+    _hilo = threading.Thread(target=_ciclo, name="reminder-queue", daemon=True)
+    _hilo.start()
+
+
+def detener(timeout: float = 5.0):
+    global _hilo
+
+    _detener.set()
+    _despertar.set()
+
+    if _hilo:
+        _hilo.join(timeout)
+        _hilo = None
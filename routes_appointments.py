@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import json
 
 from db import get_db
@@ -10,30 +10,14 @@ from schemas import (
     PatientAppointmentOut,
     ProfesionalUnidadOut,
 )
-from auth import get_current_user
+from auth import get_current_account
+from reminders import DEFAULT_RECORDATORIOS, leer_recordatorios, programar_recordatorios
 
 router = APIRouter(prefix="/api/appointments", tags=["Citas del paciente"])
 
 
-DEFAULT_RECORDATORIOS = {
-    "3_dias": True,
-    "1_dia": True,
-    "4_horas": True,
-    "1_hora": True,
-}
-
-
-def _get_user_and_profile(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
-    return user, profile
-
-
-def _validar_paciente_actual(db: Session, current_user: dict):
-    user, profile = _get_user_and_profile(db, current_user["id"])
+def _validar_paciente_actual(cuenta):
+    user, profile = cuenta
 
     if user.user_type != "paciente":
         raise HTTPException(status_code=403, detail="Este módulo es para pacientes")
@@ -81,24 +65,37 @@ def _recordatorios_to_json(recordatorios):
     return json.dumps(data)
 
 
-def _appointment_to_out(cita: PatientAppointment, db: Session):
+def _citas_con_profesional(db: Session):
+    """
+    Consulta de citas que trae al profesional y su perfil en el mismo JOIN,
+    para que _appointment_to_out no haga consultas por cita.
+    """
+    return db.query(PatientAppointment).options(
+        joinedload(PatientAppointment.profesional).joinedload(User.profile)
+    )
+
+
+def _recargar_cita(db: Session, appointment_id: int):
+    return (
+        _citas_con_profesional(db)
+        .filter(PatientAppointment.id == appointment_id)
+        .populate_existing()
+        .one()
+    )
+
+
+def _appointment_to_out(cita: PatientAppointment):
     profesional_nombre = None
     profesional_especialidad = None
 
-    if cita.profesional_id:
-        profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-        profile = db.query(Profile).filter(Profile.user_id == cita.profesional_id).first()
-        if profesional:
-            profesional_nombre = _nombre_profesional(profesional, profile)
+    profesional = cita.profesional if cita.profesional_id else None
+    if profesional:
+        profile = profesional.profile
+        profesional_nombre = _nombre_profesional(profesional, profile)
         if profile:
             profesional_especialidad = profile.especialidad
 
-    recordatorios = DEFAULT_RECORDATORIOS
-    if cita.recordatorios_json:
-        try:
-            recordatorios = json.loads(cita.recordatorios_json)
-        except Exception:
-            recordatorios = DEFAULT_RECORDATORIOS
+    recordatorios = leer_recordatorios(cita.recordatorios_json)
 
     return PatientAppointmentOut(
         id=cita.id,
@@ -121,9 +118,9 @@ def _appointment_to_out(cita: PatientAppointment, db: Session):
 @router.get("/profesionales-mi-unidad", response_model=list[ProfesionalUnidadOut])
 def profesionales_mi_unidad(
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    _, paciente_profile = _validar_paciente_actual(db, current_user)
+    _, paciente_profile = _validar_paciente_actual(cuenta)
 
     resultados = (
         db.query(User, Profile)
@@ -150,27 +147,27 @@ def profesionales_mi_unidad(
 @router.get("", response_model=list[PatientAppointmentOut])
 def listar_citas(
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    paciente, _ = _validar_paciente_actual(db, current_user)
+    paciente, _ = _validar_paciente_actual(cuenta)
 
     citas = (
-        db.query(PatientAppointment)
+        _citas_con_profesional(db)
         .filter(PatientAppointment.paciente_id == paciente.id)
         .order_by(PatientAppointment.fecha_cita.asc(), PatientAppointment.hora_cita.asc())
         .all()
     )
 
-    return [_appointment_to_out(cita, db) for cita in citas]
+    return [_appointment_to_out(cita) for cita in citas]
 
 
 @router.post("", response_model=PatientAppointmentOut)
 def crear_cita(
     payload: PatientAppointmentCreate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    paciente, paciente_profile = _validar_paciente_actual(db, current_user)
+    paciente, paciente_profile = _validar_paciente_actual(cuenta)
     _validar_profesional_misma_unidad(db, payload.profesional_id, paciente_profile.unidad_medica)
 
     cita = PatientAppointment(
@@ -186,10 +183,11 @@ def crear_cita(
     )
 
     db.add(cita)
+    db.flush()
+    programar_recordatorios(db, cita)
     db.commit()
-    db.refresh(cita)
 
-    return _appointment_to_out(cita, db)
+    return _appointment_to_out(_recargar_cita(db, cita.id))
 
 
 @router.put("/{appointment_id}", response_model=PatientAppointmentOut)
@@ -197,9 +195,9 @@ def actualizar_cita(
     appointment_id: int,
     payload: PatientAppointmentUpdate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    paciente, paciente_profile = _validar_paciente_actual(db, current_user)
+    paciente, paciente_profile = _validar_paciente_actual(cuenta)
 
     cita = (
         db.query(PatientAppointment)
@@ -224,19 +222,19 @@ def actualizar_cita(
     for key, value in data.items():
         setattr(cita, key, value)
 
+    programar_recordatorios(db, cita)
     db.commit()
-    db.refresh(cita)
 
-    return _appointment_to_out(cita, db)
+    return _appointment_to_out(_recargar_cita(db, cita.id))
 
 
 @router.delete("/{appointment_id}")
 def cancelar_cita(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    paciente, _ = _validar_paciente_actual(db, current_user)
+    paciente, _ = _validar_paciente_actual(cuenta)
 
     cita = (
         db.query(PatientAppointment)
@@ -251,6 +249,7 @@ def cancelar_cita(
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
     cita.estado = "cancelada"
+    programar_recordatorios(db, cita)
     db.commit()
 
     return {"ok": True, "message": "Cita cancelada"}
@@ -1,21 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date, time, timedelta
 
-from db import get_db
-from models import User, Profile, PatientMedication, PatientAppointment
-from auth import get_current_user
+from db import get_async_db
+from models import Profile, PatientMedication, PatientAppointment
+from auth import get_current_account_async
+from user_names import resolver_nombres
 
 router = APIRouter(prefix="/api/calendar", tags=["Calendario del paciente"])
 
 
-def _validar_paciente(db: Session, current_user: dict):
-    user = db.query(User).filter(User.id == current_user["id"]).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+def _validar_paciente(cuenta):
+    user, profile = cuenta
     if user.user_type != "paciente":
         raise HTTPException(status_code=403, detail="Este módulo es para pacientes")
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     return user, profile
 
 
@@ -45,9 +44,9 @@ def _parse_time(value: str):
         return None
 
 
-def _medication_events_for_day(med: PatientMedication, selected_date: date):
+def _medication_doses(med: PatientMedication, desde: date, hasta: date):
     """
-    Genera las tomas reales de un medicamento para un día seleccionado.
+    Calcula las tomas reales de un medicamento entre dos fechas (inclusive).
 
     Reglas:
     - Respeta fecha_inicio y fecha_fin.
@@ -55,6 +54,9 @@ def _medication_events_for_day(med: PatientMedication, selected_date: date):
     - Calcula la secuencia real desde fecha_inicio + hora_inicio.
       Ejemplo: 21 junio 20:00 cada 8 horas -> 22 junio 04:00, 12:00, 20:00.
     - Si fecha_fin es NULL, se considera uso continuo desde fecha_inicio.
+
+    Las tomas se obtienen aritméticamente: la k-ésima toma es
+    inicio + k * frecuencia, así que no se recorre día por día.
     """
     if not med.frecuencia_horas or med.frecuencia_horas <= 0:
         return []
@@ -75,93 +77,91 @@ def _medication_events_for_day(med: PatientMedication, selected_date: date):
 
     end_date = _parse_medication_date(med.fecha_fin)
 
-    # Fuera del periodo de tratamiento.
-    if selected_date < start_date:
-        return []
-
-    if end_date is not None and selected_date > end_date:
-        return []
-
     start_dt = datetime.combine(start_date, start_time)
-    day_start = datetime.combine(selected_date, time(0, 0))
-    day_end = datetime.combine(selected_date, time(23, 59, 59))
+    window_start = max(datetime.combine(desde, time(0, 0)), start_dt)
+    window_end = datetime.combine(hasta, time(23, 59, 59))
 
     if end_date is not None:
-        treatment_end = datetime.combine(end_date, time(23, 59, 59))
-    else:
-        treatment_end = day_end
-
-    window_start = max(day_start, start_dt)
-    window_end = min(day_end, treatment_end)
+        window_end = min(window_end, datetime.combine(end_date, time(23, 59, 59)))
 
     if window_start > window_end:
         return []
 
-    interval = timedelta(hours=med.frecuencia_horas)
-
-    # Avanza desde el inicio real del tratamiento hasta la primera toma
-    # que cae dentro del día seleccionado.
-    current = start_dt
-    if current < window_start:
-        elapsed_seconds = (window_start - current).total_seconds()
-        interval_seconds = interval.total_seconds()
-        steps = int(elapsed_seconds // interval_seconds)
-        current = current + timedelta(seconds=steps * interval_seconds)
-        if current < window_start:
-            current += interval
-
-    events = []
-    while current <= window_end:
-        events.append({
-            "tipo": "medicamento",
-            "origen": "medicamento",
-            "id": med.id,
-            "hora": current.strftime("%H:%M"),
-            "titulo": med.nombre,
-            "descripcion": f"{med.cantidad} {med.unidad} · {med.frecuencia_texto}",
-        })
-        current += interval
+    interval_seconds = med.frecuencia_horas * 3600
 
-    return events
+    # Primera toma >= window_start y última toma <= window_end.
+    primera = -(-int((window_start - start_dt).total_seconds()) // interval_seconds)
+    ultima = int((window_end - start_dt).total_seconds()) // interval_seconds
 
+    return [
+        start_dt + timedelta(seconds=k * interval_seconds)
+        for k in range(primera, ultima + 1)
+    ]
 
-def _nombre_profesional(db: Session, profesional_id: int | None):
-    if not profesional_id:
-        return "Profesional de salud"
 
-    user = db.query(User).filter(User.id == profesional_id).first()
-    profile = db.query(Profile).filter(Profile.user_id == profesional_id).first()
+def _medication_event(med: PatientMedication, toma: datetime):
+    return {
+        "tipo": "medicamento",
+        "origen": "medicamento",
+        "id": med.id,
+        "hora": toma.strftime("%H:%M"),
+        "titulo": med.nombre,
+        "descripcion": f"{med.cantidad} {med.unidad} · {med.frecuencia_texto}",
+    }
 
-    if profile:
-        nombre = f"{profile.nombre or ''} {profile.apellido or ''}".strip()
-        if nombre:
-            return nombre
 
-    return user.full_name if user and user.full_name else "Profesional de salud"
+def _medication_events_for_day(med: PatientMedication, selected_date: date):
+    """
+    Genera las tomas reales de un medicamento para un día seleccionado.
+    """
+    return [
+        _medication_event(med, toma)
+        for toma in _medication_doses(med, selected_date, selected_date)
+    ]
 
 
-@router.get("")
-def calendario_dia(
-    date_value: str | None = Query(None, alias="date"),
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
-):
-    user, profile = _validar_paciente(db, current_user)
-    selected_date = _parse_date(date_value)
-    selected_date_str = selected_date.isoformat()
+def _cita_event(cita: PatientAppointment, profesional_nombre: str | None, profile: Profile | None):
+    profesional_nombre = profesional_nombre or "Profesional de salud"
+    return {
+        "tipo": "cita",
+        "origen": "cita",
+        "id": cita.id,
+        "hora": cita.hora_cita,
+        "titulo": f"Cita con {profesional_nombre}",
+        "descripcion": f"{cita.motivo} · {cita.unidad_medica or (profile.unidad_medica if profile else '')}",
+    }
 
-    eventos = []
 
-    medicamentos = (
+def _medicamentos_activos(db: Session, user_id: int):
+    return (
         db.query(PatientMedication)
         .filter(
-            PatientMedication.user_id == user.id,
+            PatientMedication.user_id == user_id,
             PatientMedication.activo == 1,
         )
         .all()
     )
 
-    for med in medicamentos:
+
+# Las rutas del calendario son async: la consulta corre con
+# AsyncSession.run_sync sobre aiomysql y no ocupa hilos del threadpool.
+@router.get("")
+async def calendario_dia(
+    date_value: str | None = Query(None, alias="date"),
+    db: AsyncSession = Depends(get_async_db),
+    cuenta=Depends(get_current_account_async),
+):
+    user, profile = _validar_paciente(cuenta)
+    selected_date = _parse_date(date_value)
+    return await db.run_sync(_calendario_dia, user, profile, selected_date)
+
+
+def _calendario_dia(db: Session, user, profile, selected_date: date):
+    selected_date_str = selected_date.isoformat()
+
+    eventos = []
+
+    for med in _medicamentos_activos(db, user.id):
         eventos.extend(_medication_events_for_day(med, selected_date))
 
     citas = (
@@ -175,16 +175,11 @@ def calendario_dia(
         .all()
     )
 
+    # Nombres de todos los profesionales del día en una sola consulta (o caché).
+    nombres = resolver_nombres(db, [cita.profesional_id for cita in citas])
+
     for cita in citas:
-        profesional_nombre = _nombre_profesional(db, cita.profesional_id)
-        eventos.append({
-            "tipo": "cita",
-            "origen": "cita",
-            "id": cita.id,
-            "hora": cita.hora_cita,
-            "titulo": f"Cita con {profesional_nombre}",
-            "descripcion": f"{cita.motivo} · {cita.unidad_medica or (profile.unidad_medica if profile else '')}",
-        })
+        eventos.append(_cita_event(cita, nombres.get(cita.profesional_id), profile))
 
     eventos.sort(key=lambda item: item.get("hora", "99:99"))
 
@@ -195,21 +190,96 @@ def calendario_dia(
     }
 
 
+# Máximo de días por consulta de rango (vista de mes con semanas completas).
+MAX_RANGO_DIAS = 42
+
+
+@router.get("/range")
+async def calendario_rango(
+    from_value: str | None = Query(None, alias="from"),
+    to_value: str | None = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db),
+    cuenta=Depends(get_current_account_async),
+):
+    """
+    Eventos de varios días (vista semanal/mensual) agrupados por día.
+    Carga medicamentos y citas una sola vez para todo el rango.
+    """
+    user, profile = _validar_paciente(cuenta)
+    desde = _parse_date(from_value)
+    hasta = _parse_date(to_value) if to_value else desde
+
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+
+    total_dias = (hasta - desde).days + 1
+
+    if total_dias > MAX_RANGO_DIAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango máximo es de {MAX_RANGO_DIAS} días",
+        )
+
+    return await db.run_sync(_calendario_rango, user, profile, desde, hasta)
+
+
+def _calendario_rango(db: Session, user, profile, desde: date, hasta: date):
+    total_dias = (hasta - desde).days + 1
+    dias = {desde + timedelta(days=i): [] for i in range(total_dias)}
+
+    for med in _medicamentos_activos(db, user.id):
+        for toma in _medication_doses(med, desde, hasta):
+            dias[toma.date()].append(_medication_event(med, toma))
+
+    citas = (
+        db.query(PatientAppointment)
+        .filter(
+            PatientAppointment.paciente_id == user.id,
+            PatientAppointment.fecha_cita >= desde.isoformat(),
+            PatientAppointment.fecha_cita <= hasta.isoformat(),
+            PatientAppointment.estado == "programada",
+        )
+        .order_by(PatientAppointment.fecha_cita.asc(), PatientAppointment.hora_cita.asc())
+        .all()
+    )
+
+    nombres = resolver_nombres(db, [cita.profesional_id for cita in citas])
+
+    for cita in citas:
+        fecha_cita = _parse_medication_date(cita.fecha_cita)
+        if fecha_cita in dias:
+            dias[fecha_cita].append(_cita_event(cita, nombres.get(cita.profesional_id), profile))
+
+    for eventos in dias.values():
+        eventos.sort(key=lambda item: item.get("hora", "99:99"))
+
+    return {
+        "from": desde.isoformat(),
+        "to": hasta.isoformat(),
+        "unidad_medica": profile.unidad_medica if profile else None,
+        "days": [
+            {"date": dia.isoformat(), "items": eventos}
+            for dia, eventos in dias.items()
+        ],
+    }
+
+
 @router.get("/profesional")
-def calendario_profesional(
+async def calendario_profesional(
     date_value: str | None = Query(None, alias="date"),
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cuenta=Depends(get_current_account_async),
 ):
-    profesional = db.query(User).filter(User.id == current_user["id"]).first()
-
-    if not profesional:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    profesional, _ = cuenta
 
     if profesional.user_type != "profesional":
         raise HTTPException(status_code=403, detail="Este módulo es para profesionales")
 
     selected_date = _parse_date(date_value)
+    return await db.run_sync(_calendario_profesional, profesional, selected_date)
+
+
+def _calendario_profesional(db: Session, profesional, selected_date: date):
     selected_date_str = selected_date.isoformat()
 
     citas = (
@@ -1,13 +1,17 @@
 # routes_evaluations.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from db import get_db
-from models import Evaluation, CompetenciasProfesionales, User, Profile
+from db import get_db, get_async_db
+from models import Evaluation, EvaluationSummary, CompetenciasProfesionales, User, Profile
 from auth import get_current_user
 from datetime import datetime
 import json
 from schemas import CompetenciasIn, CompetenciasOut
+from pagination import MAX_LIMIT, keyset_filter, split_page
 
 router = APIRouter(prefix="/api/evaluations", tags=["Evaluaciones"])
 
@@ -69,6 +73,10 @@ TEST_RESUMEN_CONFIG = {
 }
 
 
+# Instrumentos que se consultan para armar el resumen general.
+RESUMEN_TEST_TYPES = list(TEST_RESUMEN_CONFIG.keys()) + ["automanejo_prof"]
+
+
 # ============================================================
 # FUNCIONES AUXILIARES
 # ============================================================
@@ -155,35 +163,123 @@ def _obtener_respuestas_desde_payload(payload: dict):
     return parsed
 
 
-def _evaluation_to_dict(e):
+def _calificar(test_type, respuestas, score_fallback=None):
     """
-    Convierte una evaluación a JSON de respuesta.
-    Importante: recalcula score desde respuestas_json para que también
-    evaluaciones antiguas de automanejo se muestren con score total.
+    Califica una evaluación a partir de sus respuestas ya decodificadas:
+    - score_calculado: score total del instrumento
+    - score_resumen: score usado para el semáforo (usar_score_respuestas)
+    - nivel / semaforo según TEST_RESUMEN_CONFIG
     """
-    if not e:
-        return None
+    score_calculado = _calcular_score_automanejo(
+        test_type,
+        respuestas,
+        score_fallback=score_fallback,
+    )
 
-    parsed = _parse_json(e.respuestas_json)
+    config = TEST_RESUMEN_CONFIG.get(test_type)
+    score = score_calculado or 0
 
-    score_calculado = _calcular_score_automanejo(
-        e.test_type,
-        parsed,
-        score_fallback=e.score,
+    if not config:
+        return {
+            "score_calculado": score_calculado,
+            "score_resumen": score,
+            "nivel": "Sin interpretación",
+            "semaforo": "gris",
+        }
+
+    # Caso especial: comunicación médico usa solo las preguntas 1 a 3.
+    campo_score = config.get("usar_score_respuestas")
+
+    if campo_score and isinstance(respuestas, dict) and respuestas.get(campo_score) is not None:
+        try:
+            score = int(respuestas.get(campo_score))
+        except Exception:
+            score = score_calculado or 0
+
+    nivel = _nivel_resumen(
+        score,
+        int(config.get("score_maximo", 0)),
+        bool(config.get("mayor_mejor", True)),
     )
 
     return {
+        "score_calculado": score_calculado,
+        "score_resumen": score,
+        "nivel": nivel["nivel"],
+        "semaforo": nivel["semaforo"],
+    }
+
+
+def _calificacion(e):
+    """
+    Regresa la calificación guardada en la evaluación.
+    Las evaluaciones antiguas sin columnas precalculadas se califican
+    desde respuestas_json.
+    """
+    if e.semaforo is not None and e.score_calculado is not None:
+        return {
+            "score_calculado": e.score_calculado,
+            "score_resumen": e.score_resumen,
+            "nivel": e.nivel,
+            "semaforo": e.semaforo,
+        }
+
+    return _calificar(e.test_type, _parse_json(e.respuestas_json), score_fallback=e.score)
+
+
+def _evaluation_to_dict(e, incluir_respuestas: bool = True):
+    """
+    Convierte una evaluación a JSON de respuesta.
+    El score sale de la calificación precalculada; respuestas_json solo
+    se decodifica si se piden las respuestas.
+    """
+    if not e:
+        return None
+
+    data = {
         "id": e.id,
         "user_id": e.user_id,
         "evaluador_id": e.evaluador_id,
         "test_type": e.test_type,
-        "score": score_calculado,
+        "score": _calificacion(e)["score_calculado"],
         "observaciones": e.observaciones,
         "fecha": e.fecha_aplicacion.isoformat() if e.fecha_aplicacion else None,
         "fecha_aplicacion": e.fecha_aplicacion.isoformat() if e.fecha_aplicacion else None,
-        "respuestas": parsed,
     }
 
+    if incluir_respuestas:
+        data["respuestas"] = _parse_json(e.respuestas_json)
+
+    return data
+
+
+def _consulta_ultimas_evaluaciones(db: Session, test_types, user_id: int | None = None):
+    """
+    Consulta la evaluación más reciente de cada (usuario, instrumento)
+    en una sola consulta con ROW_NUMBER().
+    Si se indica user_id, se limita a ese paciente.
+    """
+    orden = func.row_number().over(
+        partition_by=(Evaluation.user_id, Evaluation.test_type),
+        order_by=(Evaluation.fecha_aplicacion.desc(), Evaluation.id.desc()),
+    ).label("orden")
+
+    filtros = [Evaluation.test_type.in_(list(test_types))]
+    if user_id is not None:
+        filtros.append(Evaluation.user_id == user_id)
+
+    recientes = (
+        db.query(Evaluation.id.label("id"), orden)
+        .filter(*filtros)
+        .subquery()
+    )
+
+    return (
+        db.query(Evaluation)
+        .join(recientes, recientes.c.id == Evaluation.id)
+        .filter(recientes.c.orden == 1)
+    )
+
 
 def _nivel_resumen(score: int, score_maximo: int, mayor_mejor: bool):
     if score_maximo <= 0:
@@ -208,38 +304,192 @@ def _nivel_resumen(score: int, score_maximo: int, mayor_mejor: bool):
 
 def _item_resumen(e, config):
     data = _evaluation_to_dict(e)
-    respuestas = data.get("respuestas") or {}
-
-    score = data.get("score") or 0
-    campo_score = config.get("usar_score_respuestas")
-
-    if campo_score and isinstance(respuestas, dict) and respuestas.get(campo_score) is not None:
-        try:
-            score = int(respuestas.get(campo_score))
-        except Exception:
-            score = data.get("score") or 0
-
+    calificacion = _calificacion(e)
     score_maximo = int(config.get("score_maximo", 0))
     mayor_mejor = bool(config.get("mayor_mejor", True))
-    nivel = _nivel_resumen(score, score_maximo, mayor_mejor)
 
     return {
         "key": config.get("key"),
         "titulo": config.get("titulo"),
         "test_type": data.get("test_type"),
-        "score": score,
+        "score": calificacion["score_resumen"],
         "score_maximo": score_maximo,
         "mayor_mejor": mayor_mejor,
-        "nivel": nivel["nivel"],
-        "semaforo": nivel["semaforo"],
+        "nivel": calificacion["nivel"],
+        "semaforo": calificacion["semaforo"],
         "fecha": data.get("fecha"),
         "fecha_aplicacion": data.get("fecha_aplicacion"),
-        "respuestas": respuestas,
+        "respuestas": data.get("respuestas") or {},
         "evaluacion_id": data.get("id"),
         "score_original": data.get("score"),
     }
 
 
+# ============================================================
+# TABLA evaluation_summary
+# Guarda la última evaluación calificada por instrumento para que el
+# resumen general se lea directo, sin recalcular scores ni semáforos.
+# ============================================================
+
+def _datos_resumen(e):
+    """
+    Valores que se guardan en evaluation_summary para una evaluación.
+    """
+    calificacion = _calificacion(e)
+
+    return {
+        "evaluation_id": e.id,
+        "evaluador_id": e.evaluador_id,
+        "score": calificacion["score_calculado"],
+        "score_resumen": calificacion["score_resumen"],
+        "nivel": calificacion["nivel"],
+        "semaforo": calificacion["semaforo"],
+        "observaciones": e.observaciones,
+        "respuestas_json": e.respuestas_json,
+        "fecha_aplicacion": e.fecha_aplicacion,
+    }
+
+
+def calcular_scores_pendientes(db: Session, lote: int = 500) -> int:
+    """
+    Llena score_calculado, score_resumen, nivel y semaforo en evaluaciones
+    antiguas que se guardaron antes de precalcularlos.
+    Se usa como migración única (python manage.py calcular-scores).
+    Regresa el número de evaluaciones actualizadas.
+    """
+    total = 0
+    ultimo_id = 0
+
+    while True:
+        evaluaciones = (
+            db.query(Evaluation)
+            .filter(Evaluation.semaforo.is_(None), Evaluation.id > ultimo_id)
+            .order_by(Evaluation.id.asc())
+            .limit(lote)
+            .all()
+        )
+
+        if not evaluaciones:
+            break
+
+        for e in evaluaciones:
+            calificacion = _calificar(
+                e.test_type,
+                _parse_json(e.respuestas_json),
+                score_fallback=e.score,
+            )
+            for key, value in calificacion.items():
+                setattr(e, key, value)
+
+        ultimo_id = evaluaciones[-1].id
+        total += len(evaluaciones)
+        db.commit()
+
+    return total
+
+
+def _actualizar_resumen(db: Session, e):
+    """
+    Actualiza la fila de evaluation_summary del paciente e instrumento.
+    No hace commit: se guarda en la misma transacción que la evaluación.
+    """
+    if e.test_type not in RESUMEN_TEST_TYPES:
+        return
+
+    consulta = db.query(EvaluationSummary).filter(
+        EvaluationSummary.user_id == e.user_id,
+        EvaluationSummary.test_type == e.test_type,
+    )
+
+    resumen = consulta.first()
+
+    if not resumen:
+        # Dos primeras evaluaciones simultáneas del mismo instrumento: la
+        # que pierde la carrera choca con uq_evaluation_summary_user_test
+        # (solo se revierte el SAVEPOINT) y actualiza la fila de la otra.
+        try:
+            with db.begin_nested():
+                db.add(EvaluationSummary(user_id=e.user_id, test_type=e.test_type, **_datos_resumen(e)))
+            return
+        except IntegrityError:
+            resumen = consulta.with_for_update().first()
+
+    # No reemplazar un resumen con una evaluación más antigua.
+    if (
+        resumen.fecha_aplicacion
+        and e.fecha_aplicacion
+        and resumen.fecha_aplicacion > e.fecha_aplicacion
+    ):
+        return
+
+    for key, value in _datos_resumen(e).items():
+        setattr(resumen, key, value)
+
+
+def reconstruir_resumenes(db: Session, user_id: int | None = None) -> int:
+    """
+    Reconstruye evaluation_summary a partir de la tabla evaluations.
+    Se usa como backfill (python manage.py reconstruir-resumen).
+    Regresa el número de filas escritas.
+    """
+    anteriores = db.query(EvaluationSummary)
+    if user_id is not None:
+        anteriores = anteriores.filter(EvaluationSummary.user_id == user_id)
+    anteriores.delete(synchronize_session=False)
+
+    total = 0
+
+    for e in _consulta_ultimas_evaluaciones(db, RESUMEN_TEST_TYPES, user_id).yield_per(500):
+        db.add(EvaluationSummary(user_id=e.user_id, test_type=e.test_type, **_datos_resumen(e)))
+        total += 1
+
+    db.commit()
+
+    return total
+
+
+def _evaluacion_desde_resumen(resumen: EvaluationSummary):
+    """
+    Equivalente a _evaluation_to_dict, armado desde evaluation_summary.
+    """
+    fecha = resumen.fecha_aplicacion.isoformat() if resumen.fecha_aplicacion else None
+
+    return {
+        "id": resumen.evaluation_id,
+        "user_id": resumen.user_id,
+        "evaluador_id": resumen.evaluador_id,
+        "test_type": resumen.test_type,
+        "score": resumen.score,
+        "observaciones": resumen.observaciones,
+        "fecha": fecha,
+        "fecha_aplicacion": fecha,
+        "respuestas": _parse_json(resumen.respuestas_json),
+    }
+
+
+def _item_desde_resumen(resumen: EvaluationSummary, config):
+    """
+    Equivalente a _item_resumen, armado desde evaluation_summary.
+    """
+    data = _evaluacion_desde_resumen(resumen)
+
+    return {
+        "key": config.get("key"),
+        "titulo": config.get("titulo"),
+        "test_type": resumen.test_type,
+        "score": resumen.score_resumen,
+        "score_maximo": int(config.get("score_maximo", 0)),
+        "mayor_mejor": bool(config.get("mayor_mejor", True)),
+        "nivel": resumen.nivel,
+        "semaforo": resumen.semaforo,
+        "fecha": data.get("fecha"),
+        "fecha_aplicacion": data.get("fecha_aplicacion"),
+        "respuestas": data.get("respuestas") or {},
+        "evaluacion_id": resumen.evaluation_id,
+        "score_original": resumen.score,
+    }
+
+
 # ============================================================
 # GUARDAR EVALUACIÓN GENERAL
 # AUTOMANEJO PACIENTE / PROFESIONAL / TESTS PACIENTE
@@ -257,7 +507,7 @@ def create_evaluation(payload: dict, db: Session = Depends(get_db)):
     test_type = payload.get("test_type")
     respuestas = _obtener_respuestas_desde_payload(payload)
 
-    score_calculado = _calcular_score_automanejo(
+    calificacion = _calificar(
         test_type,
         respuestas,
         score_fallback=payload.get("score"),
@@ -267,13 +517,18 @@ def create_evaluation(payload: dict, db: Session = Depends(get_db)):
         user_id=payload.get("user_id"),
         evaluador_id=payload.get("evaluador_id"),
         test_type=test_type,
-        score=score_calculado,
+        score=calificacion["score_calculado"],
         observaciones=payload.get("observaciones", ""),
         respuestas_json=json.dumps(respuestas),
         fecha_aplicacion=datetime.utcnow(),
+        **calificacion,
     )
 
     db.add(new_eval)
+    db.flush()
+
+    _actualizar_resumen(db, new_eval)
+
     db.commit()
     db.refresh(new_eval)
 
@@ -283,12 +538,15 @@ def create_evaluation(payload: dict, db: Session = Depends(get_db)):
 # ============================================================
 # RESUMEN GENERAL DEL PACIENTE
 # Devuelve la última evaluación disponible por instrumento.
+# Se lee de evaluation_summary, que se mantiene al guardar evaluaciones.
+# Las rutas de lectura (resumen, historial, listado) son async: la
+# consulta corre con AsyncSession.run_sync sobre aiomysql.
 # ============================================================
 
 @router.get("/resumen-general/{user_id}")
-def resumen_general_paciente(
+async def resumen_general_paciente(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
 ):
     # El paciente puede ver su propio resumen.
@@ -296,12 +554,22 @@ def resumen_general_paciente(
     if current_user["id"] != user_id and current_user.get("user_type") != "profesional":
         raise HTTPException(status_code=403, detail="Acceso restringido")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    return await db.run_sync(_resumen_general, user_id)
 
-    if not user:
+
+def _resumen_general(db: Session, user_id: int):
+    fila = (
+        db.query(User, Profile)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+
+    if not fila:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
+    user, profile = fila
+
     nombre_perfil = ""
     if profile:
         nombre_perfil = f"{profile.nombre or ''} {profile.apellido or ''}".strip()
@@ -315,21 +583,20 @@ def resumen_general_paciente(
         "email": user.email,
     }
 
+    resumenes = {
+        r.test_type: r
+        for r in db.query(EvaluationSummary)
+        .filter(EvaluationSummary.user_id == user_id)
+        .all()
+    }
+
     items = []
 
     for test_type, config in TEST_RESUMEN_CONFIG.items():
-        evaluacion = (
-            db.query(Evaluation)
-            .filter(
-                Evaluation.user_id == user_id,
-                Evaluation.test_type == test_type,
-            )
-            .order_by(Evaluation.fecha_aplicacion.desc())
-            .first()
-        )
+        resumen = resumenes.get(test_type)
 
-        if evaluacion:
-            items.append(_item_resumen(evaluacion, config))
+        if resumen:
+            items.append(_item_desde_resumen(resumen, config))
         else:
             items.append({
                 "key": config.get("key"),
@@ -346,19 +613,11 @@ def resumen_general_paciente(
                 "evaluacion_id": None,
             })
 
-    profesional = (
-        db.query(Evaluation)
-        .filter(
-            Evaluation.user_id == user_id,
-            Evaluation.test_type == "automanejo_prof",
-        )
-        .order_by(Evaluation.fecha_aplicacion.desc())
-        .first()
-    )
+    profesional = resumenes.get("automanejo_prof")
 
     automanejo_prof = None
     if profesional:
-        automanejo_prof = _evaluation_to_dict(profesional)
+        automanejo_prof = _evaluacion_desde_resumen(profesional)
 
     contestados = [i for i in items if i.get("score") is not None]
     fortalezas = len([i for i in contestados if i.get("semaforo") == "verde"])
@@ -517,14 +776,19 @@ def historial_competencias_profesionales(
 # ============================================================
 # HISTORIAL DE EVALUACIONES POR INSTRUMENTO
 # Devuelve todas las evaluaciones de un paciente para un test_type.
+# Con incluir_respuestas=false se omiten las respuestas (pantallas de gráficas).
+# Con limit/cursor se pagina por (fecha_aplicacion, id); usar next_cursor.
 # IMPORTANTE: esta ruta debe ir antes de /{user_id} para evitar conflicto.
 # ============================================================
 
 @router.get("/history/{user_id}/{test_type}")
-def historial_evaluaciones_por_instrumento(
+async def historial_evaluaciones_por_instrumento(
     user_id: int,
     test_type: str,
-    db: Session = Depends(get_db),
+    incluir_respuestas: bool = Query(True),
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
 ):
     # El paciente puede ver su propio historial.
@@ -532,6 +796,19 @@ def historial_evaluaciones_por_instrumento(
     if current_user["id"] != user_id and current_user.get("user_type") != "profesional":
         raise HTTPException(status_code=403, detail="Acceso restringido")
 
+    return await db.run_sync(
+        _historial_instrumento, user_id, test_type, incluir_respuestas, limit, cursor
+    )
+
+
+def _historial_instrumento(
+    db: Session,
+    user_id: int,
+    test_type: str,
+    incluir_respuestas: bool,
+    limit: int | None,
+    cursor: str | None,
+):
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
@@ -539,66 +816,79 @@ def historial_evaluaciones_por_instrumento(
 
     config = TEST_RESUMEN_CONFIG.get(test_type)
 
-    evaluaciones = (
+    query = (
         db.query(Evaluation)
         .filter(
             Evaluation.user_id == user_id,
             Evaluation.test_type == test_type,
         )
-        .order_by(Evaluation.fecha_aplicacion.asc())
-        .all()
     )
 
+    if cursor:
+        query = query.filter(
+            keyset_filter(Evaluation.fecha_aplicacion, Evaluation.id, cursor, descending=False)
+        )
+
+    query = query.order_by(Evaluation.fecha_aplicacion.asc(), Evaluation.id.asc())
+
+    next_cursor = None
+
+    if limit is None:
+        evaluaciones = query.all()
+    else:
+        evaluaciones, next_cursor = split_page(
+            query.limit(limit + 1).all(),
+            limit,
+            lambda e: (e.fecha_aplicacion, e.id),
+        )
+
     items = []
 
-    for e in evaluaciones:
-        data = _evaluation_to_dict(e)
-        respuestas = data.get("respuestas") or {}
-        score = data.get("score") or 0
-
-        # Caso especial: comunicación médico usa solo las preguntas 1 a 3.
-        if config and config.get("usar_score_respuestas"):
-            campo_score = config.get("usar_score_respuestas")
-            if isinstance(respuestas, dict) and respuestas.get(campo_score) is not None:
-                try:
-                    score = int(respuestas.get(campo_score))
-                except Exception:
-                    score = data.get("score") or 0
+    score_maximo = int(config.get("score_maximo", 0)) if config else None
+    mayor_mejor = bool(config.get("mayor_mejor", True)) if config else True
 
-        score_maximo = int(config.get("score_maximo", 0)) if config else None
-        mayor_mejor = bool(config.get("mayor_mejor", True)) if config else True
-        nivel = _nivel_resumen(score, score_maximo, mayor_mejor) if score_maximo else {
-            "nivel": "Sin interpretación",
-            "semaforo": "gris",
-        }
+    for e in evaluaciones:
+        data = _evaluation_to_dict(e, incluir_respuestas=incluir_respuestas)
+        calificacion = _calificacion(e)
 
-        items.append({
+        item = {
             "id": data.get("id"),
             "user_id": data.get("user_id"),
             "evaluador_id": data.get("evaluador_id"),
             "test_type": data.get("test_type"),
             "titulo": config.get("titulo") if config else test_type,
-            "score": score,
+            "score": calificacion["score_resumen"],
             "score_maximo": score_maximo,
             "mayor_mejor": mayor_mejor,
-            "nivel": nivel["nivel"],
-            "semaforo": nivel["semaforo"],
+            "nivel": calificacion["nivel"],
+            "semaforo": calificacion["semaforo"],
             "fecha": data.get("fecha"),
             "fecha_aplicacion": data.get("fecha_aplicacion"),
-            "respuestas": respuestas,
             "observaciones": data.get("observaciones"),
-        })
+        }
 
-    return {
+        if incluir_respuestas:
+            item["respuestas"] = data.get("respuestas") or {}
+
+        items.append(item)
+
+    respuesta = {
         "user_id": user_id,
         "test_type": test_type,
         "titulo": config.get("titulo") if config else test_type,
         "score_maximo": int(config.get("score_maximo", 0)) if config else None,
         "mayor_mejor": bool(config.get("mayor_mejor", True)) if config else True,
-        "total": len(items),
         "items": items,
+        "next_cursor": next_cursor,
     }
 
+    # "total" solo sin paginar: con limit sería el tamaño de la página,
+    # no el total del historial.
+    if limit is None:
+        respuesta["total"] = len(items)
+
+    return respuesta
+
 
 # ============================================================
 # COMPARACIÓN PACIENTE vs PROFESIONAL
@@ -718,23 +1008,54 @@ def ultimo_automanejo_paciente(
 
 # ============================================================
 # OBTENER HISTORIAL DE EVALUACIONES GENERAL
+# Con incluir_respuestas=false se omiten las respuestas.
+# Con limit/cursor regresa {"items": [...], "next_cursor": ...}.
 # IMPORTANTE: esta ruta dinámica debe ir hasta el final.
 # ============================================================
 
 @router.get("/{user_id}")
-def get_evaluations(
+async def get_evaluations(
     user_id: int,
-    db: Session = Depends(get_db),
+    incluir_respuestas: bool = Query(True),
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
 ):
     if current_user["id"] != user_id and current_user.get("user_type") != "profesional":
         raise HTTPException(status_code=403, detail="Acceso restringido")
 
-    evaluations = (
-        db.query(Evaluation)
-        .filter(Evaluation.user_id == user_id)
-        .order_by(Evaluation.fecha_aplicacion.desc())
-        .all()
+    return await db.run_sync(_listar_evaluaciones, user_id, incluir_respuestas, limit, cursor)
+
+
+def _listar_evaluaciones(
+    db: Session,
+    user_id: int,
+    incluir_respuestas: bool,
+    limit: int | None,
+    cursor: str | None,
+):
+    query = db.query(Evaluation).filter(Evaluation.user_id == user_id)
+
+    if cursor:
+        query = query.filter(
+            keyset_filter(Evaluation.fecha_aplicacion, Evaluation.id, cursor, descending=True)
+        )
+
+    query = query.order_by(Evaluation.fecha_aplicacion.desc(), Evaluation.id.desc())
+
+    # Sin limit se conserva la respuesta original (lista completa).
+    if limit is None:
+        return [_evaluation_to_dict(e, incluir_respuestas=incluir_respuestas) for e in query.all()]
+
+    evaluations, next_cursor = split_page(
+        query.limit(limit + 1).all(),
+        limit,
+        lambda e: (e.fecha_aplicacion, e.id),
     )
 
-    return [_evaluation_to_dict(e) for e in evaluations]
+    return {
+        "user_id": user_id,
+        "items": [_evaluation_to_dict(e, incluir_respuestas=incluir_respuestas) for e in evaluations],
+        "next_cursor": next_cursor,
+    }
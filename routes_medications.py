@@ -2,13 +2,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from db import get_db
-from models import PatientMedication, User
+from models import PatientMedication
 from schemas import (
     PatientMedicationCreate,
     PatientMedicationUpdate,
     PatientMedicationOut,
 )
-from auth import get_current_user
+from auth import get_current_account
 
 router = APIRouter(prefix="/api/medications", tags=["Medicamentos del paciente"])
 
@@ -26,10 +26,8 @@ FRECUENCIAS_PERMITIDAS = {
 }
 
 
-def _validar_usuario_paciente(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+def _validar_usuario_paciente(cuenta):
+    user, _ = cuenta
     if user.user_type != "paciente":
         raise HTTPException(status_code=403, detail="Este módulo es para pacientes")
     return user
@@ -45,10 +43,9 @@ def _normalizar_frecuencia(frecuencia_texto: str, frecuencia_horas: int | None):
 def listar_medicamentos(
     incluir_inactivos: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    user_id = current_user["id"]
-    _validar_usuario_paciente(db, user_id)
+    user_id = _validar_usuario_paciente(cuenta).id
 
     query = db.query(PatientMedication).filter(PatientMedication.user_id == user_id)
 
@@ -62,10 +59,9 @@ def listar_medicamentos(
 def crear_medicamento(
     payload: PatientMedicationCreate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    user_id = current_user["id"]
-    _validar_usuario_paciente(db, user_id)
+    user_id = _validar_usuario_paciente(cuenta).id
 
     frecuencia_horas = _normalizar_frecuencia(
         payload.frecuencia_texto,
@@ -100,10 +96,9 @@ def actualizar_medicamento(
     medication_id: int,
     payload: PatientMedicationUpdate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    user_id = current_user["id"]
-    _validar_usuario_paciente(db, user_id)
+    user_id = _validar_usuario_paciente(cuenta).id
 
     medicamento = (
         db.query(PatientMedication)
@@ -138,10 +133,9 @@ def actualizar_medicamento(
 def desactivar_medicamento(
     medication_id: int,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    cuenta=Depends(get_current_account),
 ):
-    user_id = current_user["id"]
-    _validar_usuario_paciente(db, user_id)
+    user_id = _validar_usuario_paciente(cuenta).id
 
     medicamento = (
         db.query(PatientMedication)
@@ -1,12 +1,13 @@
 # routes_plan_trabajo.py
 
 from datetime import datetime
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session, selectinload
 
 from db import get_db
 from models import PlanTrabajo, ObjetivoPlan
-from schemas import PlanTrabajoCreate
+from schemas import PlanEvaluacionIn, PlanTrabajoCreate
+from pagination import MAX_LIMIT, keyset_filter, split_page
 
 router = APIRouter(prefix="/api/plan", tags=["Plan Trabajo"])
 
@@ -38,6 +39,14 @@ def _serializar_plan(plan: PlanTrabajo):
     }
 
 
+def _planes_con_objetivos(db: Session):
+    """
+    Consulta de planes que carga los objetivos de todos los planes
+    en una sola consulta adicional (en lugar de una por plan).
+    """
+    return db.query(PlanTrabajo).options(selectinload(PlanTrabajo.objetivos))
+
+
 # ================================================================
 # CREAR PLAN DE TRABAJO
 # ================================================================
@@ -50,17 +59,12 @@ def crear_plan(data: PlanTrabajoCreate, db: Session = Depends(get_db)):
     meta, acción, fecha de revisión y cumplimiento.
     """
 
-    planes_activos = (
-        db.query(PlanTrabajo)
-        .filter(
-            PlanTrabajo.paciente_id == data.paciente_id,
-            PlanTrabajo.estado == "activo",
-        )
-        .all()
-    )
-
-    for plan in planes_activos:
-        plan.estado = "cerrado"
+    # Todo en una sola transacción: no queda un plan sin objetivos
+    # ni planes anteriores cerrados sin el plan nuevo.
+    db.query(PlanTrabajo).filter(
+        PlanTrabajo.paciente_id == data.paciente_id,
+        PlanTrabajo.estado == "activo",
+    ).update({PlanTrabajo.estado: "cerrado"}, synchronize_session=False)
 
     nuevo_plan = PlanTrabajo(
         paciente_id=data.paciente_id,
@@ -74,27 +78,31 @@ def crear_plan(data: PlanTrabajoCreate, db: Session = Depends(get_db)):
     )
 
     db.add(nuevo_plan)
-    db.commit()
-    db.refresh(nuevo_plan)
-
-    for obj in data.objetivos:
-        nuevo_obj = ObjetivoPlan(
-            plan_id=nuevo_plan.id,
-            descripcion=obj.descripcion,
-            actividad=obj.actividad,
-            recursos=obj.recursos,
-            seguimiento=obj.seguimiento,
-            fecha_revision=obj.fecha_revision,
-            cumplimiento=obj.cumplimiento,
+    db.flush()  # obtiene nuevo_plan.id sin confirmar la transacción
+
+    if data.objetivos:
+        db.bulk_insert_mappings(
+            ObjetivoPlan,
+            [
+                {
+                    "plan_id": nuevo_plan.id,
+                    "descripcion": obj.descripcion,
+                    "actividad": obj.actividad,
+                    "recursos": obj.recursos,
+                    "seguimiento": obj.seguimiento,
+                    "fecha_revision": obj.fecha_revision,
+                    "cumplimiento": obj.cumplimiento,
+                }
+                for obj in data.objetivos
+            ],
         )
-        db.add(nuevo_obj)
 
+    plan_id = nuevo_plan.id
     db.commit()
-    db.refresh(nuevo_plan)
 
     return {
         "message": "Plan creado correctamente",
-        "plan_id": nuevo_plan.id,
+        "plan_id": plan_id,
     }
 
 
@@ -104,7 +112,7 @@ def crear_plan(data: PlanTrabajoCreate, db: Session = Depends(get_db)):
 @router.get("/ultimo/{paciente_id}")
 def obtener_ultimo_plan(paciente_id: int, db: Session = Depends(get_db)):
     plan = (
-        db.query(PlanTrabajo)
+        _planes_con_objetivos(db)
         .filter(PlanTrabajo.paciente_id == paciente_id)
         .order_by(PlanTrabajo.fecha_creacion.desc())
         .first()
@@ -118,17 +126,39 @@ def obtener_ultimo_plan(paciente_id: int, db: Session = Depends(get_db)):
 
 # ================================================================
 # OBTENER HISTORIAL DE PLANES
+# Con limit/cursor regresa {"items": [...], "next_cursor": ...}.
 # ================================================================
 @router.get("/historial/{paciente_id}")
-def historial_planes(paciente_id: int, db: Session = Depends(get_db)):
-    planes = (
-        db.query(PlanTrabajo)
-        .filter(PlanTrabajo.paciente_id == paciente_id)
-        .order_by(PlanTrabajo.fecha_creacion.desc())
-        .all()
+def historial_planes(
+    paciente_id: int,
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    query = _planes_con_objetivos(db).filter(PlanTrabajo.paciente_id == paciente_id)
+
+    if cursor:
+        query = query.filter(
+            keyset_filter(PlanTrabajo.fecha_creacion, PlanTrabajo.id, cursor, descending=True)
+        )
+
+    query = query.order_by(PlanTrabajo.fecha_creacion.desc(), PlanTrabajo.id.desc())
+
+    # Sin limit se conserva la respuesta original (lista completa).
+    if limit is None:
+        return [_serializar_plan(plan) for plan in query.all()]
+
+    planes, next_cursor = split_page(
+        query.limit(limit + 1).all(),
+        limit,
+        lambda plan: (plan.fecha_creacion, plan.id),
     )
 
-    return [_serializar_plan(plan) for plan in planes]
+    return {
+        "paciente_id": paciente_id,
+        "items": [_serializar_plan(plan) for plan in planes],
+        "next_cursor": next_cursor,
+    }
 
 
 # ================================================================
@@ -136,7 +166,7 @@ def historial_planes(paciente_id: int, db: Session = Depends(get_db)):
 # ================================================================
 @router.get("/{plan_id}")
 def obtener_plan_detalle(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(PlanTrabajo).filter(PlanTrabajo.id == plan_id).first()
+    plan = _planes_con_objetivos(db).filter(PlanTrabajo.id == plan_id).first()
 
     if not plan:
         return {"message": "Plan no encontrado"}
@@ -194,7 +224,7 @@ def actualizar_cumplimiento(
 @router.put("/evaluar/{plan_id}")
 def evaluar_plan(
     plan_id: int,
-    data: dict,
+    data: PlanEvaluacionIn,
     db: Session = Depends(get_db),
 ):
     plan = db.query(PlanTrabajo).filter(PlanTrabajo.id == plan_id).first()
@@ -202,28 +232,51 @@ def evaluar_plan(
     if not plan:
         return {"message": "Plan no encontrado"}
 
-    objetivos_data = data.get("objetivos", [])
+    # Solo los campos enviados: seguimiento / fecha_revision ausentes no se tocan.
+    objetivos_data = [obj.model_dump(exclude_unset=True) for obj in data.objetivos]
 
-    for obj_data in objetivos_data:
-        objetivo = (
-            db.query(ObjetivoPlan)
-            .filter(
-                ObjetivoPlan.id == obj_data.get("id"),
-                ObjetivoPlan.plan_id == plan_id,
-            )
-            .first()
+    # Solo se actualizan objetivos que pertenecen al plan; se consultan todos juntos.
+    ids_solicitados = [obj_data.get("id") for obj_data in objetivos_data]
+    ids_del_plan = {
+        objetivo_id
+        for (objetivo_id,) in db.query(ObjetivoPlan.id).filter(
+            ObjetivoPlan.plan_id == plan_id,
+            ObjetivoPlan.id.in_([i for i in ids_solicitados if i is not None]),
         )
+    }
 
-        if objetivo:
-            cumplimiento = int(obj_data.get("cumplimiento", 0))
-            objetivo.cumplimiento = max(0, min(100, cumplimiento))
+    cambios = []
+    resultados = []
 
-            if "seguimiento" in obj_data:
-                objetivo.seguimiento = obj_data.get("seguimiento")
+    for obj_data in objetivos_data:
+        objetivo_id = obj_data.get("id")
 
-            if "fecha_revision" in obj_data:
-                objetivo.fecha_revision = obj_data.get("fecha_revision")
+        if objetivo_id not in ids_del_plan:
+            resultados.append({"id": objetivo_id, "actualizado": False})
+            continue
+
+        cumplimiento = obj_data.get("cumplimiento", 0)
+        cambio = {
+            "id": objetivo_id,
+            "cumplimiento": max(0, min(100, cumplimiento)),
+        }
+
+        if "seguimiento" in obj_data:
+            cambio["seguimiento"] = obj_data.get("seguimiento")
+
+        if "fecha_revision" in obj_data:
+            cambio["fecha_revision"] = obj_data.get("fecha_revision")
+
+        cambios.append(cambio)
+        resultados.append({**cambio, "actualizado": True})
+
+    # UPDATE por id en lote (executemany), en lugar de un SELECT + UPDATE por objetivo.
+    if cambios:
+        db.bulk_update_mappings(ObjetivoPlan, cambios)
 
     db.commit()
 
-    return {"message": "Evaluación guardada correctamente"}
+    return {
+        "message": "Evaluación guardada correctamente",
+        "objetivos": resultados,
+    }
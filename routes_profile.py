@@ -1,12 +1,16 @@
 # routes_profile.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import re
 
-from db import get_db
+from db import get_db, get_async_db
 from models import User, Profile
+from pagination import MAX_LIMIT, decode_id_cursor, split_page
+from patient_search import buscar_pacientes, filtro_terminos, indexar_paciente
 from schemas import ProfileIn, ProfileOut
-from auth import get_current_user
+from auth import get_current_user, get_current_account, get_current_account_async, cargar_cuenta
+from user_names import invalidar_nombre
 
 
 router = APIRouter(prefix="/api", tags=["Perfil"])
@@ -168,13 +172,10 @@ def _profile_response(user: User, profile: Profile | None):
 def create_or_update_profile(
     payload: ProfileIn,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    cuenta=Depends(get_current_account)
 ):
-    user_id = current_user["id"]
-    user = db.query(User).filter(User.id == user_id).first()
-
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
+    user, profile = cuenta
+    user_id = user.id
 
     payload_data = _payload_to_dict(payload)
 
@@ -186,9 +187,6 @@ def create_or_update_profile(
         # Mantener profiles.telefono como copia de compatibilidad.
         payload_data["telefono"] = parsed_phone["phone_number"]
 
-    # Buscar perfil
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
-
     if not profile:
         profile = Profile(user_id=user_id, **payload_data)
         db.add(profile)
@@ -196,20 +194,25 @@ def create_or_update_profile(
         for key, value in payload_data.items():
             setattr(profile, key, value)
 
+    indexar_paciente(db, user, profile)
+
     db.commit()
     db.refresh(user)
     db.refresh(profile)
 
+    invalidar_nombre(user_id)
+
     return _profile_response(user, profile)
 
 
 # ================================================================
 # OBTENER PERFIL
 # ================================================================
+# Lecturas de perfil async (AsyncSession + aiomysql).
 @router.get("/profile/{user_id}", response_model=ProfileOut)
-def get_profile(
+async def get_profile(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     # El usuario puede consultar su propio perfil.
@@ -217,12 +220,7 @@ def get_profile(
     if current_user["id"] != user_id and current_user.get("user_type") != "profesional":
         raise HTTPException(403, "Acceso restringido")
 
-    user = db.query(User).filter(User.id == user_id).first()
-
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
-
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    user, profile = await db.run_sync(cargar_cuenta, user_id)
 
     return _profile_response(user, profile)
 
@@ -231,16 +229,10 @@ def get_profile(
 # PERFIL DEL USUARIO LOGEADO
 # ================================================================
 @router.get("/me")
-def get_my_profile(
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_profile(
+    cuenta=Depends(get_current_account_async)
 ):
-    user = db.query(User).filter(User.id == current_user["id"]).first()
-
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
-
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    user, profile = cuenta
 
     return {
         "id": user.id,
@@ -258,33 +250,94 @@ def get_my_profile(
 
 
 # ================================================================
-# LISTA SIMPLE DE PACIENTES
+# LISTADO DE PACIENTES (PAGINADO Y FILTRABLE)
 # ================================================================
+# Sin `limit` se regresa la lista completa como antes (compatibilidad con
+# la app); con `limit` se regresa {"items", "next_cursor"} ordenado por id.
+# `q` busca por prefijo sin acentos: cada palabra debe coincidir con el
+# inicio de alguna palabra del nombre, apellido, NSS o teléfono, resuelto
+# sobre patient_search_terms (ver patient_search.py).
+def _paginar_pacientes(query, limit: int | None, cursor: str | None, id_fila, serializar):
+    if cursor:
+        query = query.filter(User.id > decode_id_cursor(cursor))
+
+    query = query.order_by(User.id.asc())
+
+    if limit is None:
+        return [serializar(fila) for fila in query.all()]
+
+    filas, next_cursor = split_page(
+        query.limit(limit + 1).all(),
+        limit,
+        lambda fila: (id_fila(fila),),
+    )
+
+    return {
+        "items": [serializar(fila) for fila in filas],
+        "next_cursor": next_cursor,
+    }
+
+
+def _paciente_dict(p: User) -> dict:
+    return {
+        "id": p.id,
+        "full_name": p.full_name,
+        "email": p.email,
+        "user_type": p.user_type,
+
+        # Teléfono oficial de la cuenta
+        "telefono": p.phone_number,
+        "country_code": p.country_code,
+        "phone_national": p.phone_national,
+        "phone_number": p.phone_number,
+    }
+
+
+def _paciente_detalle_dict(fila) -> dict:
+    user, profile = fila
+
+    return {
+        "id": user.id,
+        "nombre": profile.nombre,
+        "apellido": profile.apellido,
+        "full_name": f"{profile.nombre or ''} {profile.apellido or ''}".strip(),
+        "nss": profile.nss or "00000",
+
+        # Teléfono oficial de la cuenta
+        "telefono": user.phone_number or profile.telefono,
+        "country_code": user.country_code,
+        "phone_national": user.phone_national,
+        "phone_number": user.phone_number,
+
+        "unidad_medica": profile.unidad_medica,
+    }
+
+
 @router.get("/pacientes")
 def listar_pacientes(
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None),
+    unidad_medica: str | None = Query(None),
+    q: str | None = Query(None, max_length=100),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.get("user_type") != "profesional":
         raise HTTPException(403, "Acceso restringido a profesionales")
 
-    pacientes = db.query(User).filter(User.user_type == "paciente").all()
+    query = db.query(User).filter(User.user_type == "paciente")
 
-    return [
-        {
-            "id": p.id,
-            "full_name": p.full_name,
-            "email": p.email,
-            "user_type": p.user_type,
+    # El perfil solo se une cuando se filtra por unidad médica.
+    if unidad_medica:
+        query = (
+            query.outerjoin(Profile, Profile.user_id == User.id)
+            .filter(Profile.unidad_medica == unidad_medica)
+        )
 
-            # Teléfono oficial de la cuenta
-            "telefono": p.phone_number,
-            "country_code": p.country_code,
-            "phone_national": p.phone_national,
-            "phone_number": p.phone_number,
-        }
-        for p in pacientes
-    ]
+    if q:
+        query = query.filter(*filtro_terminos(User.id, q))
+
+    return _paginar_pacientes(query, limit, cursor, lambda p: p.id, _paciente_dict)
 
 
 # ================================================================
@@ -292,39 +345,67 @@ def listar_pacientes(
 # ================================================================
 @router.get("/pacientes/detalle")
 def listar_pacientes_detalle(
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None),
+    unidad_medica: str | None = Query(None),
+    q: str | None = Query(None, max_length=100),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.get("user_type") != "profesional":
         raise HTTPException(403, "Acceso restringido")
 
-    pacientes = (
+    query = (
         db.query(User, Profile)
         .join(Profile, Profile.user_id == User.id)
         .filter(User.user_type == "paciente")
-        .all()
     )
 
-    resultado = []
+    if unidad_medica:
+        query = query.filter(Profile.unidad_medica == unidad_medica)
 
-    for user, profile in pacientes:
-        resultado.append({
+    if q:
+        query = query.filter(*filtro_terminos(User.id, q))
+
+    return _paginar_pacientes(
+        query, limit, cursor, lambda fila: fila[0].id, _paciente_detalle_dict
+    )
+
+
+# ================================================================
+# BÚSQUEDA DE PACIENTES (TYPEAHEAD)
+# ================================================================
+# Sin acentos y por prefijo de cada palabra, ordenada por relevancia
+# (ver patient_search.py).
+@router.get("/pacientes/buscar")
+async def buscar_pacientes_endpoint(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    unidad_medica: str | None = Query(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if current_user.get("user_type") != "profesional":
+        raise HTTPException(403, "Acceso restringido a profesionales")
+
+    filas = await db.run_sync(buscar_pacientes, q, limit, unidad_medica)
+
+    return [
+        {
             "id": user.id,
-            "nombre": profile.nombre,
-            "apellido": profile.apellido,
-            "full_name": f"{profile.nombre or ''} {profile.apellido or ''}".strip(),
-            "nss": profile.nss or "00000",
+            "nombre": profile.nombre if profile else None,
+            "apellido": profile.apellido if profile else None,
+            "full_name": user.full_name,
+            "nss": profile.nss if profile else None,
 
             # Teléfono oficial de la cuenta
-            "telefono": user.phone_number or profile.telefono,
-            "country_code": user.country_code,
-            "phone_national": user.phone_national,
+            "telefono": user.phone_number,
             "phone_number": user.phone_number,
 
-            "unidad_medica": profile.unidad_medica,
-        })
-
-    return resultado
+            "unidad_medica": profile.unidad_medica if profile else None,
+        }
+        for user, profile in filas
+    ]
 
 
 # ================================================================
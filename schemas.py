@@ -2,6 +2,7 @@
 from pydantic import BaseModel, EmailStr, field_validator, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import math
 import re
 
 
@@ -423,6 +424,27 @@ class PlanTrabajoCreate(BaseModel):
     objetivos: List[ObjetivoPlanCreate]
 
 
+class ObjetivoEvaluacionIn(BaseModel):
+    # "5" se acepta como 5 (antes MySQL convertía el texto al comparar);
+    # un id que no es número responde 422.
+    id: Optional[int] = None
+    cumplimiento: float = 0
+    seguimiento: Optional[str] = None
+    fecha_revision: Optional[str] = None
+
+    @field_validator("cumplimiento")
+    @classmethod
+    def truncar_cumplimiento(cls, value):
+        # La app puede mandar 87.5; se guarda como entero, igual que antes.
+        if not math.isfinite(value):
+            raise ValueError("cumplimiento debe ser un número")
+        return int(value)
+
+
+class PlanEvaluacionIn(BaseModel):
+    objetivos: List[ObjetivoEvaluacionIn] = []
+
+
 class PlanTrabajoOut(BaseModel):
     id: int
     paciente_id: int
@@ -0,0 +1,16 @@
+# tests/conftest.py
+"""
+Las pruebas corren contra un SQLite temporal: DATABASE_URL se fija antes
+de importar db.py, que crea los engines al importarse.
+"""
+import os
+import sys
+import tempfile
+
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="etiaam_tests_"), "test.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ.setdefault("EMAIL_WORKER_ENABLED", "0")
+os.environ.setdefault("REMINDER_WORKER_ENABLED", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+# tests/test_auth.py
+"""
+Registro, login y restablecimiento de contraseña de punta a punta. Son
+handlers async que esperan a Argon2 y consultan con AsyncSession.run_sync.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db as db_module
+import password_hashing
+from app import app
+from auth import sha256_hex
+from models import PasswordResetCode, User
+
+
+EMAIL = "paciente@example.com"
+
+REGISTRO = {
+    "email": "Paciente@Example.com",
+    "password": "Clave#123",
+    "full_name": "María Peña",
+    "user_type": "paciente",
+    "country_code": "+52",
+    "phone_national": "8331234567",
+    "phone_number": "+528331234567",
+    "consent_version": "v1",
+    "consent_text": "Acepto",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    # Argon2 en un hilo en lugar del pool de procesos.
+    monkeypatch.setattr(password_hashing, "HASH_POOL_SIZE", 0)
+
+    client = TestClient(app)
+    assert client.post("/register", json=REGISTRO).status_code == 200
+    return client
+
+
+def _login(client, identifier, password, **extra):
+    return client.post("/login", json={"identifier": identifier, "password": password, **extra})
+
+
+def _reset(client, new_password="Nueva#456"):
+    return client.post("/password/reset", json={
+        "email": EMAIL, "code": "123456", "new_password": new_password,
+    })
+
+
+def _guardar_codigo(expires_at):
+    sesion = db_module.SessionLocal()
+    try:
+        user = sesion.query(User).filter(User.email == EMAIL).one()
+        sesion.add(PasswordResetCode(
+            user_id=user.id, code_hash=sha256_hex("123456"), expires_at=expires_at, used=0,
+        ))
+        sesion.commit()
+    finally:
+        sesion.close()
+
+
+def _codigo_usado() -> int:
+    sesion = db_module.SessionLocal()
+    try:
+        return sesion.query(PasswordResetCode).one().used
+    finally:
+        sesion.close()
+
+
+def test_registro_y_login(client):
+    assert client.post("/register", json=REGISTRO).status_code == 409
+
+    respuesta = _login(client, EMAIL, "Clave#123")
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["email"] == EMAIL
+
+    assert _login(client, "8331234567", "Clave#123", country_code="+52").status_code == 200
+    assert _login(client, EMAIL, "otra").status_code == 401
+
+
+def test_restablecer_contrasena(client):
+    _guardar_codigo(datetime.utcnow() + timedelta(minutes=10))
+
+    respuesta = _reset(client)
+    assert respuesta.status_code == 200, respuesta.text
+    assert _codigo_usado() == 1
+
+    assert _login(client, EMAIL, "Nueva#456").status_code == 200
+    assert _login(client, EMAIL, "Clave#123").status_code == 401
+
+
+def test_codigo_expirado_se_marca_usado(client):
+    _guardar_codigo(datetime.utcnow() - timedelta(minutes=1))
+
+    assert _reset(client).status_code == 400
+    assert _codigo_usado() == 1
+    assert _login(client, EMAIL, "Clave#123").status_code == 200
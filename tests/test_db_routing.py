@@ -0,0 +1,83 @@
+# tests/test_db_routing.py
+"""
+RoutingSession.get_bind con dos SQLite (primario y réplica): cada uno
+tiene un usuario distinto para saber de cuál salió una lectura.
+"""
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from db import Base
+from db_routing import RoutingSession
+from models import User
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primario = create_engine(f"sqlite:///{tmp_path / 'primario.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+
+    for engine, origen in ((primario, "primario"), (replica, "replica")):
+        Base.metadata.create_all(engine)
+        with engine.begin() as conexion:
+            conexion.execute(User.__table__.insert().values(
+                id=1, email=f"{origen}@test.invalid", password_hash="x", user_type="paciente",
+            ))
+
+    yield primario, replica
+
+    primario.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def sesion(engines):
+    primario, replica = engines
+
+    class _Session(RoutingSession):
+        pass
+
+    _Session.primario = primario
+    _Session.replica = replica
+
+    db = sessionmaker(class_=_Session)()
+    db.info["replica"] = True
+    yield db
+    db.close()
+
+
+def _emails(engine):
+    with engine.connect() as conexion:
+        return set(conexion.execute(select(User.email)).scalars())
+
+
+def test_lecturas_van_a_la_replica(sesion):
+    assert sesion.get(User, 1).email == "replica@test.invalid"
+
+
+def test_escrituras_van_al_primario(sesion, engines):
+    primario, replica = engines
+
+    sesion.add(User(id=2, email="nuevo@test.invalid", password_hash="x", user_type="paciente"))
+    sesion.flush()
+    sesion.execute(update(User).where(User.id == 1).values(full_name="Actualizado"))
+    sesion.commit()
+
+    assert _emails(primario) == {"primario@test.invalid", "nuevo@test.invalid"}
+    assert _emails(replica) == {"replica@test.invalid"}
+
+    with primario.connect() as conexion:
+        assert conexion.execute(select(User.full_name).where(User.id == 1)).scalar() == "Actualizado"
+
+
+def test_lecturas_despues_de_escribir_siguen_en_el_primario(sesion):
+    sesion.add(User(id=2, email="nuevo@test.invalid", password_hash="x", user_type="paciente"))
+    sesion.flush()
+
+    emails = set(sesion.execute(select(User.email)).scalars())
+
+    assert emails == {"primario@test.invalid", "nuevo@test.invalid"}
+
+    sesion.commit()
+    sesion.expire_all()
+    assert sesion.get(User, 1).email == "primario@test.invalid"
@@ -0,0 +1,154 @@
+# tests/test_email_queue.py
+"""
+El worker de correos de recuperación no debe enviar dos veces la misma
+fila ni pisar cambios hechos mientras enviaba (lease tomado por otro
+worker, código usado o reemplazado).
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import db as db_module
+import email_queue
+from models import PasswordResetCode, User
+
+
+@pytest.fixture
+def db():
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    sesion = db_module.SessionLocal()
+    sesion.add(User(id=1, email="paciente@test.invalid", password_hash="x", user_type="paciente"))
+    sesion.commit()
+
+    yield sesion
+
+    sesion.close()
+
+
+def _codigos(db, total: int):
+    ahora = datetime.utcnow()
+    db.add_all(
+        PasswordResetCode(
+            user_id=1, code_hash=f"h{i}", expires_at=ahora + timedelta(minutes=10), used=0,
+            email_status="pendiente", email_attempts=0,
+            email_next_attempt_at=ahora - timedelta(seconds=total - i), pending_code=f"{i:06d}",
+        )
+        for i in range(total)
+    )
+    db.commit()
+
+
+def _filas(db) -> list[PasswordResetCode]:
+    db.expire_all()
+    return db.query(PasswordResetCode).order_by(PasswordResetCode.id).all()
+
+
+def _cambiar_fila(reset_code_id: int = 1, **valores):
+    """Simula otra transacción (la API u otro worker) durante el envío."""
+    otra = db_module.SessionLocal()
+    try:
+        otra.query(PasswordResetCode).filter(PasswordResetCode.id == reset_code_id).update(valores)
+        otra.commit()
+    finally:
+        otra.close()
+
+
+def _reservar_en_otro_worker():
+    otra = db_module.SessionLocal()
+    try:
+        return email_queue._reservar(otra, 10)
+    finally:
+        otra.close()
+
+
+def test_envio_exitoso_marca_enviado(db, monkeypatch):
+    _codigos(db, 1)
+    enviados = []
+    monkeypatch.setattr(email_queue, "send_password_reset_email", lambda email, code: enviados.append(code))
+
+    assert email_queue.procesar_pendientes(db) == 1
+
+    (fila,) = _filas(db)
+    assert enviados == ["000000"]
+    assert (fila.email_status, fila.email_attempts, fila.pending_code) == ("enviado", 1, None)
+
+
+def test_lease_se_renueva_antes_de_cada_envio(db, monkeypatch):
+    monkeypatch.setattr(email_queue, "EMAIL_LEASE_SEGUNDOS", 2)
+    _codigos(db, 2)
+    enviados, reservadas_por_otro = [], []
+
+    def enviar(email, code):
+        enviados.append(code)
+        if len(enviados) == 1:
+            # Más que el lease con que se reservó el lote.
+            time.sleep(2.1)
+        else:
+            reservadas_por_otro.extend(_reservar_en_otro_worker())
+
+    monkeypatch.setattr(email_queue, "send_password_reset_email", enviar)
+
+    email_queue.procesar_pendientes(db)
+
+    assert enviados == ["000000", "000001"]
+    assert reservadas_por_otro == []
+    assert [f.email_status for f in _filas(db)] == ["enviado", "enviado"]
+
+
+def test_no_envia_fila_tomada_por_otro_worker(db, monkeypatch):
+    _codigos(db, 2)
+    otro_lease = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+    enviados = []
+
+    def enviar(email, code):
+        enviados.append(code)
+        # Mientras se envía la primera, otro worker reservó la segunda.
+        _cambiar_fila(2, email_next_attempt_at=otro_lease)
+
+    monkeypatch.setattr(email_queue, "send_password_reset_email", enviar)
+
+    email_queue.procesar_pendientes(db)
+
+    assert enviados == ["000000"]
+    assert [f.email_status for f in _filas(db)] == ["enviado", "enviando"]
+    assert _filas(db)[1].email_next_attempt_at == otro_lease
+
+
+def test_no_pisa_cambio_durante_el_envio(db, monkeypatch):
+    _codigos(db, 1)
+    otro_lease = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+
+    def enviar(email, code):
+        _cambiar_fila(email_next_attempt_at=otro_lease)
+        raise RuntimeError("smtp caído")
+
+    monkeypatch.setattr(email_queue, "send_password_reset_email", enviar)
+
+    email_queue.procesar_pendientes(db)
+
+    (fila,) = _filas(db)
+    assert (fila.email_status, fila.email_attempts, fila.email_next_attempt_at) == ("enviando", 0, otro_lease)
+
+
+def test_no_envia_codigo_reemplazado(db, monkeypatch):
+    _codigos(db, 1)
+    enviados = []
+    reservar = email_queue._reservar
+
+    def reservar_y_reemplazar(db, lote):
+        reservadas = reservar(db, lote)
+        # forgot_password pidió otro código entre la reserva y el envío.
+        _cambiar_fila(used=1, pending_code=None)
+        return reservadas
+
+    monkeypatch.setattr(email_queue, "_reservar", reservar_y_reemplazar)
+    monkeypatch.setattr(email_queue, "send_password_reset_email", lambda email, code: enviados.append(code))
+
+    email_queue.procesar_pendientes(db)
+
+    (fila,) = _filas(db)
+    assert enviados == []
+    assert (fila.email_status, fila.used, fila.pending_code) == ("enviando", 1, None)
@@ -0,0 +1,239 @@
+# tests/test_explain.py
+"""
+EXPLAIN QUERY PLAN de las consultas de lectura más usadas de los routers.
+
+Cada consulta se ejecuta llamando a la función del router; se capturan los
+SELECT que emite y la prueba falla si alguno recorre una tabla completa
+(`SCAN tabla` sin índice), que es lo que los índices de las migraciones
+0001–0003, 0006 y 0007 deben evitar.
+"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+import db as db_module
+from models import (
+    Evaluation,
+    ObjetivoPlan,
+    PatientAppointment,
+    PatientMedication,
+    PlanTrabajo,
+    Profile,
+    User,
+)
+from patient_search import buscar_pacientes, indexar_paciente
+from routes_appointments import listar_citas, profesionales_mi_unidad
+from routes_calendar import _calendario_dia, _calendario_profesional, _calendario_rango
+from routes_evaluations import (
+    _actualizar_resumen,
+    _historial_instrumento,
+    _listar_evaluaciones,
+    _resumen_general,
+    compare_last_evaluations,
+    ultimo_automanejo_paciente,
+)
+from routes_medications import listar_medicamentos
+from routes_plan_trabajo import historial_planes, obtener_ultimo_plan
+from routes_profile import listar_pacientes, listar_pacientes_detalle
+
+
+PACIENTE = 1
+PROFESIONAL = 2
+HOY = date(2026, 1, 15)
+
+PROFESIONAL_ACTUAL = {"id": PROFESIONAL, "user_type": "profesional"}
+
+
+def _case_sensitive_like(conexion, _):
+    # LIKE de SQLite ignora mayúsculas y así no puede usar un índice para
+    # 'abc%'; los términos de búsqueda ya están en minúsculas, igual que en
+    # benchmarks/bench_busqueda.py.
+    conexion.execute("PRAGMA case_sensitive_like=ON")
+
+
+@pytest.fixture(scope="module")
+def db():
+    event.listen(db_module.engine, "connect", _case_sensitive_like)
+    db_module.engine.dispose()
+
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    sesion = db_module.SessionLocal()
+
+    paciente = User(
+        id=PACIENTE, email="paciente@test.invalid", password_hash="x", full_name="María Peña",
+        user_type="paciente", country_code="+52", phone_national="8331234567",
+        phone_number="+528331234567",
+    )
+    profesional = User(
+        id=PROFESIONAL, email="pro@test.invalid", password_hash="x", full_name="Dra. Ruiz",
+        user_type="profesional",
+    )
+    perfil = Profile(user_id=PACIENTE, nombre="María", apellido="Peña", nss="12345678901", unidad_medica="UMF 1")
+    sesion.add_all([
+        paciente,
+        profesional,
+        perfil,
+        Profile(user_id=PROFESIONAL, nombre="Ana", apellido="Ruiz", unidad_medica="UMF 1"),
+    ])
+    sesion.flush()
+
+    evaluacion = Evaluation(
+        user_id=PACIENTE, evaluador_id=PROFESIONAL, test_type="automanejo_paciente", score=10,
+        respuestas_json="{}", fecha_aplicacion=datetime(2026, 1, 10),
+    )
+    sesion.add(evaluacion)
+    sesion.flush()
+    _actualizar_resumen(sesion, evaluacion)
+
+    plan = PlanTrabajo(paciente_id=PACIENTE, profesional_id=PROFESIONAL)
+    sesion.add(plan)
+    sesion.flush()
+    sesion.add(ObjetivoPlan(plan_id=plan.id, descripcion="Caminar"))
+
+    sesion.add(PatientAppointment(
+        paciente_id=PACIENTE, profesional_id=PROFESIONAL, unidad_medica="UMF 1",
+        fecha_cita=HOY.isoformat(), hora_cita="10:00", motivo="Control", estado="programada",
+    ))
+    sesion.add(PatientMedication(
+        user_id=PACIENTE, nombre="Metformina", presentacion="tableta", cantidad="1",
+        unidad="pieza", frecuencia_texto="cada 12 horas", frecuencia_horas=12,
+        hora_inicio="08:00", fecha_inicio="2026-01-01", activo=1,
+    ))
+
+    indexar_paciente(sesion, paciente, perfil)
+    sesion.commit()
+
+    # Sin ANALYZE: con estadísticas de tablas de 2 filas SQLite prefiere
+    # recorrerlas completas; sin ellas asume tablas grandes, como en producción.
+
+    yield sesion
+
+    sesion.close()
+    event.remove(db_module.engine, "connect", _case_sensitive_like)
+    db_module.engine.dispose()
+
+
+def _cuenta(db, user_id):
+    return db.get(User, user_id), db.query(Profile).filter(Profile.user_id == user_id).one()
+
+
+CONSULTAS = {
+    # routes_evaluations
+    "evaluaciones_listado": lambda db: _listar_evaluaciones(db, PACIENTE, True, 20, None),
+    "evaluaciones_historial": lambda db: _historial_instrumento(
+        db, PACIENTE, "automanejo_paciente", True, 20, None
+    ),
+    "evaluaciones_resumen_general": lambda db: _resumen_general(db, PACIENTE),
+    "evaluaciones_compare": lambda db: compare_last_evaluations(
+        PACIENTE, db=db, current_user=PROFESIONAL_ACTUAL
+    ),
+    "evaluaciones_ultimo_automanejo": lambda db: ultimo_automanejo_paciente(
+        PACIENTE, db=db, current_user=PROFESIONAL_ACTUAL
+    ),
+    # routes_plan_trabajo
+    "plan_ultimo": lambda db: obtener_ultimo_plan(PACIENTE, db=db),
+    "plan_historial": lambda db: historial_planes(PACIENTE, limit=20, cursor=None, db=db),
+    # routes_appointments
+    "citas_listado": lambda db: listar_citas(db=db, cuenta=_cuenta(db, PACIENTE)),
+    "citas_profesionales_mi_unidad": lambda db: profesionales_mi_unidad(
+        db=db, cuenta=_cuenta(db, PACIENTE)
+    ),
+    # routes_calendar / routes_medications
+    "calendario_dia": lambda db: _calendario_dia(db, *_cuenta(db, PACIENTE), HOY),
+    "calendario_rango": lambda db: _calendario_rango(db, *_cuenta(db, PACIENTE), HOY, HOY),
+    "calendario_profesional": lambda db: _calendario_profesional(db, db.get(User, PROFESIONAL), HOY),
+    "medicamentos_listado": lambda db: listar_medicamentos(
+        incluir_inactivos=False, db=db, cuenta=_cuenta(db, PACIENTE)
+    ),
+    # routes_profile / patient_search
+    "pacientes_por_unidad": lambda db: listar_pacientes(
+        limit=20, cursor=None, unidad_medica="UMF 1", q=None,
+        current_user=PROFESIONAL_ACTUAL, db=db,
+    ),
+    "pacientes_busqueda": lambda db: listar_pacientes(
+        limit=20, cursor=None, unidad_medica=None, q="maria 833",
+        current_user=PROFESIONAL_ACTUAL, db=db,
+    ),
+    "pacientes_detalle_busqueda": lambda db: listar_pacientes_detalle(
+        limit=20, cursor=None, unidad_medica=None, q="pen",
+        current_user=PROFESIONAL_ACTUAL, db=db,
+    ),
+    "pacientes_buscar": lambda db: buscar_pacientes(db, "maria pe", 20),
+}
+
+# Índices que el plan debe recorrer por rango (SEARCH ... INDEX x (...)).
+# Un filtro que no los use puede pasar la prueba anterior si SQLite llega a
+# la tabla por otro índice, por ejemplo users.user_type.
+INDICES_ESPERADOS = {
+    "pacientes_por_unidad": "ix_profiles_unidad_user",
+    "pacientes_busqueda": "ix_patient_search_termino_user",
+    "pacientes_detalle_busqueda": "ix_patient_search_termino_user",
+    "pacientes_buscar": "ix_patient_search_termino_user",
+}
+
+
+def _capturar_selects(db, consulta):
+    sentencias = []
+
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            sentencias.append((statement, parameters))
+
+    event.listen(db_module.engine, "before_cursor_execute", _antes)
+    try:
+        consulta(db)
+    finally:
+        event.remove(db_module.engine, "before_cursor_execute", _antes)
+        db.expunge_all()
+
+    return sentencias
+
+
+def _plan(statement, parameters) -> list[str]:
+    with db_module.engine.connect() as conexion:
+        plan = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+
+    return [fila[-1] for fila in plan]
+
+
+def _escaneos_completos(statement, parameters):
+    detalles = _plan(statement, parameters)
+
+    return [
+        detalle
+        for detalle in detalles
+        if detalle.startswith("SCAN ")
+        and "USING INDEX" not in detalle
+        and "USING COVERING INDEX" not in detalle
+        and "USING INTEGER PRIMARY KEY" not in detalle
+        and detalle != "SCAN CONSTANT ROW"
+    ]
+
+
+@pytest.mark.parametrize("nombre", sorted(CONSULTAS))
+def test_consulta_sin_escaneo_completo(db, nombre):
+    sentencias = _capturar_selects(db, CONSULTAS[nombre])
+
+    assert sentencias, f"{nombre} no ejecutó ningún SELECT"
+
+    for statement, parameters in sentencias:
+        escaneos = _escaneos_completos(statement, parameters)
+        assert not escaneos, f"{nombre}: {escaneos}\n{statement}"
+
+
+@pytest.mark.parametrize("nombre", sorted(INDICES_ESPERADOS))
+def test_consulta_usa_indice(db, nombre):
+    indice = INDICES_ESPERADOS[nombre]
+    detalles = [
+        detalle
+        for statement, parameters in _capturar_selects(db, CONSULTAS[nombre])
+        for detalle in _plan(statement, parameters)
+    ]
+
+    assert any(
+        detalle.startswith("SEARCH ") and f"INDEX {indice} (" in detalle
+        for detalle in detalles
+    ), f"{nombre} no usa {indice}: {detalles}"
@@ -0,0 +1,181 @@
+# tests/test_password_hashing.py
+"""
+Rechazo rápido (HashingBusyError -> 503) cuando el pool de hashing está
+saturado o una tarea rebasa HASH_TIMEOUT.
+
+El pool de procesos se sustituye por uno de hilos y las tareas esperan un
+Event, para controlar cuándo terminan sin depender del costo de Argon2.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+import auth
+import password_hashing
+
+
+def _esperar(evento: threading.Event) -> str:
+    evento.wait(5)
+    return "listo"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Pool de 1 hilo con 1 lugar en cola: 2 cupos en total."""
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    monkeypatch.setattr(password_hashing, "HASH_POOL_SIZE", 1)
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 5.0)
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(password_hashing, "_executor", executor)
+
+    yield executor
+
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _en_hilo(fn, *args):
+    resultado = {}
+
+    def correr():
+        try:
+            resultado["valor"] = fn(*args)
+        except Exception as error:
+            resultado["error"] = error
+
+    hilo = threading.Thread(target=correr)
+    hilo.start()
+    return hilo, resultado
+
+
+def test_pool_saturado_rechaza_de_inmediato(pool):
+    evento = threading.Event()
+
+    # Una tarea corriendo y otra en cola ocupan los 2 cupos.
+    ocupados = [_en_hilo(password_hashing._ejecutar, _esperar, evento) for _ in range(2)]
+
+    for _ in range(100):
+        if password_hashing._slots._value == 0:
+            break
+        threading.Event().wait(0.01)
+
+    with pytest.raises(password_hashing.HashingBusyError):
+        password_hashing._ejecutar(_esperar, evento)
+
+    evento.set()
+    for hilo, resultado in ocupados:
+        hilo.join(5)
+        assert resultado == {"valor": "listo"}
+
+    # Al terminar las tareas los cupos vuelven a estar libres.
+    assert password_hashing._ejecutar(_esperar, evento) == "listo"
+
+
+def test_timeout_responde_busy_y_conserva_el_cupo(pool, monkeypatch):
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 0.05)
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+    evento = threading.Event()
+
+    with pytest.raises(password_hashing.HashingBusyError):
+        password_hashing._ejecutar(_esperar, evento)
+
+    # La tarea sigue corriendo en el pool: su cupo no se libera todavía.
+    with pytest.raises(password_hashing.HashingBusyError):
+        password_hashing._ejecutar(_esperar, evento)
+
+    evento.set()
+    pool.submit(lambda: None).result(5)
+
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 5.0)
+    assert password_hashing._ejecutar(_esperar, evento) == "listo"
+
+
+def test_timeout_cancela_la_tarea_en_cola(pool, monkeypatch):
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 0.05)
+    bloqueo = threading.Event()
+    ejecutada = threading.Event()
+
+    # Ocupa el único hilo para que la siguiente tarea quede en cola.
+    corriendo = pool.submit(_esperar, bloqueo)
+
+    with pytest.raises(password_hashing.HashingBusyError):
+        password_hashing._ejecutar(ejecutada.set)
+
+    bloqueo.set()
+    corriendo.result(5)
+    pool.submit(lambda: None).result(5)
+
+    assert not ejecutada.is_set()
+    assert password_hashing._slots._value == 2
+
+
+def test_async_no_bloquea_el_event_loop_mientras_espera(pool):
+    evento = threading.Event()
+
+    async def escenario():
+        tarea = asyncio.create_task(password_hashing._ejecutar_async(_esperar, evento))
+
+        # El event loop sigue atendiendo otras corrutinas mientras el hash
+        # está en el pool; un handler síncrono tendría su hilo bloqueado.
+        await asyncio.sleep(0.05)
+        assert not tarea.done()
+
+        evento.set()
+        return await tarea
+
+    assert asyncio.run(escenario()) == "listo"
+
+
+def test_async_pool_saturado_y_timeout(pool, monkeypatch):
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 0.05)
+    bloqueo = threading.Event()
+    ejecutada = threading.Event()
+
+    # Ocupa el único hilo para que la siguiente tarea quede en cola.
+    corriendo = pool.submit(_esperar, bloqueo)
+
+    async def escenario():
+        with pytest.raises(password_hashing.HashingBusyError):
+            await password_hashing._ejecutar_async(ejecutada.set)
+
+    asyncio.run(escenario())
+
+    bloqueo.set()
+    corriendo.result(5)
+    pool.submit(lambda: None).result(5)
+
+    # La tarea en cola se canceló y su cupo volvió al semáforo.
+    assert not ejecutada.is_set()
+    assert password_hashing._slots._value == 2
+
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT", 5.0)
+    evento = threading.Event()
+
+    async def saturado():
+        tarea = asyncio.create_task(password_hashing._ejecutar_async(_esperar, evento))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(password_hashing.HashingBusyError):
+            await password_hashing._ejecutar_async(_esperar, evento)
+
+        evento.set()
+        return await tarea
+
+    assert asyncio.run(saturado()) == "listo"
+
+
+def test_auth_responde_503_con_retry_after(monkeypatch):
+    def ocupado(*args):
+        raise password_hashing.HashingBusyError()
+
+    monkeypatch.setattr(password_hashing, "_ejecutar", ocupado)
+
+    with pytest.raises(HTTPException) as error:
+        auth.hash_password("Clave#123")
+
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
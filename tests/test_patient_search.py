@@ -0,0 +1,57 @@
+# tests/test_patient_search.py
+"""
+buscar_pacientes debe regresar pacientes distintos y la página completa
+aunque un paciente coincida con muchos términos del mismo prefijo.
+"""
+import pytest
+
+import db as db_module
+from models import Profile, User
+from patient_search import buscar_pacientes, indexar_paciente
+
+
+@pytest.fixture(scope="module")
+def db():
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    sesion = db_module.SessionLocal()
+
+    # El primero tiene 8 términos que empiezan con "mar" y todos ordenan
+    # antes que los de los demás.
+    pacientes = [
+        (1, "Mar Mara Marco", "Marcos Maria Mariana Marina Marta"),
+        (2, "Maru", "Zúñiga"),
+        (3, "Marvin", "Peña"),
+        (4, "Ana", "Ruiz"),
+    ]
+    for user_id, nombre, apellido in pacientes:
+        user = User(
+            id=user_id, email=f"p{user_id}@test.invalid", password_hash="x",
+            full_name=f"{nombre} {apellido}", user_type="paciente",
+        )
+        perfil = Profile(user_id=user_id, nombre=nombre, apellido=apellido, unidad_medica="UMF 1")
+        sesion.add_all([user, perfil])
+        sesion.flush()
+        indexar_paciente(sesion, user, perfil)
+
+    sesion.commit()
+    yield sesion
+    sesion.close()
+
+
+def _ids(filas):
+    return [user.id for user, _ in filas]
+
+
+def test_pagina_completa_con_terminos_repetidos(db):
+    assert _ids(buscar_pacientes(db, "mar", 2)) == [1, 2]
+
+
+def test_sin_repetidos_y_en_orden(db):
+    assert _ids(buscar_pacientes(db, "mar", 20)) == [1, 2, 3]
+
+
+def test_todas_las_palabras(db):
+    assert _ids(buscar_pacientes(db, "mar pena", 20)) == [3]
+    assert _ids(buscar_pacientes(db, "ana", 20)) == [4]
@@ -0,0 +1,57 @@
+# tests/test_plan_trabajo.py
+"""
+PUT /api/plan/evaluar/{plan_id} acepta el cuerpo que mandaba la app antes
+de validarlo con PlanEvaluacionIn: ids como texto y cumplimiento con
+decimales (se trunca a entero).
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import db as db_module
+from app import app
+from models import ObjetivoPlan, PlanTrabajo, User
+
+
+@pytest.fixture
+def client():
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    sesion = db_module.SessionLocal()
+    sesion.add(User(id=1, email="paciente@test.invalid", password_hash="x", user_type="paciente"))
+    sesion.add(PlanTrabajo(id=1, paciente_id=1))
+    sesion.add_all([
+        ObjetivoPlan(id=1, plan_id=1, descripcion="Caminar"),
+        ObjetivoPlan(id=2, plan_id=1, descripcion="Dormir"),
+    ])
+    sesion.commit()
+    sesion.close()
+
+    return TestClient(app)
+
+
+def _cumplimientos() -> dict:
+    sesion = db_module.SessionLocal()
+    try:
+        return {o.id: o.cumplimiento for o in sesion.query(ObjetivoPlan)}
+    finally:
+        sesion.close()
+
+
+def test_cumplimiento_con_decimales_se_trunca(client):
+    respuesta = client.put("/api/plan/evaluar/1", json={"objetivos": [
+        {"id": "1", "cumplimiento": 87.5},
+        {"id": 2, "cumplimiento": 150.9},
+    ]})
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert _cumplimientos() == {1: 87, 2: 100}
+
+
+def test_id_no_numerico_responde_422(client):
+    respuesta = client.put("/api/plan/evaluar/1", json={"objetivos": [
+        {"id": "abc", "cumplimiento": 50},
+    ]})
+
+    assert respuesta.status_code == 422
+    assert _cumplimientos() == {1: 0, 2: 0}
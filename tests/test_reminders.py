@@ -0,0 +1,163 @@
+# tests/test_reminders.py
+"""
+El worker de recordatorios no debe pisar cambios hechos a una fila mientras
+la notificaba (cita cancelada o reprogramada, lease tomado por otro worker).
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import db as db_module
+import reminders
+from models import PatientAppointment, ReminderQueue, User
+
+
+PACIENTE = 1
+PROFESIONAL = 2
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db_module.Base.metadata.drop_all(db_module.engine)
+    db_module.Base.metadata.create_all(db_module.engine)
+
+    sesion = db_module.SessionLocal()
+    sesion.add_all([
+        User(id=PACIENTE, email="paciente@test.invalid", password_hash="x", user_type="paciente"),
+        User(id=PROFESIONAL, email="pro@test.invalid", password_hash="x", user_type="profesional"),
+    ])
+    sesion.flush()
+
+    cita = PatientAppointment(
+        paciente_id=PACIENTE, profesional_id=PROFESIONAL, unidad_medica="UMF 1",
+        fecha_cita="2099-01-15", hora_cita="10:00", motivo="Control", estado="programada",
+    )
+    sesion.add(cita)
+    sesion.flush()
+
+    ahora = datetime.utcnow()
+    sesion.add(ReminderQueue(
+        appointment_id=cita.id, user_id=PACIENTE, tipo="1_dia",
+        cita_at=ahora + timedelta(days=1), due_at=ahora - timedelta(minutes=1),
+        status="pendiente", attempts=0, created_at=ahora,
+    ))
+    sesion.commit()
+
+    monkeypatch.setattr(reminders, "REMINDER_NOTIFIER", "prueba")
+
+    yield sesion
+
+    reminders.NOTIFICADORES.pop("prueba", None)
+    sesion.close()
+
+
+def _fila(db) -> ReminderQueue:
+    db.expire_all()
+    return db.query(ReminderQueue).one()
+
+
+def _segundo_recordatorio(db):
+    fila = _fila(db)
+    db.add(ReminderQueue(
+        appointment_id=fila.appointment_id, user_id=PACIENTE, tipo="4_horas",
+        cita_at=fila.cita_at, due_at=fila.due_at + timedelta(seconds=1),
+        status="pendiente", attempts=0, created_at=fila.created_at,
+    ))
+    db.commit()
+
+
+def _cambiar_fila(reminder_id: int | None = None, **valores):
+    """Simula otra transacción (la API u otro worker) durante el envío."""
+    otra = db_module.SessionLocal()
+    try:
+        query = otra.query(ReminderQueue)
+        if reminder_id is not None:
+            query = query.filter(ReminderQueue.id == reminder_id)
+        query.update(valores)
+        otra.commit()
+    finally:
+        otra.close()
+
+
+def test_envio_exitoso_marca_enviado(db):
+    enviados = []
+    reminders.registrar_notificador("prueba", enviados.append)
+
+    assert reminders.procesar_recordatorios(db) == 1
+
+    fila = _fila(db)
+    assert len(enviados) == 1
+    assert (fila.status, fila.attempts) == ("enviado", 1)
+
+
+def test_no_pisa_cancelacion_durante_el_envio(db):
+    reminders.registrar_notificador("prueba", lambda _: _cambiar_fila(status="cancelado"))
+
+    reminders.procesar_recordatorios(db)
+
+    fila = _fila(db)
+    assert (fila.status, fila.attempts) == ("cancelado", 0)
+
+
+def test_no_pisa_fila_con_otro_lease(db):
+    otro_lease = datetime.utcnow() + timedelta(hours=1)
+
+    def fallar(_):
+        _cambiar_fila(due_at=otro_lease)
+        raise RuntimeError("smtp caído")
+
+    reminders.registrar_notificador("prueba", fallar)
+
+    reminders.procesar_recordatorios(db)
+
+    fila = _fila(db)
+    assert (fila.status, fila.attempts, fila.due_at) == ("enviando", 0, otro_lease)
+
+
+def test_lease_se_renueva_antes_de_cada_envio(db, monkeypatch):
+    monkeypatch.setattr(reminders, "REMINDER_LEASE_SEGUNDOS", 2)
+    _segundo_recordatorio(db)
+    enviados, reservadas_por_otro = [], []
+
+    def notificar(recordatorio):
+        enviados.append(recordatorio["tipo"])
+        if len(enviados) == 1:
+            # Más que el lease con que se reservó el lote.
+            time.sleep(2.1)
+        else:
+            otra = db_module.SessionLocal()
+            try:
+                reservadas_por_otro.extend(reminders._reservar(otra, 10))
+            finally:
+                otra.close()
+
+    reminders.registrar_notificador("prueba", notificar)
+
+    reminders.procesar_recordatorios(db)
+
+    db.expire_all()
+    assert sorted(enviados) == ["1_dia", "4_horas"]
+    assert reservadas_por_otro == []
+    assert {f.status for f in db.query(ReminderQueue)} == {"enviado"}
+
+
+def test_no_envia_fila_tomada_por_otro_worker(db):
+    _segundo_recordatorio(db)
+    otro_lease = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+    enviados = []
+
+    def notificar(recordatorio):
+        enviados.append(recordatorio["id"])
+        # Mientras se envía el primero, otro worker reservó el que falta.
+        (pendiente,) = {1, 2} - set(enviados)
+        _cambiar_fila(pendiente, due_at=otro_lease)
+
+    reminders.registrar_notificador("prueba", notificar)
+
+    reminders.procesar_recordatorios(db)
+
+    db.expire_all()
+    (tomada,) = db.query(ReminderQueue).filter(ReminderQueue.id != enviados[0]).all()
+    assert len(enviados) == 1
+    assert (tomada.status, tomada.due_at, tomada.attempts) == ("enviando", otro_lease, 0)
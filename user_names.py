@@ -0,0 +1,84 @@
+# user_names.py
+"""
+Resolución de nombres visibles de usuarios (profesionales) en lote,
+con un caché en memoria por proceso.
+
+Nombre visible: "nombre apellido" del perfil; si está vacío, users.full_name.
+El caché expira por TTL y se invalida al actualizar el perfil
+(routes_profile.create_or_update_profile).
+"""
+import os
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from models import User, Profile
+
+
+NOMBRES_CACHE_TTL = int(os.getenv("NOMBRES_CACHE_TTL", "300"))
+NOMBRES_CACHE_MAX = int(os.getenv("NOMBRES_CACHE_MAX", "5000"))
+
+# user_id -> (expira_en, nombre o None)
+_cache: dict[int, tuple[float, str | None]] = {}
+_lock = threading.Lock()
+
+
+def nombre_visible(user: User | None, profile: Profile | None) -> str | None:
+    if profile:
+        nombre = f"{profile.nombre or ''} {profile.apellido or ''}".strip()
+        if nombre:
+            return nombre
+
+    if user and user.full_name:
+        return user.full_name
+
+    return None
+
+
+def resolver_nombres(db: Session, user_ids) -> dict[int, str | None]:
+    """
+    Regresa {user_id: nombre visible} para todos los ids recibidos.
+    Los ids que no están en caché se resuelven con una sola consulta.
+    """
+    ids = {int(i) for i in user_ids if i}
+    ahora = time.monotonic()
+    nombres = {}
+
+    with _lock:
+        for user_id in ids:
+            entrada = _cache.get(user_id)
+            if entrada and entrada[0] > ahora:
+                nombres[user_id] = entrada[1]
+
+    faltantes = ids - nombres.keys()
+
+    if faltantes:
+        filas = (
+            db.query(User, Profile)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .filter(User.id.in_(faltantes))
+            .all()
+        )
+
+        encontrados = {user.id: nombre_visible(user, profile) for user, profile in filas}
+
+        for user_id in faltantes:
+            nombres[user_id] = encontrados.get(user_id)
+
+        expira_en = ahora + NOMBRES_CACHE_TTL
+
+        with _lock:
+            for user_id in faltantes:
+                _cache[user_id] = (expira_en, nombres[user_id])
+
+            # Al rebasar el máximo se descartan las entradas más antiguas.
+            while len(_cache) > NOMBRES_CACHE_MAX:
+                _cache.pop(next(iter(_cache)))
+
+    return nombres
+
+
+def invalidar_nombre(user_id: int) -> None:
+    with _lock:
+        _cache.pop(int(user_id), None)